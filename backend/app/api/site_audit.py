@@ -1,11 +1,32 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.site_audit import SiteAuditRequest, SiteAuditResponse
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.audit_job import AuditJob
+from app.schemas.site_audit import (
+    SiteAuditRequest,
+    SiteAuditResponse,
+    BulkAuditRequest,
+    SuggestionsResponse,
+    AuditJobResponse,
+)
+from app.services.audit_job_service import AuditJobService, enqueue_audit_job
+from app.services.audit_rules import rule_registry
+from app.services.screenshot_service import screenshot_service
 from app.services.site_audit_service import SiteAuditService
+import asyncio
+import json
 import logging
+from typing import Optional
 
 router = APIRouter()
 site_audit_service = SiteAuditService()
 
+def _check_rule_pack(rule_pack: Optional[str]):
+    if rule_pack and not rule_registry.has(rule_pack):
+        raise HTTPException(status_code=400, detail=f"Unknown rule pack: {rule_pack}")
+
 @router.post("/analyze", response_model=SiteAuditResponse)
 async def analyze_site(request: SiteAuditRequest):
     """
@@ -13,6 +34,7 @@ async def analyze_site(request: SiteAuditRequest):
     Requires user information (name, role, email) for lead capture.
     Returns comprehensive audit results with scores and suggestions.
     """
+    _check_rule_pack(request.rule_pack)
     try:
         # Log lead information for tracking
         logging.info(f"🔍 Audit requested by {request.user_name} ({request.user_email}) for {request.url}")
@@ -29,7 +51,14 @@ async def analyze_site(request: SiteAuditRequest):
         # Run the audit
         result = await site_audit_service.audit_website(
             url=str(request.url),
-            depth=request.depth
+            depth=request.depth,
+            bypass_cache=request.bypass_cache,
+            force_refresh=request.force_refresh,
+            defer_suggestions=request.defer_suggestions,
+            suggestions_webhook_url=str(request.suggestions_webhook_url) if request.suggestions_webhook_url else None,
+            include_screenshot=request.include_screenshot,
+            render_mode=request.render_mode,
+            rule_pack=request.rule_pack,
         )
 
         logging.info(f"✅ Audit completed for {request.url} - Score: {result['overall_score']}/100")
@@ -45,6 +74,172 @@ async def analyze_site(request: SiteAuditRequest):
             detail=f"Failed to analyze website: {str(e)}"
         )
 
+@router.get("/suggestions/{suggestions_id}", response_model=SuggestionsResponse)
+async def get_suggestions(suggestions_id: str):
+    """
+    AI suggestions for an audit run with defer_suggestions.
+    Status is 'pending' until they are ready.
+    """
+    suggestions = await site_audit_service.get_suggestions(suggestions_id)
+    if suggestions is None:
+        raise HTTPException(status_code=404, detail="Suggestions not found or expired")
+    return SuggestionsResponse(**suggestions)
+
+@router.get("/screenshots/{name}")
+async def get_screenshot(name: str):
+    """
+    A stored page screenshot. Names are content hashes, so responses never change.
+    """
+    screenshot = await asyncio.to_thread(screenshot_service.load, name)
+    if screenshot is None:
+        raise HTTPException(status_code=404, detail="Screenshot not found")
+    data, content_type = screenshot
+    return Response(
+        content=data,
+        media_type=content_type,
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/analyze/stream")
+async def analyze_site_stream(request: SiteAuditRequest):
+    """
+    Same audit as /analyze, streamed as server-sent events: 'started',
+    'page' as each page is fetched, 'crawl_complete', 'analysis' per analyzer, 'scores',
+    'suggestion' per AI suggestion, then 'result' with the full
+    SiteAuditResponse (or 'error').
+    """
+    _check_rule_pack(request.rule_pack)
+    logging.info(f"🔍 Streaming audit requested by {request.user_name} ({request.user_email}) for {request.url}")
+
+    async def event_stream():
+        try:
+            async for event in site_audit_service.stream_audit(
+                url=str(request.url),
+                depth=request.depth,
+                bypass_cache=request.bypass_cache,
+                force_refresh=request.force_refresh,
+                include_screenshot=request.include_screenshot,
+                render_mode=request.render_mode,
+                rule_pack=request.rule_pack,
+            ):
+                if event['event'] == 'result':
+                    result = SiteAuditResponse(**event['data'])
+                    logging.info(f"✅ Audit completed for {request.url} - Score: {result.overall_score}/100")
+                    yield _sse('result', result.model_dump(mode='json'))
+                else:
+                    yield _sse(event['event'], event['data'])
+        except Exception as e:
+            logging.error(f"❌ Audit failed for {request.url}: {e}")
+            yield _sse('error', {'detail': f"Failed to analyze website: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx-style proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+@router.post("/bulk")
+async def analyze_sites_bulk(request: BulkAuditRequest):
+    """
+    Audit a list of websites (e.g. an agency's clients) in one request.
+    Streams NDJSON: one line per site as soon as it finishes, with either
+    the full SiteAuditResponse or an error.
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="No URLs to audit")
+    _check_rule_pack(request.rule_pack)
+    if len(request.urls) > settings.SITE_AUDIT_BULK_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.SITE_AUDIT_BULK_MAX_URLS} URLs per bulk audit"
+        )
+
+    logging.info(f"🔍 Bulk audit of {len(request.urls)} sites requested by {request.user_name} ({request.user_email})")
+
+    async def ndjson_stream():
+        async for outcome in site_audit_service.bulk_audit(
+            [str(url) for url in request.urls],
+            depth=request.depth,
+            bypass_cache=request.bypass_cache,
+            force_refresh=request.force_refresh,
+            defer_suggestions=request.defer_suggestions,
+            include_screenshot=request.include_screenshot,
+            render_mode=request.render_mode,
+            rule_pack=request.rule_pack,
+        ):
+            if outcome['success']:
+                line = {
+                    'url': outcome['url'],
+                    'success': True,
+                    'result': SiteAuditResponse(**outcome['result']).model_dump(mode='json'),
+                }
+            else:
+                logging.error(f"❌ Audit failed for {outcome['url']}: {outcome['error']}")
+                line = {
+                    'url': outcome['url'],
+                    'success': False,
+                    'error': f"Failed to analyze website: {outcome['error']}",
+                }
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _job_response(job: AuditJob) -> AuditJobResponse:
+    return AuditJobResponse(
+        job_id=job.id,
+        status=job.status,
+        url=job.url,
+        depth=job.depth,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        result=SiteAuditResponse(**job.result) if job.result else None,
+    )
+
+@router.post("/jobs", response_model=AuditJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_audit_job(request: SiteAuditRequest, db: Session = Depends(get_db)):
+    """
+    Queue a website audit for a background worker.
+    Returns a job ID to poll with GET /jobs/{job_id}.
+    """
+    _check_rule_pack(request.rule_pack)
+    job = AuditJobService(db).create_job(request)
+    logging.info(f"🔍 Audit job {job.id} queued by {request.user_name} ({request.user_email}) for {request.url}")
+
+    try:
+        enqueue_audit_job(job.id, site_audit_service)
+    except Exception as e:
+        logging.error(f"❌ Could not queue audit job {job.id}: {e}")
+        AuditJobService(db).mark_failed(job, "Could not queue the audit, please try again")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Audit queue is unavailable"
+        )
+
+    return _job_response(job)
+
+@router.get("/jobs/{job_id}", response_model=AuditJobResponse)
+async def get_audit_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    Status of a queued audit, with the full result once it has completed.
+    """
+    job = AuditJobService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audit job not found")
+    return _job_response(job)
+
 @router.get("/health")
 async def health_check():
     """
@@ -0,0 +1,32 @@
+from celery import Celery
+from app.core.config import settings
+
+
+def _broker_url() -> str:
+    url = settings.celery_broker_url or "memory://"
+    # Celery refuses rediss:// URLs that don't state how to verify the certificate
+    if url.startswith("rediss://") and "ssl_cert_reqs" not in url:
+        url += ("&" if "?" in url else "?") + "ssl_cert_reqs=required"
+    return url
+
+
+celery_app = Celery("seo_geo", broker=_broker_url(), include=["app.worker"])
+
+celery_app.conf.update(
+    # Job state and results are stored in the database, not a result backend
+    task_ignore_result=True,
+    # Acknowledge only after the audit finishes, so a worker that dies mid-audit
+    # (deploy, OOM) has its job redelivered instead of lost
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_time_limit=settings.AUDIT_JOB_TIME_LIMIT + 60,
+    task_serializer="json",
+    accept_content=["json"],
+    broker_connection_retry_on_startup=True,
+)
+
+
+def jobs_use_broker() -> bool:
+    """Without a broker, jobs run inside the API process (local development)."""
+    return settings.celery_broker_url is not None
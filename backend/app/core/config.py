@@ -1,5 +1,7 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
+from urllib.parse import quote
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "SEO-GEO Optimizer"
@@ -9,7 +11,7 @@ class Settings(BaseSettings):
     # Database — defaults to SQLite, override with DATABASE_URL in .env
     DATABASE_URL: str = "sqlite:///./seo_geo.db"
 
-    # Postgres fields kept optional (ignored if DATABASE_URL is set)
+    # Postgres fields kept optional (used to build DATABASE_URL when it is not set)
     POSTGRES_SERVER: Optional[str] = None
     POSTGRES_USER: Optional[str] = None
     POSTGRES_PASSWORD: Optional[str] = None
@@ -34,9 +36,135 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = None
     SMTP_FROM: Optional[str] = None
 
+    # Site audit crawler
+    SITE_AUDIT_MAX_PAGES: int = 10000       # hard ceiling on pages crawled by any audit
+    SITE_AUDIT_MAX_REQUEST_DEPTH: int = 100  # largest depth (pages crawled) an API request may ask for
+    SITE_AUDIT_CRAWL_CONCURRENCY: int = 8   # fetch workers per audit
+    SITE_AUDIT_CRAWL_PER_HOST: int = 4      # max in-flight requests per host
+    SITE_AUDIT_PARSE_WORKERS: int = 2       # HTML parser processes (0 = thread pool; Celery workers always use threads)
+    SITE_AUDIT_PARSE_QUEUE_SIZE: int = 32   # max pages waiting on the parser pool
+    SITE_AUDIT_MEMORY_BUDGET_MB: int = 64   # per-audit crawl memory before stopping early
+    SITE_AUDIT_MAX_PAGE_BYTES: int = 3 * 1024 * 1024  # stop reading a page body after this
+    SITE_AUDIT_SCORE_ALL_PAGES: bool = True  # score every crawled page, not just the homepage
+    SITE_AUDIT_INCREMENTAL: bool = True      # reuse stored features of unchanged pages, diff issues
+    SITE_AUDIT_RULE_PACKS_DIR: Optional[str] = None  # directory of custom rule packs (*.json), chosen per audit
+
+    # Page resources (CSS, JS, fonts, images): weight and render-blocking report
+    SITE_AUDIT_RESOURCES_ENABLED: bool = True
+    SITE_AUDIT_RESOURCE_CONCURRENCY: int = 16   # resource probes in flight per audit
+    SITE_AUDIT_RESOURCE_MAX: int = 300          # unique resources probed per audit
+    SITE_AUDIT_RESOURCE_TIMEOUT: float = 10
+
+    # Link health (broken links and redirect chains)
+    SITE_AUDIT_LINK_CHECK_ENABLED: bool = True
+    SITE_AUDIT_LINK_CHECK_CONCURRENCY: int = 16  # link checks in flight per audit
+    SITE_AUDIT_LINK_CHECK_MAX: int = 500          # unique links checked per audit
+    SITE_AUDIT_LINK_CHECK_TIMEOUT: float = 10
+    SITE_AUDIT_LINK_CACHE_TTL: int = 3600         # seconds a link's status is reused
+    SITE_AUDIT_LINK_CACHE_MAX_ENTRIES: int = 20000
+
+    # Bulk audits (one fair scheduler shared by every site being audited)
+    SITE_AUDIT_BULK_MAX_URLS: int = 500
+    SITE_AUDIT_BULK_CONCURRENT_SITES: int = 16    # sites audited at once
+    SITE_AUDIT_BULK_GLOBAL_CONCURRENCY: int = 64  # in-flight page fetches across all sites
+
+    # robots.txt and sitemap seeding
+    SITE_AUDIT_RESPECT_ROBOTS: bool = True
+    SITE_AUDIT_ROBOTS_TTL: int = 3600           # seconds robots/sitemap data is cached per host
+    SITE_AUDIT_ROBOTS_CACHE_MAX_ENTRIES: int = 1000  # hosts whose robots/sitemap data is kept
+    SITE_AUDIT_MAX_CRAWL_DELAY: float = 2.0     # cap on honoured Crawl-delay, in seconds
+    SITE_AUDIT_SITEMAP_MAX_FILES: int = 10      # sitemap files (incl. index children) per host
+    SITE_AUDIT_SITEMAP_MAX_URLS: int = 5000
+
+    # URL canonicalization and visited-set sizing
+    SITE_AUDIT_ALLOW_QUERY_PARAMS: List[str] = []   # if set, all other query params are dropped
+    SITE_AUDIT_DENY_QUERY_PARAMS: List[str] = []    # extra params to drop (tracking ones always are)
+    SITE_AUDIT_BLOOM_VISITED_THRESHOLD: int = 1000  # crawls of this many pages use a Bloom filter
+    SITE_AUDIT_BLOOM_ERROR_RATE: float = 0.001
+    SITE_AUDIT_LINKS_PER_PAGE_ESTIMATE: int = 50    # sizes the Bloom filter
+    SITE_AUDIT_BLOOM_MAX_MB: int = 8                # ... but never larger than this
+
+    # Crawl-trap and faceted-URL protection (URLs queued per learned URL template)
+    SITE_AUDIT_URL_PATTERN_GUARD: bool = True
+    SITE_AUDIT_PATTERN_MAX_SHARE: float = 0.2       # share of the page budget one path template may use
+    SITE_AUDIT_PATTERN_MIN_URLS: int = 10           # ... but never fewer URLs than this
+    SITE_AUDIT_QUERY_PATTERN_MAX_URLS: int = 5      # URLs per query template (filters, sorting, paging)
+
+    # On-disk crawl cache (ETag / Last-Modified revalidation)
+    CRAWL_CACHE_ENABLED: bool = True
+    CRAWL_CACHE_PATH: str = "./crawl_cache.db"
+    CRAWL_CACHE_MAX_MB: int = 256
+
+    # Redis (optional — shared caches fall back to in-process storage)
+    REDIS_URL: Optional[str] = None         # full URL; otherwise built from REDIS_HOST
+    REDIS_HOST: Optional[str] = None
+    REDIS_PORT: int = 6379
+    REDIS_PASSWORD: Optional[str] = None
+    REDIS_SSL: bool = False
+
+    # Background audit jobs (Celery; run inside the API process when no broker is configured)
+    CELERY_BROKER_URL: Optional[str] = None  # defaults to the Redis URL
+    AUDIT_JOB_TIME_LIMIT: int = 900          # seconds before a running job is failed
+
+    # Finished audit results
+    AUDIT_CACHE_ENABLED: bool = True
+    AUDIT_CACHE_TTL: int = 900              # seconds a result is served from cache
+    AUDIT_CACHE_MAX_ENTRIES: int = 256      # in-process fallback size
+    AUDIT_SUGGESTIONS_TTL: int = 86400      # seconds deferred AI suggestions stay fetchable
+
+    # Screenshots (headless Chromium via Playwright, shared warm browser pool)
+    SCREENSHOTS_ENABLED: bool = True
+    SCREENSHOT_FORMAT: str = "jpeg"         # "jpeg" or "webp" (webp needs Pillow)
+    SCREENSHOT_QUALITY: int = 70
+    SCREENSHOT_TIMEOUT: float = 20          # seconds to wait for the page to load
+    BROWSER_POOL_SIZE: int = 2              # warm browser contexts = max open pages
+    BROWSER_CONTEXT_MAX_USES: int = 50      # pages per context before it is recycled
+
+    # JavaScript rendering for client-side apps (uses the same browser pool)
+    SITE_AUDIT_RENDER_MODE: str = "auto"        # "auto" (app shells only), "always" or "never"
+    SITE_AUDIT_RENDER_TIMEOUT: float = 15       # seconds to reach DOMContentLoaded
+    SITE_AUDIT_RENDER_IDLE_TIMEOUT: float = 5   # extra seconds allowed to reach network idle
+
+    # Shared crawler HTTP client
+    CRAWLER_HTTP_POOL_LIMIT: int = 100      # total pooled connections
+    CRAWLER_HTTP_POOL_PER_HOST: int = 8     # pooled connections per host
+    CRAWLER_DNS_CACHE_TTL: int = 300        # seconds
+    CRAWLER_KEEPALIVE_TIMEOUT: float = 30   # seconds an idle connection is kept
+
     # Frontend
     FRONTEND_URL: str = "http://localhost:3000"
 
+    # Public base URL of this API, for links handed to the frontend (e.g. screenshot URLs)
+    PUBLIC_API_URL: str = "http://localhost:8000"
+
+    @model_validator(mode="after")
+    def _resolve_database_url(self) -> "Settings":
+        # The API and the Celery worker must share one database, so never fall
+        # back to a per-process SQLite file when Postgres is configured
+        if "DATABASE_URL" not in self.model_fields_set and self.POSTGRES_SERVER:
+            auth = quote(self.POSTGRES_USER or "", safe="")
+            if self.POSTGRES_PASSWORD:
+                auth += f":{quote(self.POSTGRES_PASSWORD, safe='')}"
+            self.DATABASE_URL = f"postgresql://{auth}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB or ''}"
+        elif self.DATABASE_URL.startswith("postgres://"):
+            # Heroku/Render style scheme, which SQLAlchemy no longer accepts
+            self.DATABASE_URL = "postgresql://" + self.DATABASE_URL[len("postgres://"):]
+        return self
+
+    @property
+    def redis_url(self) -> Optional[str]:
+        if self.REDIS_URL:
+            return self.REDIS_URL
+        if not self.REDIS_HOST:
+            return None
+        scheme = "rediss" if self.REDIS_SSL else "redis"
+        auth = f":{quote(self.REDIS_PASSWORD, safe='')}@" if self.REDIS_PASSWORD else ""
+        return f"{scheme}://{auth}{self.REDIS_HOST}:{self.REDIS_PORT}/0"
+
+    @property
+    def celery_broker_url(self) -> Optional[str]:
+        return self.CELERY_BROKER_URL or self.redis_url
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, create_engine, inspect, literal, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
 from typing import Generator
@@ -18,4 +19,59 @@ def get_db() -> Generator[Session, None, None]:
 
 def init_db():
     from app.models.user import Base
+    import app.models.audit_job  # noqa: F401 — registers the audit_jobs table
+    import app.models.audit_snapshot  # noqa: F401 — page and site snapshot tables
+    import app.models.screenshot  # noqa: F401 — stored page screenshots
+    _drop_outdated_tables(engine, Base.metadata)
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine, Base.metadata)
+
+# Tables holding data the next audit rebuilds: recreated, not migrated,
+# when their columns change (their keys and indexes change with them)
+REBUILDABLE_TABLES = {"page_snapshots", "site_snapshots"}
+
+def _drop_outdated_tables(bind: Engine, metadata: MetaData):
+    inspector = inspect(bind)
+    for name in REBUILDABLE_TABLES & set(metadata.tables):
+        table = metadata.tables[name]
+        if not inspector.has_table(name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(name)}
+        if existing != set(table.columns.keys()):
+            try:
+                table.drop(bind=bind)
+            except Exception as e:
+                print(f"Error dropping outdated table {name}: {e}")
+
+def _add_missing_columns(bind: Engine, metadata: MetaData):
+    """
+    create_all() only creates missing tables, so columns added to a model
+    later are added to existing tables here. New columns must be nullable
+    or have a scalar default.
+    """
+    inspector = inspect(bind)
+    preparer = bind.dialect.identifier_preparer
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = (
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=bind.dialect)}"
+            )
+            if column.default is not None and column.default.is_scalar:
+                value = literal(column.default.arg, column.type).compile(
+                    dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+                )
+                ddl += f" DEFAULT {value}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            try:
+                with bind.begin() as conn:
+                    conn.execute(text(ddl))
+            except Exception as e:
+                # Another process starting at the same time may have added it
+                print(f"Error adding column {table.name}.{column.name}: {e}")
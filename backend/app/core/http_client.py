@@ -0,0 +1,270 @@
+import aiohttp
+import asyncio
+import ssl
+import time
+import certifi
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+
+# Headers to mimic a real browser
+CRAWLER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+async def read_capped(response: aiohttp.ClientResponse, max_bytes: int) -> Tuple[bytes, bool]:
+    """
+    Stream a response body, keeping at most max_bytes.
+    Returns the bytes read and whether the body was cut short.
+    """
+    buffer = bytearray()
+    async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+        buffer.extend(chunk)
+        if len(buffer) >= max_bytes:
+            del buffer[max_bytes:]
+            return bytes(buffer), True
+    return bytes(buffer), False
+
+
+# Statuses servers send when they do not implement HEAD properly
+HEAD_UNSUPPORTED_STATUSES = {405, 501}
+
+
+@dataclass(slots=True)
+class ProbeResult:
+    """Status and headers of a URL, and its size when it could be determined."""
+    url: str
+    status: Optional[int] = None
+    final_url: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)  # lower-cased names
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status is not None and self.status < 400
+
+
+def _lower_headers(response: aiohttp.ClientResponse) -> Dict[str, str]:
+    return {name.lower(): value for name, value in response.headers.items()}
+
+
+async def probe_url(
+    session: aiohttp.ClientSession,
+    url: str,
+    timeout: aiohttp.ClientTimeout,
+    max_get_bytes: int = 5 * 1024 * 1024,
+) -> ProbeResult:
+    """
+    Status, headers and transfer size of a URL without downloading it when
+    possible: a HEAD request first, then a streamed GET (capped at
+    max_get_bytes) when HEAD is refused or gives no Content-Length.
+    Redirects are followed. Errors are returned, never raised.
+    """
+    result = ProbeResult(url)
+    try:
+        async with session.head(url, timeout=timeout, allow_redirects=True) as response:
+            result.status = response.status
+            result.final_url = str(response.url)
+            result.headers = _lower_headers(response)
+            length = response.headers.get('Content-Length')
+        if length is not None and length.isdigit():
+            result.size_bytes = int(length)
+            return result
+        if response.status >= 400 and response.status not in HEAD_UNSUPPORTED_STATUSES:
+            return result
+
+        async with session.get(url, timeout=timeout, allow_redirects=True) as response:
+            result.status = response.status
+            result.final_url = str(response.url)
+            result.headers = _lower_headers(response)
+            length = response.headers.get('Content-Length')
+            if length is not None and length.isdigit():
+                # Compressed size when Content-Encoding is set, which is what goes over the wire
+                result.size_bytes = int(length)
+            elif response.status < 400:
+                body, _ = await read_capped(response, max_get_bytes)
+                result.size_bytes = len(body)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        result.error = str(e) or type(e).__name__
+    return result
+
+
+@dataclass(slots=True)
+class RequestTiming:
+    """
+    Phase timings of one request, in milliseconds.
+
+    Pass an instance as trace_request_ctx to a session created with
+    timing_trace_config(); DNS, connect (TCP + TLS handshake) and time to
+    first byte are filled in by the trace hooks, and the caller marks the
+    end of the body with finish(). Phases that did not happen (cached DNS,
+    reused keep-alive connection) stay at 0.
+    """
+    started: float = 0.0
+    dns_ms: float = 0.0
+    connect_ms: float = 0.0
+    ttfb_ms: Optional[float] = None
+    download_ms: float = 0.0
+    total_ms: float = 0.0
+    reused_connection: bool = False
+    _dns_start: float = 0.0
+    _connect_start: float = 0.0
+    _dns_before_connect: float = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def mark_first_byte(self):
+        # Sessions without the trace config still get a TTFB from the caller
+        if self.ttfb_ms is None:
+            self.ttfb_ms = self.elapsed_ms()
+
+    def finish(self):
+        self.mark_first_byte()
+        self.total_ms = self.elapsed_ms()
+        self.download_ms = max(0.0, self.total_ms - self.ttfb_ms)
+
+    def to_dict(self) -> Dict:
+        return {
+            'dns_ms': round(self.dns_ms, 1),
+            'connect_ms': round(self.connect_ms, 1),
+            'ttfb_ms': round(self.ttfb_ms or 0.0, 1),
+            'download_ms': round(self.download_ms, 1),
+            'total_ms': round(self.total_ms, 1),
+            'reused_connection': self.reused_connection,
+        }
+
+
+def _timing(trace_config_ctx: SimpleNamespace) -> Optional[RequestTiming]:
+    timing = trace_config_ctx.trace_request_ctx
+    return timing if isinstance(timing, RequestTiming) else None
+
+
+async def _on_dns_start(session, ctx, params):
+    if (timing := _timing(ctx)) is not None:
+        timing._dns_start = time.perf_counter()
+
+
+async def _on_dns_end(session, ctx, params):
+    if (timing := _timing(ctx)) is not None:
+        timing.dns_ms += (time.perf_counter() - timing._dns_start) * 1000
+
+
+async def _on_connect_start(session, ctx, params):
+    if (timing := _timing(ctx)) is not None:
+        timing._connect_start = time.perf_counter()
+        timing._dns_before_connect = timing.dns_ms
+
+
+async def _on_connect_end(session, ctx, params):
+    if (timing := _timing(ctx)) is not None:
+        # The connection phase includes DNS resolution, which is reported separately
+        elapsed = (time.perf_counter() - timing._connect_start) * 1000
+        timing.connect_ms += max(0.0, elapsed - (timing.dns_ms - timing._dns_before_connect))
+
+
+async def _on_connection_reused(session, ctx, params):
+    if (timing := _timing(ctx)) is not None:
+        timing.reused_connection = True
+
+
+async def _on_request_end(session, ctx, params):
+    # Fired once the final response's headers have arrived (after any redirects)
+    if (timing := _timing(ctx)) is not None:
+        timing.ttfb_ms = timing.elapsed_ms()
+
+
+def timing_trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(_on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_end)
+    trace_config.on_connection_create_start.append(_on_connect_start)
+    trace_config.on_connection_create_end.append(_on_connect_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reused)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
+
+
+class CrawlerClient:
+    """
+    Process-wide HTTP client for outbound site-audit traffic.
+
+    One ClientSession (and its connection pool, DNS cache and TLS context)
+    is shared by every audit, so back-to-back audits of the same domain
+    reuse warm keep-alive connections. Requests can carry a RequestTiming
+    as trace_request_ctx to record their phase timings. Opened on app startup and closed on
+    shutdown; created lazily for processes without a lifespan (workers).
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    def _get_ssl_context(self) -> ssl.SSLContext:
+        # Loading the CA bundle is expensive, so do it once per process
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        return self._ssl_context
+
+    async def start(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._loop is loop:
+            return self._session
+        self._discard_session()
+
+        connector = aiohttp.TCPConnector(
+            ssl=self._get_ssl_context(),
+            limit=settings.CRAWLER_HTTP_POOL_LIMIT,
+            limit_per_host=settings.CRAWLER_HTTP_POOL_PER_HOST,
+            ttl_dns_cache=settings.CRAWLER_DNS_CACHE_TTL,
+            keepalive_timeout=settings.CRAWLER_KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=CRAWLER_HEADERS,
+            trace_configs=[timing_trace_config()],
+        )
+        self._loop = loop
+        return self._session
+
+    def _discard_session(self):
+        """
+        Close a session opened on another event loop. Sessions are bound to
+        their loop, so it can't simply be awaited from this one.
+        """
+        session, loop = self._session, self._loop
+        self._session = None
+        self._loop = None
+        if session is None or session.closed:
+            return
+        if loop is not None and loop.is_running():
+            # Still serving requests in another thread
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            # Releases the pooled connections without awaiting; on a closed
+            # loop their sockets can only be dropped
+            session.connector._close()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        return await self.start()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+crawler_client = CrawlerClient()
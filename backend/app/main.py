@@ -1,8 +1,12 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api import keywords, content, auth, site_audit  # Add auth and site_audit imports
 from app.core.database import init_db
+from app.core.http_client import crawler_client
+from app.services.audit_result_cache import audit_result_cache, suggestions_store
+from app.services.browser_pool import browser_pool
 
 # Create FastAPI app
 app = FastAPI(
@@ -40,6 +44,25 @@ def on_startup():
     init_db()
     print("✅ Database initialized")
 
+# Open the shared crawler HTTP client once for the whole app
+@app.on_event("startup")
+async def start_crawler_client():
+    await crawler_client.start()
+
+# Launch the screenshot browser in the background so startup is not delayed
+@app.on_event("startup")
+async def warm_browser_pool():
+    if settings.SCREENSHOTS_ENABLED:
+        app.state.browser_warmup = asyncio.create_task(browser_pool.warm())
+
+@app.on_event("shutdown")
+async def close_crawler_client():
+    await crawler_client.close()
+    await browser_pool.close()
+    await audit_result_cache.close()
+    await suggestions_store.close()
+    site_audit.site_audit_service.shutdown()
+
 # Include routers
 app.include_router(keywords.router, prefix="/api/keywords", tags=["Keywords"])
 app.include_router(content.router, prefix="/api/content", tags=["Content"])
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON
+from datetime import datetime
+from app.models.user import Base
+
+
+class AuditJob(Base):
+    """A site audit submitted for background processing."""
+    __tablename__ = "audit_jobs"
+
+    id = Column(String(32), primary_key=True, index=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+
+    # Request
+    url = Column(String(2048), nullable=False)
+    depth = Column(Integer, nullable=False, default=5)
+    bypass_cache = Column(Boolean, default=False)
+    force_refresh = Column(Boolean, default=False)
+    include_screenshot = Column(Boolean, default=False)
+    defer_suggestions = Column(Boolean, default=False)
+    suggestions_webhook_url = Column(String(2048), nullable=True)
+    render_mode = Column(String(20), nullable=True)
+    rule_pack = Column(String(255), nullable=True)
+
+    # Lead capture
+    user_name = Column(String(255), nullable=True)
+    user_role = Column(String(255), nullable=True)
+    user_email = Column(String(255), nullable=True, index=True)
+
+    # Outcome
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, UniqueConstraint
+from datetime import datetime
+from app.models.user import Base
+
+
+class PageSnapshot(Base):
+    """Content hash and extracted features of a page from its last audit."""
+    __tablename__ = "page_snapshots"
+    # Keyed on a fixed-length hash: a 2048-character URL is too long for a composite index on some databases
+    __table_args__ = (UniqueConstraint("site", "scope", "url_hash", name="uq_page_snapshots_site_scope_url"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    site = Column(String(255), nullable=False, index=True)
+    scope = Column(String(255), nullable=False, default="")  # audit settings the features depend on (render mode)
+    url_key = Column(String(2048), nullable=False)
+    url_hash = Column(String(32), nullable=False)  # url_key_hash(url_key)
+    content_hash = Column(String(64), nullable=False)
+    features_version = Column(Integer, nullable=False)
+    features = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SiteSnapshot(Base):
+    """Issues and AI suggestions from the last audit of a site with the same settings."""
+    __tablename__ = "site_snapshots"
+
+    site = Column(String(255), primary_key=True)
+    scope = Column(String(255), primary_key=True, default="")  # depth, render mode and rule pack
+    overall_score = Column(Integer, nullable=True)
+    issues = Column(JSON, nullable=False)
+    suggestions = Column(JSON, nullable=True)
+    analyzed_at = Column(DateTime, default=datetime.utcnow)
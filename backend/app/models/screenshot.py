@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime, LargeBinary
+from datetime import datetime
+from app.models.user import Base
+
+
+class Screenshot(Base):
+    """
+    A page screenshot, stored in the database so the API can serve images
+    captured by the background workers.
+    """
+    __tablename__ = "screenshots"
+
+    name = Column(String(64), primary_key=True)  # content hash and extension, e.g. 3f2a...9c.jpg
+    content_type = Column(String(32), nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
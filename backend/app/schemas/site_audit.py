@@ -1,5 +1,9 @@
-from pydantic import BaseModel, HttpUrl, EmailStr
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, HttpUrl, EmailStr
+from typing import List, Literal, Optional, Dict
+from datetime import datetime
+from app.core.config import settings
+
+RenderMode = Literal["auto", "always", "never"]
 
 class LeadInfo(BaseModel):
     name: str
@@ -8,8 +12,28 @@ class LeadInfo(BaseModel):
 
 class SiteAuditRequest(BaseModel):
     url: HttpUrl
-    depth: int = 5  # Max pages to crawl
-    include_screenshot: bool = True
+    depth: int = Field(5, ge=1, le=settings.SITE_AUDIT_MAX_REQUEST_DEPTH)  # Max pages to crawl
+    include_screenshot: bool = False  # Capture a screenshot (holds the response for the browser)
+    bypass_cache: bool = False  # Re-download every page instead of revalidating cached copies
+    force_refresh: bool = False  # Run a new audit even if a recent result is cached
+    defer_suggestions: bool = False  # Return scores immediately; fetch AI suggestions by suggestions_id
+    suggestions_webhook_url: Optional[HttpUrl] = None  # POSTed the suggestions once ready (with defer_suggestions)
+    render_mode: Optional[RenderMode] = None  # run JavaScript in a headless browser (default: SITE_AUDIT_RENDER_MODE)
+    rule_pack: Optional[str] = None  # custom rule pack scored on top of the base rules
+    # Lead capture fields
+    user_name: str
+    user_role: str
+    user_email: EmailStr
+
+class BulkAuditRequest(BaseModel):
+    urls: List[HttpUrl]
+    depth: int = Field(5, ge=1, le=settings.SITE_AUDIT_MAX_REQUEST_DEPTH)  # Max pages to crawl per site
+    bypass_cache: bool = False
+    force_refresh: bool = False
+    defer_suggestions: bool = False
+    include_screenshot: bool = False
+    render_mode: Optional[RenderMode] = None
+    rule_pack: Optional[str] = None
     # Lead capture fields
     user_name: str
     user_role: str
@@ -20,6 +44,7 @@ class IssueItem(BaseModel):
     category: str  # "seo", "design", "content"
     title: str
     description: str
+    pages_affected: Optional[int] = None
 
 class SuggestionItem(BaseModel):
     priority: str  # "high", "medium", "low"
@@ -27,11 +52,37 @@ class SuggestionItem(BaseModel):
     description: str
     impact: str  # Expected improvement
 
+class PageTiming(BaseModel):
+    dns_ms: float  # 0 when the DNS cache answered
+    connect_ms: float  # TCP + TLS handshake; 0 on a reused keep-alive connection
+    ttfb_ms: float  # request start to response headers
+    download_ms: float  # response body
+    total_ms: float
+    reused_connection: bool = False
+
 class PageAnalysis(BaseModel):
     url: str
     title: Optional[str] = None
     status_code: int
-    load_time_ms: float
+    load_time_ms: float  # headers and body
+    timing: Optional[PageTiming] = None
+    page_weight_kb: Optional[float] = None  # HTML plus its CSS, JS, fonts and images
+    render_blocking_resources: Optional[int] = None
+    # Internal link graph
+    pagerank: Optional[float] = None  # share of internal PageRank (all pages sum to 1)
+    click_depth: Optional[int] = None  # links from the homepage; None if unreachable
+    inlinks: Optional[int] = None
+    outlinks: Optional[int] = None
+    orphan: Optional[bool] = None
+    dead_end: Optional[bool] = None
+    # Per-page scores (set when the page was scored)
+    seo_score: Optional[int] = None
+    design_score: Optional[int] = None
+    content_score: Optional[int] = None
+    overall_score: Optional[int] = None
+    issues_count: Optional[int] = None
+    content_unchanged: Optional[bool] = None  # same content hash as the last audit
+    rendered: bool = False  # analyzed on the DOM rendered by a headless browser
 
 class SiteAuditResponse(BaseModel):
     success: bool
@@ -57,6 +108,8 @@ class SiteAuditResponse(BaseModel):
 
     # AI suggestions
     suggestions: List[SuggestionItem]
+    suggestions_id: Optional[str] = None  # set when suggestions were deferred
+    suggestions_status: Optional[str] = None  # "pending", "ready"
 
     # Screenshot
     screenshot_url: Optional[str] = None
@@ -68,6 +121,36 @@ class SiteAuditResponse(BaseModel):
     lighthouse_score: Optional[Dict] = None
     pagespeed_score: Optional[Dict] = None
 
+    # Changes since the previous audit of this site (new/resolved issues)
+    issue_diff: Optional[Dict] = None
+
+    # Crawl statistics (pages discovered, early stop, peak memory)
+    crawl_stats: Optional[Dict] = None
+
+    # Internal link structure (PageRank, click depth, orphan and dead-end pages)
+    link_graph: Optional[Dict] = None
+
+    # Versions of the rules that scored the audit (base set and custom rule pack)
+    rule_set: Optional[Dict] = None
+
     # Timestamps
+    from_cache: bool = False  # True when served from the audit result cache
     analyzed_at: str
     analysis_duration_seconds: float
+
+class SuggestionsResponse(BaseModel):
+    suggestions_id: str
+    status: str  # "pending", "ready"
+    domain: Optional[str] = None
+    suggestions: List[SuggestionItem] = []
+
+class AuditJobResponse(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "completed", "failed"
+    url: str
+    depth: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[SiteAuditResponse] = None  # set once completed
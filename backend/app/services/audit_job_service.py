@@ -0,0 +1,122 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Dict, Optional, Set
+from sqlalchemy.orm import Session
+from app.core.celery_app import celery_app, jobs_use_broker
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.audit_job import AuditJob
+from app.schemas.site_audit import SiteAuditRequest
+
+RUN_AUDIT_TASK = "app.worker.run_audit_job"
+
+# In-process jobs, referenced so they are not garbage collected mid-run
+_local_jobs: Set[asyncio.Task] = set()
+
+
+class AuditJobService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_job(self, request: SiteAuditRequest) -> AuditJob:
+        job = AuditJob(
+            id=uuid.uuid4().hex,
+            status="queued",
+            url=str(request.url),
+            depth=request.depth,
+            bypass_cache=request.bypass_cache,
+            force_refresh=request.force_refresh,
+            include_screenshot=request.include_screenshot,
+            defer_suggestions=request.defer_suggestions,
+            suggestions_webhook_url=str(request.suggestions_webhook_url) if request.suggestions_webhook_url else None,
+            render_mode=request.render_mode,
+            rule_pack=request.rule_pack,
+            user_name=request.user_name,
+            user_role=request.user_role,
+            user_email=request.user_email,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[AuditJob]:
+        return self.db.query(AuditJob).filter(AuditJob.id == job_id).first()
+
+    def mark_running(self, job: AuditJob):
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        job.attempts = (job.attempts or 0) + 1
+        self.db.commit()
+
+    def mark_completed(self, job: AuditJob, result: Dict):
+        job.status = "completed"
+        job.result = result
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        self.db.commit()
+
+    def mark_failed(self, job: AuditJob, error: str):
+        job.status = "failed"
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        self.db.commit()
+
+
+def enqueue_audit_job(job_id: str, audit_service):
+    """
+    Hand a job to the Celery workers. With no broker configured the job
+    runs as a task in this process instead.
+    """
+    if jobs_use_broker():
+        celery_app.send_task(RUN_AUDIT_TASK, args=[job_id])
+        return
+
+    task = asyncio.create_task(run_audit_job(job_id, audit_service))
+    _local_jobs.add(task)
+    task.add_done_callback(_local_jobs.discard)
+
+
+async def run_audit_job(job_id: str, audit_service):
+    """
+    Run one queued audit and store its outcome on the job row.
+    """
+    db = SessionLocal()
+    try:
+        jobs = AuditJobService(db)
+        job = jobs.get_job(job_id)
+        if job is None:
+            print(f"Error running audit job {job_id}: job not found")
+            return
+        if job.status == "completed":
+            # Redelivered after the result was already stored
+            return
+
+        jobs.mark_running(job)
+        try:
+            result = await asyncio.wait_for(
+                audit_service.audit_website(
+                    url=job.url,
+                    depth=job.depth,
+                    bypass_cache=job.bypass_cache,
+                    force_refresh=job.force_refresh,
+                    defer_suggestions=job.defer_suggestions,
+                    suggestions_webhook_url=job.suggestions_webhook_url,
+                    include_screenshot=job.include_screenshot,
+                    render_mode=job.render_mode,
+                    rule_pack=job.rule_pack,
+                ),
+                timeout=settings.AUDIT_JOB_TIME_LIMIT,
+            )
+        except asyncio.TimeoutError:
+            jobs.mark_failed(job, f"Audit did not finish within {settings.AUDIT_JOB_TIME_LIMIT} seconds")
+            return
+        except Exception as e:
+            print(f"Error running audit job {job_id}: {e}")
+            jobs.mark_failed(job, str(e))
+            return
+
+        jobs.mark_completed(job, result)
+    finally:
+        db.close()
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.services.url_canonicalizer import default_canonicalizer
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis is optional; the in-process LRU is always available
+    aioredis = None
+
+KEY_PREFIX = 'site_audit:result:v1'
+SUGGESTIONS_KEY_PREFIX = 'site_audit:suggestions:v1'
+# After a Redis error, use the in-process cache for this long before retrying
+REDIS_RETRY_SECONDS = 30
+
+
+def audit_cache_key(
+    url: str,
+    depth: int,
+    render_mode: Optional[str] = None,
+    rule_pack: Optional[str] = None,
+    defer_suggestions: bool = False,
+    include_screenshot: bool = False,
+) -> str:
+    """
+    Trivial URL variants (scheme, trailing slash, tracking params) share an
+    entry. Deferred audits get their own entry: their suggestions may still
+    be pending, which callers that did not ask to defer can't handle.
+    """
+    key = f"{KEY_PREFIX}:{depth}:{default_canonicalizer.key(url)}"
+    if render_mode and render_mode != settings.SITE_AUDIT_RENDER_MODE:
+        key = f"{key}:render={render_mode}"
+    if rule_pack:
+        key = f"{key}:rules={rule_pack}"
+    if defer_suggestions:
+        key = f"{key}:deferred"
+    # A result taken without a screenshot can't serve a request for one
+    if include_screenshot and settings.SCREENSHOTS_ENABLED:
+        key = f"{key}:screenshot"
+    return key
+
+
+def suggestions_key(suggestions_id: str) -> str:
+    return f"{SUGGESTIONS_KEY_PREFIX}:{suggestions_id}"
+
+
+class LRUResultStore:
+    """Bounded in-process store with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: int):
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+class AuditResultCache:
+    """
+    Cache of finished audit results.
+
+    Results live in Redis when one is configured (shared by every API
+    process) and in a bounded in-process LRU otherwise, or while Redis is
+    unreachable. Concurrent requests for the same key share one in-flight
+    audit instead of each starting a crawl.
+    """
+
+    def __init__(self, redis_url: Optional[str], ttl_seconds: int, max_entries: int):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self._local = LRUResultStore(max_entries)
+        self._redis = None
+        self._redis_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._redis_down_until = 0.0
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    def _get_redis(self):
+        if aioredis is None or not self.redis_url or time.time() < self._redis_down_until:
+            return None
+        # Redis connections are bound to the loop they were opened on
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            self._redis = aioredis.from_url(self.redis_url, socket_timeout=2, socket_connect_timeout=2)
+            self._redis_loop = loop
+        return self._redis
+
+    def _redis_failed(self, e: Exception):
+        print(f"Error talking to audit cache Redis, using in-process cache: {e}")
+        self._redis_down_until = time.time() + REDIS_RETRY_SECONDS
+
+    async def get(self, key: str) -> Optional[Dict]:
+        raw = None
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = await client.get(key)
+            except Exception as e:
+                self._redis_failed(e)
+        if raw is None:
+            raw = self._local.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, result: Dict):
+        raw = json.dumps(result, default=str)
+        client = self._get_redis()
+        if client is not None:
+            try:
+                await client.set(key, raw, ex=self.ttl_seconds)
+                return
+            except Exception as e:
+                self._redis_failed(e)
+        self._local.set(key, raw, self.ttl_seconds)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict]],
+        force_refresh: bool = False,
+    ) -> Tuple[Dict, bool]:
+        """
+        Return (result, from_cache). On a miss, or with force_refresh, run
+        compute() once per key however many callers are waiting on it.
+        """
+        if not force_refresh:
+            cached = await self.get(key)
+            if cached is not None:
+                return cached, True
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute_and_store(key, compute))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # A caller disconnecting must not cancel the audit others are waiting on
+        return await asyncio.shield(task), False
+
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        result = await compute()
+        await self.set(key, result)
+        return result
+
+    async def close(self):
+        if self._redis is not None:
+            try:
+                await self._redis.close()
+            except Exception:
+                pass
+        self._redis = None
+        self._redis_loop = None
+
+
+audit_result_cache = AuditResultCache(
+    settings.redis_url,
+    settings.AUDIT_CACHE_TTL,
+    settings.AUDIT_CACHE_MAX_ENTRIES,
+)
+
+# Deferred AI suggestions, fetched by ID after the audit response has gone out
+suggestions_store = AuditResultCache(
+    settings.redis_url,
+    settings.AUDIT_SUGGESTIONS_TTL,
+    settings.AUDIT_CACHE_MAX_ENTRIES,
+)
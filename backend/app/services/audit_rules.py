@@ -0,0 +1,504 @@
+import json
+import operator
+import os
+import string
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.page_features import PageFeatures, SelectorSet, compile_selectors
+
+CATEGORIES = ('seo', 'design', 'content')
+SEVERITIES = ('critical', 'warning', 'info')
+# Bump whenever BASE_RULES change, so results record which rules scored them
+BASE_RULES_VERSION = 1
+MAX_SCORE = 100
+
+PageValue = Callable[[Dict], Any]
+
+COMPARISONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def _title(page: Dict) -> Optional[str]:
+    title = page['features'].title
+    return title.strip() if title and title.strip() else None
+
+
+def _title_length(page: Dict) -> Optional[int]:
+    title = _title(page)
+    return len(title) if title else None
+
+
+def _ttfb_ms(page: Dict) -> float:
+    timing = page.get('timing') or {}
+    return timing.get('ttfb_ms', page.get('load_time', 0))
+
+
+# Page values derived from PageFeatures and the fetch; any PageFeatures
+# field can also be used by name.
+PAGE_VALUES: Dict[str, PageValue] = {
+    'title': _title,
+    'title_length': _title_length,
+    'meta_description_length': lambda page: (
+        len(page['features'].meta_description) if page['features'].meta_description else None
+    ),
+    # None when the page has no images
+    'alt_percentage': lambda page: (
+        page['features'].images_with_alt / page['features'].images_total * 100
+        if page['features'].images_total else None
+    ),
+    'ttfb_ms': _ttfb_ms,
+    'ttfb_seconds': lambda page: _ttfb_ms(page) / 1000,
+    'html_size_kb': lambda page: page.get('size_bytes', 0) / 1024,
+    'has_custom_fonts': lambda page: bool(page['features'].font_links_count or page['features'].has_font_face),
+    # None when the page has no sentences
+    'avg_words_per_sentence': lambda page: (
+        page['features'].word_count / page['features'].sentence_count
+        if page['features'].sentence_count else None
+    ),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """
+    One outcome of a check.
+
+    Rules sharing a (category, group) are mutually exclusive: they are tried
+    in order and the first whose `when` holds for the `selector` value wins,
+    adding `points` to the category score and, with a severity, raising an
+    issue whose description is `message` formatted with page values
+    ('Title is {title_length} characters.').
+
+    `selector` names a page value (PAGE_VALUES, a PageFeatures field or a
+    custom selector of the rule set). `when` is ('always',), ('present',),
+    ('absent',), a comparison such as ('>=', 3), or ('between', low, high).
+    """
+    id: str
+    category: str
+    group: str
+    selector: Optional[str] = None
+    when: Tuple = ('always',)
+    points: int = 0
+    severity: Optional[str] = None
+    title: Optional[str] = None
+    message: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Rule':
+        return cls(**{**data, 'when': tuple(data.get('when', ('always',)))})
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """
+    A named, versioned list of rules. Custom rule packs may define their
+    own CSS selectors ({name: 'div.promo'}); elements matching them are
+    counted while the page is parsed and can be used as rule selectors.
+    """
+    name: str
+    version: int
+    rules: Tuple[Rule, ...]
+    selectors: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RuleSet':
+        return cls(
+            name=data['name'],
+            version=int(data['version']),
+            rules=tuple(Rule.from_dict(rule) for rule in data['rules']),
+            selectors=dict(data.get('selectors') or {}),
+        )
+
+
+def _condition(when: Tuple) -> Callable[[Any], bool]:
+    op, *args = when
+    if op == 'always' and not args:
+        return lambda value: True
+    if op == 'present' and not args:
+        return bool
+    if op == 'absent' and not args:
+        return lambda value: not value
+    if op in COMPARISONS and len(args) == 1:
+        compare, limit = COMPARISONS[op], args[0]
+        if op in ('==', '!='):
+            return lambda value: compare(value, limit)
+        return lambda value: value is not None and compare(value, limit)
+    if op == 'between' and len(args) == 2:
+        low, high = args
+        return lambda value: value is not None and low <= value <= high
+    raise ValueError(f"Unsupported condition: {when!r}")
+
+
+@dataclass(slots=True)
+class _Check:
+    rule: Rule
+    selector: Optional[str]
+    test: Callable[[Any], bool]
+
+
+def _message_fields(rule: Rule) -> List[str]:
+    """Page values a rule's message refers to; raises ValueError for a bad template."""
+    try:
+        fields = list(string.Formatter().parse(rule.message or ''))
+    except ValueError as e:
+        raise ValueError(f"Rule {rule.id}: invalid message {rule.message!r}: {e}") from None
+    names = []
+    for _, name, spec, conversion in fields:
+        if name is None:
+            continue
+        if not name.isidentifier():
+            raise ValueError(f"Rule {rule.id}: message fields must name a page value, got {{{name}}}")
+        if conversion not in (None, 'r', 's', 'a') or '{' in spec:
+            raise ValueError(f"Rule {rule.id}: unsupported format in {{{name}}}")
+        names.append(name)
+    return names
+
+
+def _describe(rule: Rule, values: Dict) -> str:
+    # A format spec can still fail on a page's value (None for '{x:.0f}');
+    # fall back to the raw message rather than failing the audit
+    try:
+        return (rule.message or '').format_map(values)
+    except (KeyError, ValueError, TypeError):
+        return rule.message or ''
+
+
+class _PageValues(dict):
+    """Page values computed on first use and shared by every rule that reads them."""
+
+    def __init__(self, page: Dict, getters: Dict[str, PageValue]):
+        super().__init__()
+        self.page = page
+        self.getters = getters
+
+    def __missing__(self, name: str):
+        value = self[name] = self.getters[name](self.page)
+        return value
+
+
+class CompiledRules:
+    """
+    The base rule set, optionally extended by one rule pack, ready to run.
+
+    A pack's groups replace base groups with the same (category, group), so
+    a pack can reweight or reword a check; other pack groups are added.
+    Selectors, conditions and message fields are resolved once here, so
+    scoring a page is a walk over the groups reading shared page values.
+    Custom selectors are only compiled (and counted during parsing) for
+    audits that use the pack.
+    """
+
+    def __init__(self, base: RuleSet, pack: Optional[RuleSet] = None):
+        self.base = base
+        self.pack = pack
+        self.selectors: Optional[SelectorSet] = compile_selectors(pack.selectors) if pack and pack.selectors else None
+        custom = set(pack.selectors) if pack else set()
+        self._getters: Dict[str, PageValue] = {}
+
+        groups: Dict[Tuple[str, str], List[Rule]] = {}
+        for rule in base.rules:
+            groups.setdefault((rule.category, rule.group), []).append(rule)
+        if pack:
+            replaced = {(rule.category, rule.group) for rule in pack.rules}
+            for key in replaced:
+                groups[key] = []
+            for rule in pack.rules:
+                groups[(rule.category, rule.group)].append(rule)
+
+        self.groups: Dict[str, List[List[_Check]]] = defaultdict(list)
+        for (category, _), rules in groups.items():
+            self.groups[category].append([self._compile(rule, custom) for rule in rules])
+
+    @property
+    def info(self) -> Dict:
+        return {
+            'base_version': self.base.version,
+            'pack': self.pack.name if self.pack else None,
+            'pack_version': self.pack.version if self.pack else None,
+            'rules': sum(len(checks) for groups in self.groups.values() for checks in groups),
+        }
+
+    def _getter(self, name: str, custom: set) -> PageValue:
+        if name in custom:
+            return lambda page: page['features'].selector_counts.get(name, 0)
+        if name in PAGE_VALUES:
+            return PAGE_VALUES[name]
+        if name in PageFeatures.__dataclass_fields__:
+            return lambda page: getattr(page['features'], name)
+        raise ValueError(f"Unknown selector: {name!r}")
+
+    def _compile(self, rule: Rule, custom: set) -> _Check:
+        if rule.category not in CATEGORIES:
+            raise ValueError(f"Rule {rule.id}: unknown category {rule.category!r}")
+        if rule.severity is not None and (rule.severity not in SEVERITIES or not rule.title):
+            raise ValueError(f"Rule {rule.id}: issues need a title and one of {SEVERITIES}")
+
+        # The selector and every page value the message refers to
+        names = [rule.selector] if rule.selector else []
+        names += _message_fields(rule)
+        for name in names:
+            if name not in self._getters:
+                self._getters[name] = self._getter(name, custom)
+        return _Check(rule, rule.selector, _condition(rule.when))
+
+    def evaluate(self, category: str, page: Dict) -> Dict:
+        """Score and issues of one category for a page."""
+        values = _PageValues(page, self._getters)
+        score = 0
+        issues = []
+        for checks in self.groups[category]:
+            for check in checks:
+                if not check.test(values[check.selector] if check.selector else None):
+                    continue
+                rule = check.rule
+                score += rule.points
+                if rule.severity:
+                    issues.append({
+                        'severity': rule.severity,
+                        'category': rule.category,
+                        'title': rule.title,
+                        'description': _describe(rule, values),
+                    })
+                break
+        return {'score': min(score, MAX_SCORE), 'issues': issues}
+
+    def profile(self, pages: List[Dict], rounds: int = 1) -> List[Dict]:
+        """
+        Cost of each rule over the given pages, in microseconds per page,
+        including computing the page values it is first to read.
+        Groups stop at their first matching rule, as in evaluate().
+        """
+        cost: Dict[str, float] = defaultdict(float)
+        runs: Dict[str, int] = defaultdict(int)
+        clock = time.perf_counter
+        for _ in range(rounds):
+            for page in pages:
+                values = _PageValues(page, self._getters)
+                for category in CATEGORIES:
+                    for checks in self.groups[category]:
+                        for check in checks:
+                            started = clock()
+                            matched = check.test(values[check.selector] if check.selector else None)
+                            if matched and check.rule.severity:
+                                _describe(check.rule, values)
+                            cost[check.rule.id] += clock() - started
+                            runs[check.rule.id] += 1
+                            if matched:
+                                break
+
+        total_pages = max(1, len(pages) * rounds)
+        return sorted(
+            (
+                {
+                    'rule': check.rule.id,
+                    'category': category,
+                    'group': check.rule.group,
+                    'evaluated_pct': round(runs[check.rule.id] / total_pages * 100, 1),
+                    'us_per_page': round(cost[check.rule.id] / total_pages * 1e6, 3),
+                }
+                for category in CATEGORIES
+                for checks in self.groups[category]
+                for check in checks
+            ),
+            key=lambda entry: entry['us_per_page'],
+            reverse=True,
+        )
+
+
+class RuleRegistry:
+    """
+    The base rule set plus named custom rule packs (e.g. one per client).
+    Each combination is compiled once and reused by every audit.
+    """
+
+    def __init__(self, base: RuleSet):
+        self.base = base
+        self._packs: Dict[str, RuleSet] = {}
+        self._compiled: Dict[Optional[str], CompiledRules] = {None: CompiledRules(base)}
+
+    def register(self, pack: RuleSet):
+        """Add or replace a pack; raises ValueError if it does not compile."""
+        compiled = CompiledRules(self.base, pack)
+        self._packs[pack.name] = pack
+        self._compiled[pack.name] = compiled
+
+    def has(self, name: str) -> bool:
+        return name in self._packs
+
+    def get(self, name: Optional[str] = None) -> CompiledRules:
+        if name is not None and name not in self._packs:
+            raise ValueError(f"Unknown rule pack: {name}")
+        return self._compiled[name]
+
+    def load_directory(self, path: str):
+        """Register every *.json rule pack in a directory."""
+        for filename in sorted(os.listdir(path)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(path, filename), encoding='utf-8') as f:
+                    self.register(RuleSet.from_dict(json.load(f)))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Error loading rule pack {filename}: {e}")
+
+
+BASE_RULES = (
+    # SEO: title tag (15 points)
+    Rule('seo.title.ok', 'seo', 'title', 'title_length', ('between', 30, 60), 15),
+    Rule('seo.title.length', 'seo', 'title', 'title', ('present',), 10, 'warning', 'Title Length Not Optimal',
+         'Title is {title_length} characters. Optimal length is 30-60 characters.'),
+    Rule('seo.title.missing', 'seo', 'title', severity='critical', title='Missing Title Tag',
+         message='Every page should have a unique, descriptive title tag.'),
+
+    # Meta description (10 points)
+    Rule('seo.meta_description.ok', 'seo', 'meta_description', 'meta_description_length', ('between', 120, 160), 10),
+    Rule('seo.meta_description.length', 'seo', 'meta_description', 'meta_description', ('present',), 5,
+         'warning', 'Meta Description Length Not Optimal',
+         'Meta description is {meta_description_length} characters. Optimal length is 120-160 characters.'),
+    Rule('seo.meta_description.missing', 'seo', 'meta_description', severity='critical',
+         title='Missing Meta Description', message='Meta descriptions help search engines understand page content.'),
+
+    # H1 tag (10 points)
+    Rule('seo.h1.ok', 'seo', 'h1', 'h1_count', ('==', 1), 10),
+    Rule('seo.h1.missing', 'seo', 'h1', 'h1_count', ('==', 0), 0, 'critical', 'Missing H1 Tag',
+         'Every page should have exactly one H1 tag describing the main content.'),
+    Rule('seo.h1.multiple', 'seo', 'h1', points=5, severity='warning', title='Multiple H1 Tags',
+         message='Found {h1_count} H1 tags. Best practice is to have exactly one H1 per page.'),
+
+    # Heading hierarchy (10 points)
+    Rule('seo.headings.ok', 'seo', 'headings', 'h2_count', ('present',), 10),
+    Rule('seo.headings.missing', 'seo', 'headings', severity='warning', title='Poor Heading Structure',
+         message='Use H2-H6 tags to create a clear content hierarchy.'),
+
+    # Image alt tags (15 points); pages without images get full marks
+    Rule('seo.image_alt.no_images', 'seo', 'image_alt', 'images_total', ('absent',), 15),
+    Rule('seo.image_alt.all', 'seo', 'image_alt', 'alt_percentage', ('==', 100), 15),
+    Rule('seo.image_alt.most', 'seo', 'image_alt', 'alt_percentage', ('>=', 80), 10, 'warning',
+         'Missing Image Alt Text',
+         'Only {alt_percentage:.0f}% of images have alt text. All images should have descriptive alt attributes.'),
+    Rule('seo.image_alt.half', 'seo', 'image_alt', 'alt_percentage', ('>=', 50), 5, 'warning',
+         'Missing Image Alt Text',
+         'Only {alt_percentage:.0f}% of images have alt text. All images should have descriptive alt attributes.'),
+    Rule('seo.image_alt.few', 'seo', 'image_alt', severity='critical', title='Missing Image Alt Text',
+         message='Only {alt_percentage:.0f}% of images have alt text. All images should have descriptive alt attributes.'),
+
+    # OpenGraph tags (10 points): og:title, og:description, og:image, og:url
+    Rule('seo.opengraph.ok', 'seo', 'opengraph', 'og_tags_count', ('>=', 4), 10),
+    Rule('seo.opengraph.incomplete', 'seo', 'opengraph', 'og_tags_count', ('>', 0), 5, 'info',
+         'Incomplete OpenGraph Tags', 'Add more OpenGraph tags for better social media sharing.'),
+    Rule('seo.opengraph.missing', 'seo', 'opengraph', severity='warning', title='Missing OpenGraph Tags',
+         message='OpenGraph tags improve how your site appears when shared on social media.'),
+
+    # Structured data (10 points)
+    Rule('seo.structured_data.ok', 'seo', 'structured_data', 'json_ld_count', ('present',), 10),
+    Rule('seo.structured_data.missing', 'seo', 'structured_data', severity='info', title='No Structured Data',
+         message='Implement schema.org structured data to help search engines understand your content.'),
+
+    # Canonical URL (5 points)
+    Rule('seo.canonical.ok', 'seo', 'canonical', 'has_canonical', ('present',), 5),
+    Rule('seo.canonical.missing', 'seo', 'canonical', severity='info', title='Missing Canonical URL',
+         message='Canonical tags prevent duplicate content issues.'),
+
+    # Mobile viewport (5 points)
+    Rule('seo.viewport.ok', 'seo', 'viewport', 'has_viewport', ('present',), 5),
+    Rule('seo.viewport.missing', 'seo', 'viewport', severity='warning', title='Missing Viewport Meta Tag',
+         message='Add viewport meta tag for mobile responsiveness.'),
+
+    # Design: mobile responsive (20 points)
+    Rule('design.mobile.ok', 'design', 'mobile', 'has_viewport', ('present',), 20),
+    Rule('design.mobile.missing', 'design', 'mobile', severity='critical', title='Not Mobile Responsive',
+         message='Add viewport meta tag and ensure responsive design for mobile devices.'),
+
+    # Server response time (12 points)
+    Rule('design.server_response.fast', 'design', 'server_response', 'ttfb_ms', ('<', 800), 12),
+    Rule('design.server_response.ok', 'design', 'server_response', 'ttfb_ms', ('<', 1800), 8),
+    Rule('design.server_response.slow', 'design', 'server_response', severity='warning', title='Slow Server Response',
+         message='The first byte arrives after {ttfb_seconds:.2f} seconds. Aim for under 0.8 seconds.'),
+
+    # Document transfer size (8 points)
+    Rule('design.html_size.small', 'design', 'html_size', 'html_size_kb', ('<', 100), 8),
+    Rule('design.html_size.ok', 'design', 'html_size', 'html_size_kb', ('<', 500), 4),
+    Rule('design.html_size.large', 'design', 'html_size', severity='warning', title='Large HTML Document',
+         message='The HTML document is {html_size_kb:.0f} KB. Keep it under 100 KB so it downloads quickly.'),
+
+    # Stylesheets (5 points) and custom fonts (5 points)
+    Rule('design.stylesheet.ok', 'design', 'stylesheet', 'has_stylesheet', ('present',), 5),
+    Rule('design.fonts.ok', 'design', 'fonts', 'has_custom_fonts', ('present',), 5),
+
+    # Image optimization (10 points)
+    Rule('design.lazy_images.ok', 'design', 'lazy_images', 'images_lazy', ('present',), 5),
+    Rule('design.lazy_images.missing', 'design', 'lazy_images', 'images_total', ('>', 3), 0, 'info',
+         'Images Not Lazy Loaded', 'Implement lazy loading for images to improve initial page load.'),
+    Rule('design.responsive_images.ok', 'design', 'responsive_images', 'images_responsive', ('present',), 5),
+
+    # Color contrast (placeholder - would need more complex analysis)
+    Rule('design.color_contrast.placeholder', 'design', 'color_contrast', points=10),
+
+    # Accessibility features (10 points)
+    Rule('design.accessibility.ok', 'design', 'accessibility', 'aria_label_count', ('present',), 10),
+    Rule('design.accessibility.missing', 'design', 'accessibility', severity='info',
+         title='Limited Accessibility Features',
+         message='Add ARIA labels and improve accessibility for screen readers.'),
+
+    # Content: length (20 points)
+    Rule('content.length.long', 'content', 'length', 'word_count', ('>=', 300), 20),
+    Rule('content.length.medium', 'content', 'length', 'word_count', ('>=', 200), 15),
+    Rule('content.length.short', 'content', 'length', 'word_count', ('>=', 100), 10),
+    Rule('content.length.thin', 'content', 'length', severity='warning', title='Insufficient Content',
+         message='Page has only {word_count} words. Aim for at least 300 words of quality content.'),
+
+    # Readability (20 points - simplified Flesch-Kincaid); skipped without sentences
+    Rule('content.readability.good', 'content', 'readability', 'avg_words_per_sentence', ('<=', 20), 20),
+    Rule('content.readability.fair', 'content', 'readability', 'avg_words_per_sentence', ('<=', 25), 15),
+    Rule('content.readability.hard', 'content', 'readability', 'avg_words_per_sentence', ('<=', 30), 10),
+    Rule('content.readability.poor', 'content', 'readability', 'avg_words_per_sentence', ('>', 30), 0, 'warning',
+         'Poor Readability',
+         'Average sentence length is {avg_words_per_sentence:.1f} words. Aim for 15-20 words per sentence.'),
+
+    # Paragraph structure (10 points)
+    Rule('content.paragraphs.ok', 'content', 'paragraphs', 'paragraph_count', ('>=', 3), 10),
+    Rule('content.paragraphs.few', 'content', 'paragraphs', severity='info', title='Limited Content Structure',
+         message='Break content into more paragraphs for better readability.'),
+
+    # Internal links (15 points)
+    Rule('content.internal_links.many', 'content', 'internal_links', 'internal_links', ('>=', 5), 15),
+    Rule('content.internal_links.some', 'content', 'internal_links', 'internal_links', ('>=', 3), 10),
+    Rule('content.internal_links.few', 'content', 'internal_links', 'internal_links', ('>=', 1), 5),
+    Rule('content.internal_links.none', 'content', 'internal_links', severity='warning',
+         title='Insufficient Internal Linking',
+         message='Add more internal links to help users and search engines navigate your site.'),
+
+    # External links (5 points)
+    Rule('content.external_links.ok', 'content', 'external_links', 'external_links', ('>=', 2), 5),
+
+    # Headings for content structure (10 points)
+    Rule('content.subheadings.many', 'content', 'subheadings', 'h2_count', ('>=', 2), 10),
+    Rule('content.subheadings.one', 'content', 'subheadings', 'h2_count', ('>=', 1), 5),
+    Rule('content.subheadings.missing', 'content', 'subheadings', severity='warning', title='Missing Content Headings',
+         message='Use H2 tags to structure your content and improve scannability.'),
+
+    # Call to action (10 points)
+    Rule('content.cta.ok', 'content', 'cta', 'has_cta', ('present',), 10),
+    Rule('content.cta.missing', 'content', 'cta', severity='info', title='No Clear Call-to-Action',
+         message='Add clear calls-to-action to guide users toward conversion.'),
+
+    # Lists for scannability (10 points)
+    Rule('content.lists.ok', 'content', 'lists', 'list_count', ('>=', 1), 10),
+    Rule('content.lists.missing', 'content', 'lists', severity='info', title='No Lists or Bullet Points',
+         message='Use lists to make content more scannable and digestible.'),
+)
+
+BASE_RULE_SET = RuleSet('base', BASE_RULES_VERSION, BASE_RULES)
+
+rule_registry = RuleRegistry(BASE_RULE_SET)
+if settings.SITE_AUDIT_RULE_PACKS_DIR:
+    rule_registry.load_directory(settings.SITE_AUDIT_RULE_PACKS_DIR)
@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.audit_snapshot import PageSnapshot, SiteSnapshot
+from app.services.page_features import FEATURES_VERSION, PageFeatures
+from app.services.url_canonicalizer import default_canonicalizer
+
+# INSERT ... ON CONFLICT DO UPDATE for the supported databases
+UPSERT_INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+# Rows per upsert statement, well under SQLite's bound parameter limit
+UPSERT_BATCH_SIZE = 500
+# Pages per IN (...) query when loading stored features
+LOOKUP_BATCH_SIZE = 500
+# How long a features lookup waits for lookups from other crawl workers to join its query
+LOOKUP_BATCH_WINDOW = 0.005
+
+
+def page_scope(render_mode: Optional[str] = None) -> str:
+    """Stored page features are only reused by audits that load pages the same way."""
+    return f"render={render_mode or settings.SITE_AUDIT_RENDER_MODE}"
+
+
+def audit_scope(depth: int, render_mode: Optional[str] = None, rule_pack: Optional[str] = None) -> str:
+    """An audit is only diffed against an earlier one run with the same settings."""
+    return f"depth={depth}:{page_scope(render_mode)}:rules={rule_pack or ''}"
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def url_key_hash(url_key: str) -> str:
+    return hashlib.blake2b(url_key.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def issue_key(issue: Dict) -> Tuple[str, str]:
+    return issue['category'], issue['title']
+
+
+def diff_issues(previous: List[Dict], current: List[Dict]) -> Dict:
+    """New and resolved issues between two audits, matched on category and title."""
+    previous_keys = {issue_key(issue) for issue in previous}
+    current_keys = {issue_key(issue) for issue in current}
+    return {
+        'new_issues': [issue for issue in current if issue_key(issue) not in previous_keys],
+        'resolved_issues': [issue for issue in previous if issue_key(issue) not in current_keys],
+        'unchanged_issues': len(previous_keys & current_keys),
+    }
+
+
+class AuditSnapshotService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _upsert(self, model, rows: List[Dict], keys: List[str]):
+        """
+        Insert rows, updating any that already exist, in one statement per
+        batch so two audits of the same site saving at once cannot collide.
+        """
+        insert = UPSERT_INSERTS[self.db.get_bind().dialect.name]
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            statement = insert(model).values(rows[start:start + UPSERT_BATCH_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=keys,
+                set_={name: statement.excluded[name] for name in rows[0] if name not in keys},
+            )
+            self.db.execute(statement)
+        self.db.commit()
+
+    def get_page_hashes(self, site: str, scope: str) -> Dict[str, str]:
+        rows = self.db.query(PageSnapshot.url_key, PageSnapshot.content_hash).filter(
+            PageSnapshot.site == site,
+            PageSnapshot.scope == scope,
+            PageSnapshot.features_version == FEATURES_VERSION,
+        )
+        return {url_key: hash_ for url_key, hash_ in rows}
+
+    def get_page_features(self, site: str, scope: str, url_keys: List[str]) -> Dict[str, Dict]:
+        """Stored features of the given pages, by url_key, in one query per batch."""
+        features = {}
+        for start in range(0, len(url_keys), LOOKUP_BATCH_SIZE):
+            hashes = [url_key_hash(url_key) for url_key in url_keys[start:start + LOOKUP_BATCH_SIZE]]
+            rows = self.db.query(PageSnapshot.url_key, PageSnapshot.features).filter(
+                PageSnapshot.site == site,
+                PageSnapshot.scope == scope,
+                PageSnapshot.url_hash.in_(hashes),
+            )
+            features.update({url_key: data for url_key, data in rows})
+        return features
+
+    def save_pages(self, site: str, scope: str, pages: Dict[str, Tuple[str, Dict]]):
+        if not pages:
+            return
+        now = datetime.utcnow()
+        self._upsert(PageSnapshot, [
+            {
+                'site': site,
+                'scope': scope,
+                'url_key': url_key,
+                'url_hash': url_key_hash(url_key),
+                'content_hash': hash_,
+                'features_version': FEATURES_VERSION,
+                'features': features,
+                'updated_at': now,
+            }
+            for url_key, (hash_, features) in pages.items()
+        ], keys=['site', 'scope', 'url_hash'])
+
+    def get_site_snapshot(self, site: str, scope: str) -> Optional[SiteSnapshot]:
+        return self.db.query(SiteSnapshot).filter(SiteSnapshot.site == site, SiteSnapshot.scope == scope).first()
+
+    def get_previous_audit(self, site: str, scope: str) -> Optional[Dict]:
+        snapshot = self.get_site_snapshot(site, scope)
+        if snapshot is None:
+            return None
+        return {
+            'overall_score': snapshot.overall_score,
+            'issues': snapshot.issues,
+            'suggestions': snapshot.suggestions,
+            'analyzed_at': snapshot.analyzed_at.isoformat() if snapshot.analyzed_at else None,
+        }
+
+    def save_site_snapshot(
+        self,
+        site: str,
+        scope: str,
+        overall_score: int,
+        issues: List[Dict],
+        suggestions: Optional[List[Dict]],
+    ):
+        self._upsert(SiteSnapshot, [{
+            'site': site,
+            'scope': scope,
+            'overall_score': overall_score,
+            'issues': [
+                {'category': issue['category'], 'title': issue['title'], 'severity': issue['severity']}
+                for issue in issues
+            ],
+            'suggestions': suggestions,
+            'analyzed_at': datetime.utcnow(),
+        }], keys=['site', 'scope'])
+
+    def save_site_suggestions(self, site: str, scope: str, suggestions: List[Dict]):
+        snapshot = self.get_site_snapshot(site, scope)
+        if snapshot is not None:
+            snapshot.suggestions = suggestions
+            self.db.commit()
+
+
+def _with_session(method: str, *args):
+    db = SessionLocal()
+    try:
+        return getattr(AuditSnapshotService(db), method)(*args)
+    finally:
+        db.close()
+
+
+async def run_snapshot_query(method: str, *args):
+    """Run an AuditSnapshotService method with its own session, off the event loop."""
+    return await asyncio.to_thread(_with_session, method, *args)
+
+
+class PageSnapshots:
+    """
+    Page snapshots for one site and page scope during a crawl.
+
+    lookup() returns the stored features of a page whose content hash
+    matches its last audit, so the crawler can skip parsing it. Lookups
+    made while another is loading are batched into one query. Pages that
+    are new or changed are record()ed and written back by save().
+    """
+
+    def __init__(self, site: str, scope: str, known_hashes: Dict[str, str]):
+        self.site = site
+        self.scope = scope
+        self._known_hashes = known_hashes
+        self._changed: Dict[str, Tuple[str, Dict]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._loader: Optional[asyncio.Task] = None
+        self.unchanged = 0
+
+    @classmethod
+    async def load(cls, site: str, scope: str, reuse: bool = True) -> 'PageSnapshots':
+        known_hashes = {}
+        if reuse:
+            try:
+                known_hashes = await run_snapshot_query('get_page_hashes', site, scope)
+            except Exception as e:
+                logging.error(f"Error loading page snapshots for {site}: {e}")
+        return cls(site, scope, known_hashes)
+
+    async def lookup(self, url: str, page_hash: str, selector_names: Iterable[str] = ()) -> Optional[PageFeatures]:
+        """
+        Stored features of an unchanged page, unless they were extracted
+        without counting some of selector_names (a rule pack's selectors).
+        """
+        url_key = default_canonicalizer.key(url)
+        if self._known_hashes.get(url_key) != page_hash:
+            return None
+        future = self._pending.get(url_key)
+        if future is None:
+            future = self._pending[url_key] = asyncio.get_running_loop().create_future()
+            if self._loader is None:
+                self._loader = asyncio.create_task(self._load_pending())
+        # Shielded: one crawl worker giving up must not fail the batch for the others
+        data = await asyncio.shield(future)
+        if data is None or not set(selector_names) <= data.get('selector_counts', {}).keys():
+            return None
+        self.unchanged += 1
+        return PageFeatures.from_dict(data)
+
+    async def _load_pending(self):
+        batch: Dict[str, asyncio.Future] = {}
+        try:
+            while self._pending:
+                await asyncio.sleep(LOOKUP_BATCH_WINDOW)
+                batch, self._pending = self._pending, {}
+                try:
+                    features = await run_snapshot_query('get_page_features', self.site, self.scope, list(batch))
+                except Exception as e:
+                    logging.error(f"Error loading page snapshots for {self.site}: {e}")
+                    features = {}
+                for url_key, future in batch.items():
+                    if not future.done():
+                        future.set_result(features.get(url_key))
+        finally:
+            # Lookups still waiting if this task was cancelled
+            for future in [*batch.values(), *self._pending.values()]:
+                future.cancel()
+            self._pending = {}
+            self._loader = None
+
+    def record(self, url: str, page_hash: str, features: PageFeatures):
+        self._changed[default_canonicalizer.key(url)] = (page_hash, features.to_dict())
+
+    async def save(self):
+        pages, self._changed = self._changed, {}
+        try:
+            await run_snapshot_query('save_pages', self.site, self.scope, pages)
+        except Exception as e:
+            logging.error(f"Error saving page snapshots for {self.site}: {e}")
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, List, Optional
+from app.core.config import settings
+from app.core.http_client import CRAWLER_HEADERS
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:  # Playwright is optional; audits simply skip browser stages
+    async_playwright = None
+
+# After a failed launch (e.g. browsers not installed), wait this long before retrying
+BROWSER_RETRY_SECONDS = 300
+VIEWPORT = {'width': 1280, 'height': 800}
+
+
+class BrowserUnavailable(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class _ContextSlot:
+    context: Any = None
+    uses: int = 0
+
+
+class BrowserPool:
+    """
+    One long-lived headless Chromium with a fixed set of warm browser
+    contexts.
+
+    The browser is launched once per process and reused by every audit;
+    page() borrows a context, opens a fresh page in it and returns the
+    context when done, so at most `size` pages are open at once. Contexts
+    are recycled after max_uses pages (and after any error) so cookies,
+    caches and leaks do not accumulate. If the browser dies it is
+    relaunched on the next request.
+    """
+
+    def __init__(self, size: int, max_uses: int):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self._playwright = None
+        self._browser = None
+        self._slots: Optional[asyncio.Queue] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._unavailable_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return async_playwright is not None and time.time() >= self._unavailable_until
+
+    def _bind_loop(self):
+        # Playwright objects and asyncio primitives belong to one event loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._playwright = None
+            self._browser = None
+            self._slots = asyncio.Queue()
+            for _ in range(self.size):
+                self._slots.put_nowait(_ContextSlot())
+            self._launch_lock = asyncio.Lock()
+            self._loop = loop
+
+    async def _get_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        if not self.available:
+            raise BrowserUnavailable("Headless browser is not available")
+
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            await self._stop_playwright()
+            try:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(
+                    args=['--disable-dev-shm-usage', '--disable-gpu'],
+                )
+            except Exception as e:
+                print(f"Error launching headless browser: {e}")
+                self._unavailable_until = time.time() + BROWSER_RETRY_SECONDS
+                await self._stop_playwright()
+                raise BrowserUnavailable(str(e)) from e
+            return self._browser
+
+    async def _new_context(self):
+        browser = await self._get_browser()
+        return await browser.new_context(
+            viewport=VIEWPORT,
+            user_agent=CRAWLER_HEADERS['User-Agent'],
+            ignore_https_errors=True,
+        )
+
+    async def warm(self):
+        """Launch the browser and open every context ahead of the first audit."""
+        if not self.available:
+            return
+        self._bind_loop()
+        slots: List[_ContextSlot] = [await self._slots.get() for _ in range(self.size)]
+        try:
+            for slot in slots:
+                if slot.context is None:
+                    slot.context = await self._new_context()
+                    slot.uses = 0
+        except BrowserUnavailable:
+            pass
+        finally:
+            for slot in slots:
+                self._slots.put_nowait(slot)
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrow a new page in a warm context. Raises BrowserUnavailable."""
+        self._bind_loop()
+        slots = self._slots
+        slot = await slots.get()
+        try:
+            if slot.context is None:
+                slot.context = await self._new_context()
+                slot.uses = 0
+
+            page = await slot.context.new_page()
+            try:
+                yield page
+            finally:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+
+            slot.uses += 1
+            if slot.uses >= self.max_uses:
+                await self._discard(slot)
+        except BaseException:
+            # The context may be unusable (crash, timeout mid-navigation)
+            await self._discard(slot)
+            raise
+        finally:
+            slots.put_nowait(slot)
+
+    async def _discard(self, slot: _ContextSlot):
+        context, slot.context, slot.uses = slot.context, None, 0
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def _stop_playwright(self):
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+        self._browser = None
+        self._playwright = None
+
+    async def close(self):
+        if self._loop is None or self._loop is not asyncio.get_running_loop():
+            return
+        idle = []
+        while not self._slots.empty():
+            idle.append(self._slots.get_nowait())
+        for slot in idle:
+            await self._discard(slot)
+            self._slots.put_nowait(slot)
+        await self._stop_playwright()
+
+
+browser_pool = BrowserPool(settings.BROWSER_POOL_SIZE, settings.BROWSER_CONTEXT_MAX_USES)
@@ -0,0 +1,160 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+from app.core.config import settings
+from app.services.url_canonicalizer import default_canonicalizer
+
+# Rows removed per eviction round while the cache is over its size limit
+EVICTION_BATCH = 64
+
+
+def normalize_cache_key(url: str) -> str:
+    """Cache entries are keyed by the crawler's canonical fetch URL."""
+    return default_canonicalizer.canonicalize(url)
+
+
+@dataclass(slots=True)
+class CachedPage:
+    body: bytes
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class CrawlCache:
+    """
+    On-disk cache of crawled pages for HTTP revalidation.
+
+    Stores each page's ETag / Last-Modified validators next to its
+    zlib-compressed body in SQLite. Total body size is bounded; the least
+    recently used entries are evicted first. All disk work runs in a thread
+    so it never blocks the event loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS crawl_cache (
+                    key TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    encoding TEXT,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_crawl_cache_accessed ON crawl_cache (accessed_at)')
+            self._total_bytes = conn.execute('SELECT COALESCE(SUM(size), 0) FROM crawl_cache').fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    # ── Sync API (runs in a worker thread) ─────────────────────────────────────
+
+    def get_sync(self, url: str) -> Optional[CachedPage]:
+        key = normalize_cache_key(url)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT etag, last_modified, encoding, body FROM crawl_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE crawl_cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            conn.commit()
+
+        etag, last_modified, encoding, body = row
+        return CachedPage(
+            body=zlib.decompress(body),
+            encoding=encoding,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    def put_sync(
+        self,
+        url: str,
+        body: bytes,
+        encoding: Optional[str],
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ):
+        key = normalize_cache_key(url)
+        compressed = zlib.compress(body, 6)
+        if len(compressed) > self.max_bytes:
+            return
+
+        with self._lock:
+            conn = self._connect()
+            previous = conn.execute('SELECT size FROM crawl_cache WHERE key = ?', (key,)).fetchone()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO crawl_cache (key, etag, last_modified, encoding, body, size, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, etag, last_modified, encoding, compressed, len(compressed), time.time()),
+            )
+            self._total_bytes += len(compressed) - (previous[0] if previous else 0)
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        while self._total_bytes > self.max_bytes:
+            rows = conn.execute(
+                'SELECT key, size FROM crawl_cache ORDER BY accessed_at LIMIT ?', (EVICTION_BATCH,)
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                conn.execute('DELETE FROM crawl_cache WHERE key = ?', (key,))
+                self._total_bytes -= size
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ── Async API ──────────────────────────────────────────────────────────────
+
+    async def get(self, url: str) -> Optional[CachedPage]:
+        return await asyncio.to_thread(self.get_sync, url)
+
+    async def put(
+        self,
+        url: str,
+        body: bytes,
+        encoding: Optional[str],
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ):
+        await asyncio.to_thread(self.put_sync, url, body, encoding, etag, last_modified)
+
+
+crawl_cache = CrawlCache(settings.CRAWL_CACHE_PATH, settings.CRAWL_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,164 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+NUMBER_RE = re.compile(r'\d+')
+DATE_RE = re.compile(r'^\d{4}-\d{1,2}(?:-\d{1,2})?$')
+# Hex hashes and UUIDs; must contain a digit so plain words are left alone
+ID_RE = re.compile(r'^(?=[^/]*\d)[0-9a-f-]{8,}$', re.IGNORECASE)
+# Distinct values seen in one path position before it is treated as a variable
+LEARN_THRESHOLD = 30
+# Paths deeper than this are almost always generated (relative-link loops, endless nesting)
+MAX_PATH_SEGMENTS = 12
+# A segment repeated this often in one path is a loop, e.g. /a/x/a/y/a
+MAX_SEGMENT_REPEATS = 3
+# Leading path segments that name an infinite-space pattern in the report
+TRAP_PREFIX_SEGMENTS = 3
+# Entries kept in the report
+REPORT_TOP = 20
+
+PRUNE_FACET = 'facet'          # too many filter/sort/pagination variants of one page
+PRUNE_PATTERN = 'pattern'      # too many URLs of one path template
+PRUNE_DEPTH = 'path_depth'     # path keeps growing
+PRUNE_REPEAT = 'repeating_segments'
+TRAP_REASONS = (PRUNE_DEPTH, PRUNE_REPEAT)
+# Report order: traps first, then facets, then plain template caps
+REASON_ORDER = {PRUNE_DEPTH: 0, PRUNE_REPEAT: 0, PRUNE_FACET: 1, PRUNE_PATTERN: 2}
+
+
+def _segment_template(segment: str) -> str:
+    if DATE_RE.match(segment):
+        return '{date}'
+    if ID_RE.match(segment):
+        return '{id}'
+    return NUMBER_RE.sub('{n}', segment)
+
+
+def infinite_space(segments: List[str]) -> Optional[str]:
+    """Why a path looks like an infinite URL space, or None."""
+    if len(segments) > MAX_PATH_SEGMENTS:
+        return PRUNE_DEPTH
+    counts = Counter(segments)
+    if counts and counts.most_common(1)[0][1] >= MAX_SEGMENT_REPEATS:
+        return PRUNE_REPEAT
+    # Back-to-back repeats of a 2- or 3-segment block (/a/b/a/b)
+    for size in (2, 3):
+        for start in range(len(segments) - 2 * size + 1):
+            if segments[start:start + size] == segments[start + size:start + 2 * size]:
+                return PRUNE_REPEAT
+    return None
+
+
+class UrlPatternGuard:
+    """
+    Keeps calendars, faceted navigation and other crawl traps from eating
+    the crawl budget.
+
+    Every discovered URL is reduced to a template: numbers, dates and IDs
+    in the path become placeholders, and the query keeps only its sorted
+    parameter names (/shop/shoes?color=red&sort=price -> /shop/shoes?color&sort).
+    Templates are learned online: once a path position has seen more than
+    LEARN_THRESHOLD distinct values under the same parent, it becomes a
+    wildcard, so /tag/red, /tag/blue ... collapse into /tag/*.
+
+    Each template may use a limited number of URLs: query templates
+    (filters, sorting, pagination) max_query_urls, path templates
+    max_pattern_urls, which also caps all query variants of one path
+    together. Paths that are too deep or repeat their own
+    segments are rejected outright. Rejections are counted per template
+    for the audit report.
+    """
+
+    def __init__(self, max_pattern_urls: int, max_query_urls: int):
+        self.max_pattern_urls = max(1, max_pattern_urls)
+        self.max_query_urls = max(1, max_query_urls)
+        self._admitted: Counter = Counter()
+        # Distinct values seen under each parent template, until that position becomes a wildcard
+        self._values: Dict[Tuple[str, ...], Set[str]] = {}
+        self._wildcards: Set[Tuple[str, ...]] = set()
+        # template -> [reason, URLs pruned, example URL]
+        self._pruned: Dict[str, list] = {}
+
+    def _path_template(self, segments: List[str]) -> Tuple[str, ...]:
+        template: List[str] = []
+        for segment in segments:
+            parent = tuple(template)
+            if parent in self._wildcards:
+                template.append('*')
+                continue
+            normalized = _segment_template(segment)
+            values = self._values.setdefault(parent, set())
+            values.add(normalized)
+            if len(values) > LEARN_THRESHOLD:
+                self._wildcards.add(parent)
+                del self._values[parent]
+                normalized = '*'
+            template.append(normalized)
+        return tuple(template)
+
+    def template(self, url: str) -> str:
+        parts = urlsplit(url)
+        segments = [segment for segment in parts.path.split('/') if segment]
+        path = '/' + '/'.join(self._path_template(segments))
+        names = sorted({name for name, _ in parse_qsl(parts.query, keep_blank_values=True)})
+        return f"{path}?{'&'.join(names)}" if names else path
+
+    def _over_limit(self, template: str) -> bool:
+        if '?' not in template:
+            return self._admitted[template] >= self.max_pattern_urls
+        # Every parameter combination is its own template, so the page's
+        # query variants are also capped together
+        path = template.split('?', 1)[0] + '?*'
+        return (
+            self._admitted[template] >= self.max_query_urls
+            or self._admitted[path] >= self.max_pattern_urls
+        )
+
+    def _prune(self, template: str, reason: str, url: str):
+        entry = self._pruned.get(template)
+        if entry is None:
+            self._pruned[template] = [reason, 1, url]
+        else:
+            entry[1] += 1
+
+    def admit(self, url: str) -> bool:
+        """Whether the URL may be queued; records it against its template."""
+        parts = urlsplit(url)
+        segments = [segment for segment in parts.path.split('/') if segment]
+        reason = infinite_space(segments)
+        if reason:
+            prefix = [_segment_template(segment) for segment in segments[:TRAP_PREFIX_SEGMENTS]]
+            self._prune('/' + '/'.join(prefix + ['...']), reason, url)
+            return False
+
+        template = self.template(url)
+        if self._over_limit(template):
+            self._prune(template, PRUNE_FACET if '?' in template else PRUNE_PATTERN, url)
+            return False
+        self._admitted[template] += 1
+        if '?' in template:
+            self._admitted[template.split('?', 1)[0] + '?*'] += 1
+        return True
+
+    @property
+    def urls_pruned(self) -> int:
+        return sum(entry[1] for entry in self._pruned.values())
+
+    def report(self) -> Dict:
+        pruned = sorted(self._pruned.items(), key=lambda item: (REASON_ORDER[item[1][0]], -item[1][1]))
+        by_reason: Dict[str, Dict] = {}
+        for reason, count, _ in self._pruned.values():
+            totals = by_reason.setdefault(reason, {'patterns': 0, 'urls_pruned': 0})
+            totals['patterns'] += 1
+            totals['urls_pruned'] += count
+        return {
+            'patterns_seen': sum(1 for template in self._admitted if not template.endswith('?*')),
+            'urls_pruned': self.urls_pruned,
+            'pruned_patterns_count': len(pruned),
+            'by_reason': by_reason,
+            'pruned_patterns': [
+                {'pattern': template, 'reason': reason, 'urls_pruned': count, 'example': example}
+                for template, (reason, count, example) in pruned[:REPORT_TOP]
+            ],
+        }
@@ -0,0 +1,137 @@
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+WORD_RE = re.compile(r'\w+')
+SHINGLE_WORDS = 3
+SIMHASH_BITS = 64
+# Fingerprints at most this many bits apart are near-duplicates
+NEAR_DUPLICATE_DISTANCE = 6
+# LSH bands: two fingerprints within NEAR_DUPLICATE_DISTANCE bits agree on at least one band
+LSH_BANDS = NEAR_DUPLICATE_DISTANCE + 1
+# (shift, mask) of each band; the 64 bits are split as evenly as possible
+LSH_BAND_MASKS = [
+    (SIMHASH_BITS * band // LSH_BANDS, (1 << (SIMHASH_BITS * (band + 1) // LSH_BANDS - SIMHASH_BITS * band // LSH_BANDS)) - 1)
+    for band in range(LSH_BANDS)
+]
+# Pages with less text than this are too thin for similarity to mean much
+MIN_WORDS = 50
+# Fingerprints compared within one LSH bucket; bigger buckets only compare against these
+MAX_BUCKET_COMPARE = 200
+REPORT_TOP = 20
+
+
+def text_hash(text: str) -> Optional[str]:
+    """Exact-duplicate identity of a page's text, ignoring case and spacing."""
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    return hashlib.blake2b(' '.join(words).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash of a text's word 3-shingles: similar texts get
+    fingerprints that differ in few bits.
+    """
+    words = WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return None
+    shingles = {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    digests = b''.join(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles)
+    # One row of 64 bits per shingle; each bit position votes +1 / -1
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(shingles), SIMHASH_BITS)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), 'big')
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> bool:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        self.parent[root_b] = root_a
+        return True
+
+
+def find_duplicate_content(pages: List[Dict]) -> Dict:
+    """
+    Exact and near-duplicate page clusters.
+
+    Pages with identical text form exact clusters. One representative per
+    distinct text then goes into an LSH index over its SimHash: the 64 bits
+    are cut into bands, and only pages sharing a band value are compared,
+    so candidate pairs are found in roughly linear time instead of testing
+    every pair. Candidates within NEAR_DUPLICATE_DISTANCE bits are merged
+    with union-find.
+    """
+    exact: Dict[str, List[str]] = defaultdict(list)
+    representatives: List[Dict] = []
+    for page in pages:
+        features = page['features']
+        if features.text_hash is None or features.word_count < MIN_WORDS:
+            continue
+        group = exact[features.text_hash]
+        if not group and features.text_simhash is not None:
+            representatives.append(page)
+        group.append(page['url'])
+
+    fingerprints = [page['features'].text_simhash for page in representatives]
+    clusters = _UnionFind(len(representatives))
+    # (page, distance) for every comparison that merged two clusters
+    merges: List[Tuple[int, int]] = []
+    comparisons = 0
+    for shift, mask in LSH_BAND_MASKS:
+        buckets: Dict[int, List[int]] = defaultdict(list)
+        for index, fingerprint in enumerate(fingerprints):
+            buckets[(fingerprint >> shift) & mask].append(index)
+        for bucket in buckets.values():
+            for position, a in enumerate(bucket):
+                for b in bucket[max(0, position - MAX_BUCKET_COMPARE):position]:
+                    comparisons += 1
+                    distance = (fingerprints[a] ^ fingerprints[b]).bit_count()
+                    if distance <= NEAR_DUPLICATE_DISTANCE and clusters.union(b, a):
+                        merges.append((a, distance))
+
+    members: Dict[int, List[int]] = defaultdict(list)
+    for index in range(len(representatives)):
+        members[clusters.find(index)].append(index)
+    widest: Dict[int, int] = defaultdict(int)
+    for index, distance in merges:
+        root = clusters.find(index)
+        widest[root] = max(widest[root], distance)
+
+    near_clusters = []
+    for root, indexes in members.items():
+        if len(indexes) < 2:
+            continue
+        urls = [url for index in indexes for url in exact[representatives[index]['features'].text_hash]]
+        near_clusters.append({
+            'urls': urls,
+            # Largest SimHash distance (of 64 bits) among the pairs that joined the cluster
+            'max_distance_bits': widest[root],
+        })
+    near_clusters.sort(key=lambda cluster: len(cluster['urls']), reverse=True)
+
+    exact_clusters = sorted((urls for urls in exact.values() if len(urls) > 1), key=len, reverse=True)
+    return {
+        'pages_compared': sum(len(urls) for urls in exact.values()),
+        'comparisons': comparisons,
+        'exact_duplicate_clusters_count': len(exact_clusters),
+        'exact_duplicate_pages': sum(len(urls) for urls in exact_clusters),
+        'exact_duplicate_clusters': [{'urls': urls} for urls in exact_clusters[:REPORT_TOP]],
+        'near_duplicate_clusters_count': len(near_clusters),
+        'near_duplicate_pages': sum(len(cluster['urls']) for cluster in near_clusters),
+        'near_duplicate_clusters': near_clusters[:REPORT_TOP],
+    }
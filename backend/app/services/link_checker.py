@@ -0,0 +1,198 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+import aiohttp
+from app.core.config import settings
+from app.core.http_client import HEAD_UNSUPPORTED_STATUSES
+from app.services.audit_result_cache import LRUResultStore
+from app.services.site_crawler import HostLimiter
+from app.services.url_canonicalizer import default_canonicalizer
+
+MAX_REDIRECTS = 10
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Bot walls and rate limits: the link may well work for visitors
+BLOCKED_STATUSES = {401, 403, 429, 999}
+# Entries kept in each list of the report
+REPORT_TOP = 20
+# Source pages listed per broken link
+REPORT_SOURCES = 3
+
+
+async def _request_once(session: aiohttp.ClientSession, method: str, url: str, timeout: aiohttp.ClientTimeout):
+    """Status and Location of a single request, without following redirects or reading the body."""
+    async with session.request(method, url, timeout=timeout, allow_redirects=False) as response:
+        return response.status, response.headers.get('Location')
+
+
+async def check_link(session: aiohttp.ClientSession, url: str, timeout: aiohttp.ClientTimeout) -> Dict:
+    """
+    Follow a link hop by hop, recording every redirect.
+
+    Each hop is a HEAD request, repeated as a GET when the server refuses
+    HEAD. Returns the final status (None on a network error), the final
+    URL and the redirect chain as [{'url', 'status'}].
+    """
+    chain: List[Dict] = []
+    seen = set()
+    current = url
+    status = None
+    error = None
+    try:
+        while True:
+            status, location = await _request_once(session, 'HEAD', current, timeout)
+            if status in HEAD_UNSUPPORTED_STATUSES:
+                status, location = await _request_once(session, 'GET', current, timeout)
+            if status not in REDIRECT_STATUSES or not location:
+                break
+            chain.append({'url': current, 'status': status})
+            seen.add(current)
+            current = urljoin(current, location)
+            if current in seen:
+                error = 'Redirect loop'
+                break
+            if len(chain) >= MAX_REDIRECTS:
+                error = 'Too many redirects'
+                break
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        status = None
+        error = str(e) or type(e).__name__
+
+    return {'status': status, 'final_url': current, 'redirects': chain, 'error': error}
+
+
+def is_broken(result: Dict) -> bool:
+    if result['error']:
+        return True
+    return result['status'] >= 400 and result['status'] not in BLOCKED_STATUSES
+
+
+def is_cacheable(result: Dict) -> bool:
+    # Network errors, rate limits and server errors are often transient
+    status = result['status']
+    return status is not None and status < 500 and status != 429
+
+
+class LinkChecker:
+    """
+    Checks every link found during a crawl.
+
+    Links are de-duplicated across pages (a footer link shared by every
+    page is checked once) and checked concurrently, at most `concurrency`
+    at a time and `per_host_limit` per host. Results are cached per URL
+    for ttl_seconds (unless the failure looks transient), so repeat audits
+    only check links they have not seen recently.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self._cache = LRUResultStore(max_entries)
+
+    def _cached(self, url: str) -> Optional[Dict]:
+        raw = self._cache.get(url)
+        return json.loads(raw) if raw is not None else None
+
+    async def check(
+        self,
+        session: aiohttp.ClientSession,
+        pages: List[Dict],
+        site_host: str,
+        concurrency: int = 16,
+        per_host_limit: int = 4,
+        timeout: float = 10,
+        max_links: int = 500,
+        host_limiter: Optional[HostLimiter] = None,
+    ) -> Dict:
+        """
+        Broken-link and redirect report for the links of the given pages.
+        A shared host_limiter (bulk audits) replaces the per_host_limit.
+        """
+        sources: Dict[str, List[str]] = defaultdict(list)
+        for page in pages:
+            for link in page.get('links', ()):
+                sources[link].append(page['url'])
+
+        # Links on the most pages first, internal before external
+        ordered = sorted(
+            sources,
+            key=lambda link: (default_canonicalizer.host(link) != site_host, -len(sources[link])),
+        )[:max_links]
+
+        results: Dict[str, Dict] = {}
+        to_check = []
+        for link in ordered:
+            cached = self._cached(link)
+            if cached is not None:
+                results[link] = cached
+            else:
+                to_check.append(link)
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        host_limiter = host_limiter or HostLimiter(per_host_limit)
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        async def run(link: str):
+            async with semaphore:
+                async with host_limiter.slot(urlparse(link).netloc):
+                    result = await check_link(session, link, client_timeout)
+            if is_cacheable(result):
+                self._cache.set(link, json.dumps(result), self.ttl_seconds)
+            results[link] = result
+
+        await asyncio.gather(*(run(link) for link in to_check))
+        return self._report(sources, ordered, results, site_host, len(ordered) - len(to_check))
+
+    @staticmethod
+    def _report(
+        sources: Dict[str, List[str]],
+        checked: List[str],
+        results: Dict[str, Dict],
+        site_host: str,
+        from_cache: int,
+    ) -> Dict:
+        broken = {'internal': [], 'external': []}
+        redirected = {'internal': [], 'external': []}
+        blocked = 0
+        for link in checked:
+            result = results[link]
+            scope = 'internal' if default_canonicalizer.host(link) == site_host else 'external'
+            entry = {
+                'url': link,
+                'status': result['status'],
+                'pages': len(sources[link]),
+                'found_on': sources[link][:REPORT_SOURCES],
+            }
+            if is_broken(result):
+                broken[scope].append({**entry, 'error': result['error']})
+            elif result['status'] in BLOCKED_STATUSES:
+                blocked += 1
+            if result['redirects'] and not result['error']:
+                redirected[scope].append({
+                    **entry,
+                    'final_url': result['final_url'],
+                    'hops': len(result['redirects']),
+                    'chain': result['redirects'],
+                })
+
+        chains = [entry for entry in redirected['internal'] if entry['hops'] > 1]
+        return {
+            'links_found': len(sources),
+            'links_checked': len(checked),
+            'from_cache': from_cache,
+            'blocked': blocked,
+            'broken_internal_count': len(broken['internal']),
+            'broken_internal': broken['internal'][:REPORT_TOP],
+            'pages_with_broken_internal': len({
+                page for entry in broken['internal'] for page in sources[entry['url']]
+            }),
+            'broken_external_count': len(broken['external']),
+            'broken_external': broken['external'][:REPORT_TOP],
+            'internal_redirects_count': len(redirected['internal']),
+            'redirect_chains_count': len(chains),
+            'redirect_chains': sorted(chains, key=lambda entry: entry['hops'], reverse=True)[:REPORT_TOP],
+            'external_redirects_count': len(redirected['external']),
+        }
+
+
+link_checker = LinkChecker(settings.SITE_AUDIT_LINK_CACHE_TTL, settings.SITE_AUDIT_LINK_CACHE_MAX_ENTRIES)
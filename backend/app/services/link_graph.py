@@ -0,0 +1,197 @@
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-6   # L1 change between iterations at which PageRank has converged
+PAGERANK_MAX_ITERATIONS = 100
+# Pages more clicks than this from the homepage are hard for crawlers and visitors to reach
+MAX_HEALTHY_CLICK_DEPTH = 3
+# Entries kept in each list of the summary
+REPORT_TOP = 20
+
+
+def _gather_neighbors(indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Concatenated CSR rows of `nodes`, without a Python loop."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if not total:
+        return indices[:0]
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return indices[offsets]
+
+
+def click_depths(indptr: np.ndarray, indices: np.ndarray, start: int) -> np.ndarray:
+    """Breadth-first link distance from start, level by level; -1 where unreachable."""
+    depth = np.full(len(indptr) - 1, -1, dtype=np.int32)
+    depth[start] = 0
+    frontier = np.array([start], dtype=indices.dtype)
+    level = 0
+    while frontier.size:
+        level += 1
+        neighbors = _gather_neighbors(indptr, indices, frontier)
+        neighbors = np.unique(neighbors[depth[neighbors] < 0])
+        depth[neighbors] = level
+        frontier = neighbors
+    return depth
+
+
+def pagerank(src: np.ndarray, dst: np.ndarray, n: int, out_degree: np.ndarray) -> tuple:
+    """
+    PageRank by power iteration over an edge list. Rank held by pages
+    without links is spread evenly over every page.
+    Returns (ranks summing to 1, iterations run).
+    """
+    ranks = np.full(n, 1.0 / n)
+    dangling = out_degree == 0
+    inverse_degree = np.zeros(n)
+    inverse_degree[~dangling] = 1.0 / out_degree[~dangling]
+    teleport = (1.0 - PAGERANK_DAMPING) / n
+
+    for iteration in range(1, PAGERANK_MAX_ITERATIONS + 1):
+        share = ranks * inverse_degree
+        incoming = np.bincount(dst, weights=share[src], minlength=n)
+        updated = PAGERANK_DAMPING * (incoming + ranks[dangling].sum() / n) + teleport
+        change = np.abs(updated - ranks).sum()
+        ranks = updated
+        if change < PAGERANK_TOLERANCE:
+            break
+    return ranks, iteration
+
+
+@dataclass(slots=True)
+class LinkGraphMetrics:
+    """Site-wide summary plus per-page metric arrays, indexed through the node IDs."""
+    summary: Dict
+    _ids: Dict[str, int]
+    _position: np.ndarray
+    pagerank: np.ndarray
+    click_depth: np.ndarray
+    in_degree: np.ndarray
+    out_degree: np.ndarray
+    orphan: np.ndarray
+    dead_end: np.ndarray
+
+    def for_page(self, key: str) -> Optional[Dict]:
+        node = self._ids.get(key)
+        if node is None or self._position[node] < 0:
+            return None
+        i = self._position[node]
+        return {
+            'pagerank': round(float(self.pagerank[i]), 6),
+            'click_depth': int(self.click_depth[i]) if self.click_depth[i] >= 0 else None,
+            'inlinks': int(self.in_degree[i]),
+            'outlinks': int(self.out_degree[i]),
+            'orphan': bool(self.orphan[i]),
+            'dead_end': bool(self.dead_end[i]),
+        }
+
+
+class LinkGraph:
+    """
+    Internal link graph collected while a site is crawled.
+
+    Each crawled page adds its same-site out-links as edges between integer
+    node IDs (one per canonical URL key), stored in compact int arrays so
+    large crawls stay cheap. analyze() turns the edges between crawled
+    pages into a CSR adjacency matrix and computes PageRank, click depth,
+    in/out degree, orphan pages (no links from other crawled pages) and
+    dead ends (no internal links at all) with vectorized NumPy operations.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._src = array('i')
+        self._dst = array('i')
+        # Crawled pages: node ID, URL and number of internal links
+        self._pages: Dict[int, str] = {}
+        self._link_counts: Dict[int, int] = {}
+
+    def _node(self, key: str) -> int:
+        node = self._ids.get(key)
+        if node is None:
+            node = self._ids[key] = len(self._ids)
+        return node
+
+    def add_page(self, key: str, url: str, link_keys: Iterable[str]) -> int:
+        """Record a crawled page and its internal links. Returns bytes added."""
+        node = self._node(key)
+        before = len(self._src)
+        for link_key in link_keys:
+            target = self._node(link_key)
+            if target != node:
+                self._src.append(node)
+                self._dst.append(target)
+        self._pages[node] = url
+        self._link_counts[node] = self._link_counts.get(node, 0) + len(self._src) - before
+        return (len(self._src) - before) * 2 * self._src.itemsize
+
+    def analyze(self, start_key: str) -> Optional['LinkGraphMetrics']:
+        """Graph metrics of the crawled pages, or None when nothing was crawled."""
+        if not self._pages:
+            return None
+        started = time.perf_counter()
+
+        crawled = np.fromiter(self._pages, dtype=np.int64, count=len(self._pages))
+        n = len(crawled)
+        # Re-number crawled pages 0..n-1 and drop edges to pages that were not crawled
+        position = np.full(len(self._ids), -1, dtype=np.int64)
+        position[crawled] = np.arange(n)
+        src = position[np.frombuffer(self._src, dtype=np.int32)]
+        dst = position[np.frombuffer(self._dst, dtype=np.int32)]
+        keep = (src >= 0) & (dst >= 0)
+        # Several raw links can share a canonical key; count each edge once
+        edges = np.unique(src[keep] * n + dst[keep])
+        src, dst = edges // n, edges % n
+
+        # CSR: edges are sorted by source, so row i is indices[indptr[i]:indptr[i + 1]]
+        out_degree = np.bincount(src, minlength=n)
+        in_degree = np.bincount(dst, minlength=n)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(out_degree, out=indptr[1:])
+        indices = dst
+
+        ranks, iterations = pagerank(src, dst, n, out_degree)
+        start_node = self._ids.get(start_key)
+        start = int(position[start_node]) if start_node is not None else -1
+        if start >= 0:
+            depths = click_depths(indptr, indices, start)
+        else:
+            depths = np.full(n, -1, dtype=np.int32)
+
+        link_counts = np.fromiter(self._link_counts.values(), dtype=np.int64, count=n)
+        orphan = in_degree == 0
+        if start >= 0:
+            orphan[start] = False
+        dead_end = link_counts == 0
+        unreachable = depths < 0
+        urls: List[str] = list(self._pages.values())
+
+        reachable_depths = depths[~unreachable]
+        depth_counts = np.bincount(reachable_depths) if reachable_depths.size else np.zeros(0, dtype=np.int64)
+        top = np.argsort(-ranks)[:10]
+
+        summary = {
+            'pages': n,
+            'internal_links': int(len(src)),
+            'pagerank_iterations': iterations,
+            'top_pages': [
+                {'url': urls[i], 'pagerank': round(float(ranks[i]), 6), 'inlinks': int(in_degree[i])}
+                for i in top
+            ],
+            'max_click_depth': int(reachable_depths.max()) if reachable_depths.size else None,
+            'click_depth_distribution': {str(depth): int(count) for depth, count in enumerate(depth_counts) if count},
+            'deep_pages_count': int((depths > MAX_HEALTHY_CLICK_DEPTH).sum()),
+            'unreachable_pages_count': int(unreachable.sum()) if start >= 0 else None,
+            'orphan_pages_count': int(orphan.sum()),
+            'orphan_pages': [urls[i] for i in np.flatnonzero(orphan)[:REPORT_TOP]],
+            'dead_end_pages_count': int(dead_end.sum()),
+            'dead_end_pages': [urls[i] for i in np.flatnonzero(dead_end)[:REPORT_TOP]],
+            'compute_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+        return LinkGraphMetrics(
+            summary, self._ids, position, ranks, depths, in_degree, out_degree, orphan, dead_end,
+        )
@@ -0,0 +1,393 @@
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+from urllib.parse import urlparse, urljoin
+from lxml import etree, html as lxml_html
+from app.services.duplicate_content import simhash, text_hash
+
+# Subtrees left out of the content text, as the content analyzer expects
+CONTENT_EXCLUDED_TAGS = {'script', 'style', 'nav', 'footer'}
+CTA_KEYWORDS = ['contact', 'buy', 'shop', 'subscribe', 'sign up', 'get started', 'learn more']
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+# Bump whenever PageFeatures or the extractor changes, so stored snapshots are re-extracted
+FEATURES_VERSION = 5
+# Mount points of client-rendered apps (React, Next.js, Nuxt, Gatsby, Vue/Angular CLIs)
+SPA_ROOT_IDS = {'root', 'app', '__next', '__nuxt', '___gatsby', 'svelte'}
+# Script types that are data rather than code
+DATA_SCRIPT_TYPES = {'application/ld+json', 'application/json'}
+# Subresources recorded per page (a gallery page can reference thousands of images)
+MAX_PAGE_RESOURCES = 200
+# Stylesheet media queries that never block rendering of the screen
+NON_BLOCKING_MEDIA = {'print', 'speech'}
+# One compound selector: tag, #id, .class and [attr], [attr=v], [attr^=v], [attr*=v] parts
+SELECTOR_RE = re.compile(r'^([a-zA-Z][\w-]*|\*)?((?:#[\w-]+|\.[\w-]+|\[[\w:-]+(?:[\^*]?=(?:"[^"]*"|\'[^\']*\'|[^\]]*))?\])*)$')
+SELECTOR_PART_RE = re.compile(r'#([\w-]+)|\.([\w-]+)|\[([\w:-]+)(?:([\^*]?=)(?:"([^"]*)"|\'([^\']*)\'|([^\]]*)))?\]')
+
+
+@dataclass(slots=True)
+class PageFeatures:
+    """
+    Everything the SEO, design and content analyzers score, extracted from
+    a page in a single pass over its DOM.
+    """
+    # Head metadata
+    title: Optional[str] = None
+    meta_description: Optional[str] = None
+    has_viewport: bool = False
+    has_canonical: bool = False
+    canonical_url: Optional[str] = None
+    og_tags_count: int = 0
+    json_ld_count: int = 0
+
+    # Headings
+    h1_count: int = 0
+    h2_count: int = 0
+    h3_count: int = 0
+
+    # Images
+    images_total: int = 0
+    images_with_alt: int = 0
+    images_lazy: int = 0
+    images_responsive: int = 0
+
+    # Styling and accessibility
+    has_stylesheet: bool = False
+    font_links_count: int = 0
+    has_font_face: bool = False
+    aria_label_count: int = 0
+
+    # Content (outside script/style/nav/footer)
+    word_count: int = 0
+    sentence_count: int = 0
+    paragraph_count: int = 0
+    list_count: int = 0
+    internal_links: int = 0
+    external_links: int = 0
+    has_cta: bool = False
+    # Fingerprints of the content text for duplicate detection
+    text_hash: Optional[str] = None
+    text_simhash: Optional[int] = None
+
+    # Client-side rendering hints
+    script_count: int = 0
+    has_app_root: bool = False
+
+    # Subresources: absolute URL -> 'css', 'js', 'font' or 'image'
+    resources: Dict[str, str] = field(default_factory=dict)
+    # Stylesheets and synchronous scripts in <head> that delay first paint
+    render_blocking: List[str] = field(default_factory=list)
+
+    # Absolute URLs of every <a href> on the page, for crawling
+    links: List[str] = field(default_factory=list)
+
+    # Elements matching each custom rule-pack selector, by selector name
+    selector_counts: Dict[str, int] = field(default_factory=dict)
+
+    def approx_size(self) -> int:
+        """Rough number of bytes this record keeps alive."""
+        size = sys.getsizeof(self)
+        for value in (self.title, self.meta_description, self.canonical_url):
+            if value:
+                size += sys.getsizeof(value)
+        size += sum(sys.getsizeof(link) for link in self.links)
+        size += sys.getsizeof(self.resources) + sum(sys.getsizeof(url) for url in self.resources)
+        return size
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PageFeatures':
+        return cls(**{name: data[name] for name in cls.__dataclass_fields__ if name in data})
+
+
+# (attribute, operator or None, value) of one [attr...] condition
+AttributeTest = Tuple[str, Optional[str], str]
+
+
+@dataclass(slots=True, frozen=True)
+class _CompiledSelector:
+    name: str
+    element_id: Optional[str]
+    classes: FrozenSet[str]
+    attributes: Tuple[AttributeTest, ...]
+
+    def matches(self, attrib) -> bool:
+        if self.element_id is not None and attrib.get('id') != self.element_id:
+            return False
+        if self.classes and not self.classes <= set((attrib.get('class') or '').split()):
+            return False
+        for name, operator, value in self.attributes:
+            actual = attrib.get(name)
+            if actual is None:
+                return False
+            if operator == '=' and actual != value:
+                return False
+            if operator == '^=' and not actual.startswith(value):
+                return False
+            if operator == '*=' and value not in actual:
+                return False
+        return True
+
+
+@dataclass(slots=True)
+class SelectorSet:
+    """
+    Named CSS selectors counted during feature extraction, indexed by tag
+    so each element is only tested against the selectors that can match
+    it. Supports single compound selectors (div.promo, a[href^="tel:"],
+    #newsletter, [data-track]); combinators are not supported.
+    Plain data, so it pickles to the parse worker processes.
+    """
+    by_tag: Dict[str, Tuple[_CompiledSelector, ...]]
+    any_tag: Tuple[_CompiledSelector, ...]
+    names: FrozenSet[str]
+
+    def count(self, tag: str, attrib, counts: Dict[str, int]):
+        for selector in self.by_tag.get(tag, ()):
+            if selector.matches(attrib):
+                counts[selector.name] += 1
+        for selector in self.any_tag:
+            if selector.matches(attrib):
+                counts[selector.name] += 1
+
+
+def compile_selectors(selectors: Dict[str, str]) -> SelectorSet:
+    """Compile {name: selector}; raises ValueError on unsupported syntax."""
+    by_tag: Dict[str, List[_CompiledSelector]] = {}
+    any_tag: List[_CompiledSelector] = []
+    for name, selector in selectors.items():
+        match = SELECTOR_RE.match(selector.strip())
+        if not match or not selector.strip() or selector.strip() == '*':
+            raise ValueError(f"Unsupported selector for {name!r}: {selector!r}")
+        tag, parts = match.groups()
+        element_id = None
+        classes = set()
+        attributes = []
+        for part in SELECTOR_PART_RE.finditer(parts):
+            id_part, class_part, attribute, operator, *values = part.groups()
+            if id_part:
+                element_id = id_part
+            elif class_part:
+                classes.add(class_part)
+            else:
+                value = next((value for value in values if value is not None), '')
+                attributes.append((attribute.lower(), operator, value))
+        compiled = _CompiledSelector(name, element_id, frozenset(classes), tuple(attributes))
+        if tag and tag != '*':
+            by_tag.setdefault(tag.lower(), []).append(compiled)
+        else:
+            any_tag.append(compiled)
+    return SelectorSet(
+        {tag: tuple(compiled) for tag, compiled in by_tag.items()},
+        tuple(any_tag),
+        frozenset(selectors),
+    )
+
+
+def _sniff_encoding(body: bytes) -> Optional[str]:
+    match = META_CHARSET_RE.search(body[:2048])
+    if match:
+        return match.group(1).decode('ascii')
+    try:
+        body.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return None
+
+
+def _add_resource(features: PageFeatures, page_url: str, src: Optional[str], kind: str) -> Optional[str]:
+    if not src or len(features.resources) >= MAX_PAGE_RESOURCES:
+        return None
+    resource_url = urljoin(page_url, src.strip())
+    if not resource_url.startswith(('http://', 'https://')):
+        return None  # data: URIs and the like cost nothing extra to fetch
+    features.resources.setdefault(resource_url, kind)
+    return resource_url
+
+
+def _parse_document(html: Union[str, bytes], encoding: Optional[str] = None):
+    if isinstance(html, bytes):
+        parser = None
+        encoding = encoding or _sniff_encoding(html)
+        if encoding:
+            try:
+                parser = lxml_html.HTMLParser(encoding=encoding)
+            except LookupError:
+                parser = None
+        return lxml_html.document_fromstring(html, parser=parser)
+
+    try:
+        return lxml_html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml_html.document_fromstring(html.encode('utf-8'))
+
+
+def extract_page_features(
+    html: Union[str, bytes],
+    url: str,
+    encoding: Optional[str] = None,
+    selectors: Optional[SelectorSet] = None,
+) -> PageFeatures:
+    """
+    Parse a page with lxml and fill a PageFeatures record in one walk.
+
+    Accepts raw response bytes (decoded using `encoding`, the page's own
+    meta charset, or UTF-8) so it can run in a worker process; the result
+    is plain data and pickles cheaply back to the caller. Elements matching
+    `selectors` (a rule pack's custom selectors) are counted in the same walk.
+    """
+    features = PageFeatures()
+    if selectors is not None:
+        features.selector_counts = dict.fromkeys(selectors.names, 0)
+    if not html or not html.strip():
+        return features
+
+    try:
+        root = _parse_document(html, encoding)
+    except (etree.ParserError, ValueError):
+        return features
+
+    base_domain = urlparse(url).netloc
+    text_parts: List[str] = []
+    # Open <a>/<button> elements in the content area and their text so far
+    cta_stack: List[list] = []
+    excluded_depth = 0
+    in_head = False
+    count_selectors = selectors.count if selectors is not None else None
+    selector_counts = features.selector_counts
+
+    for event, el in etree.iterwalk(root, events=('start', 'end')):
+        tag = el.tag
+
+        if event == 'end':
+            if isinstance(tag, str):
+                if cta_stack and cta_stack[-1][0] is el:
+                    _, parts = cta_stack.pop()
+                    if not features.has_cta:
+                        cta_text = ''.join(parts).lower()
+                        features.has_cta = any(keyword in cta_text for keyword in CTA_KEYWORDS)
+                if tag in CONTENT_EXCLUDED_TAGS:
+                    excluded_depth -= 1
+                elif tag == 'head':
+                    in_head = False
+
+            if el.tail and not excluded_depth:
+                text_parts.append(el.tail)
+                for _, parts in cta_stack:
+                    parts.append(el.tail)
+            continue
+
+        # Comments and processing instructions only contribute their tail
+        if not isinstance(tag, str):
+            continue
+
+        if tag in CONTENT_EXCLUDED_TAGS:
+            excluded_depth += 1
+        in_content = not excluded_depth
+        attrib = el.attrib
+        if count_selectors is not None:
+            count_selectors(tag, attrib, selector_counts)
+
+        if 'aria-label' in attrib:
+            features.aria_label_count += 1
+        if not features.has_app_root and attrib.get('id') in SPA_ROOT_IDS:
+            features.has_app_root = True
+
+        if tag == 'head':
+            in_head = True
+        elif tag == 'a':
+            href = attrib.get('href')
+            if href is not None:
+                features.links.append(urljoin(url, href))
+                if in_content:
+                    if base_domain in href:
+                        features.internal_links += 1
+                    elif href.startswith('http'):
+                        features.external_links += 1
+        elif tag == 'title':
+            if features.title is None:
+                features.title = el.text_content()
+        elif tag == 'meta':
+            name = (attrib.get('name') or '').lower()
+            if name == 'description':
+                if features.meta_description is None:
+                    features.meta_description = attrib.get('content')
+            elif name == 'viewport':
+                features.has_viewport = True
+            if (attrib.get('property') or '').startswith('og:'):
+                features.og_tags_count += 1
+        elif tag == 'link':
+            rel = (attrib.get('rel') or '').lower().split()
+            href = attrib.get('href') or ''
+            if 'canonical' in rel:
+                features.has_canonical = True
+                if features.canonical_url is None and href:
+                    features.canonical_url = urljoin(url, href)
+            if 'stylesheet' in rel:
+                features.has_stylesheet = True
+                resource_url = _add_resource(features, url, href, 'css')
+                media = (attrib.get('media') or 'all').strip().lower()
+                if resource_url and in_head and media not in NON_BLOCKING_MEDIA and 'disabled' not in attrib:
+                    features.render_blocking.append(resource_url)
+            elif 'preload' in rel and attrib.get('as') == 'font':
+                _add_resource(features, url, href, 'font')
+            if 'font' in href:
+                features.font_links_count += 1
+        elif tag == 'img':
+            features.images_total += 1
+            if attrib.get('alt'):
+                features.images_with_alt += 1
+            if attrib.get('loading') == 'lazy':
+                features.images_lazy += 1
+            if attrib.get('srcset'):
+                features.images_responsive += 1
+            _add_resource(features, url, attrib.get('src'), 'image')
+        elif tag == 'h1':
+            features.h1_count += 1
+        elif tag == 'h2':
+            features.h2_count += 1
+        elif tag == 'h3':
+            features.h3_count += 1
+        elif tag == 'script':
+            script_type = attrib.get('type')
+            if script_type == 'application/ld+json':
+                features.json_ld_count += 1
+            if script_type not in DATA_SCRIPT_TYPES:
+                features.script_count += 1
+                resource_url = _add_resource(features, url, attrib.get('src'), 'js')
+                # Classic scripts in <head> without async/defer stop the parser
+                if (resource_url and in_head and script_type != 'module'
+                        and 'async' not in attrib and 'defer' not in attrib):
+                    features.render_blocking.append(resource_url)
+        elif tag == 'style':
+            features.has_stylesheet = True
+            if el.text and '@font-face' in el.text:
+                features.has_font_face = True
+
+        if in_content:
+            if tag == 'p':
+                features.paragraph_count += 1
+            elif tag in ('ul', 'ol'):
+                features.list_count += 1
+
+            if tag in ('a', 'button'):
+                cta_stack.append([el, []])
+
+            if el.text:
+                text_parts.append(el.text)
+                for _, parts in cta_stack:
+                    parts.append(el.text)
+
+    # Clean up text the same way regardless of parser whitespace handling
+    lines = (line.strip() for line in ''.join(text_parts).splitlines())
+    text = ' '.join(line for line in lines if line)
+
+    features.word_count = len(text.split())
+    features.sentence_count = len([s for s in text.split('.') if s.strip()])
+    features.text_hash = text_hash(text)
+    features.text_simhash = simhash(text)
+
+    return features
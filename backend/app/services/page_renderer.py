@@ -0,0 +1,90 @@
+from typing import Optional
+from app.core.config import settings
+from app.services.browser_pool import BrowserPool, BrowserUnavailable, browser_pool
+from app.services.page_features import PageFeatures
+
+RENDER_MODES = ('auto', 'always', 'never')
+# Requests that never change the DOM the analyzers read
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+# A page with scripts and fewer words than this is treated as an unrendered app shell
+SPA_SHELL_MAX_WORDS = 50
+
+
+def looks_like_spa_shell(features: PageFeatures) -> bool:
+    """
+    True for HTML that only becomes a page once JavaScript runs: scripts
+    present, almost no text, and either an app mount point or no links.
+    """
+    if features.script_count == 0 or features.word_count >= SPA_SHELL_MAX_WORDS:
+        return False
+    return features.has_app_root or (features.internal_links + features.external_links == 0)
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class PageRenderer:
+    """
+    Loads pages in the shared BrowserPool so client-rendered (SPA) sites
+    are analyzed on their rendered DOM.
+
+    Images, fonts and media are blocked. After DOMContentLoaded the page
+    gets up to idle_timeout seconds to reach network idle, then its DOM is
+    taken as-is. In 'auto' mode only pages that look like an app shell are
+    rendered, so static sites keep the plain HTTP path.
+    """
+
+    def __init__(self, pool: BrowserPool, mode: str, timeout: float, idle_timeout: float):
+        self.pool = pool
+        self.mode = mode if mode in RENDER_MODES else 'auto'
+        self.timeout_ms = timeout * 1000
+        self.idle_timeout_ms = idle_timeout * 1000
+        self.pages_rendered = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'never' and self.pool.available
+
+    def should_render(self, features: PageFeatures) -> bool:
+        if not self.enabled:
+            return False
+        return self.mode == 'always' or looks_like_spa_shell(features)
+
+    async def render(self, url: str) -> Optional[bytes]:
+        """The rendered DOM as UTF-8 HTML, or None if the page could not be rendered."""
+        try:
+            async with self.pool.page() as page:
+                await page.route('**/*', _block_heavy_resources)
+                await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout_ms)
+                try:
+                    await page.wait_for_load_state('networkidle', timeout=self.idle_timeout_ms)
+                except Exception as e:
+                    # Long-polling and analytics beacons never go idle; use the DOM so far
+                    if 'Timeout' not in type(e).__name__:
+                        raise
+                html = await page.content()
+        except BrowserUnavailable:
+            return None
+        except Exception as e:
+            print(f"Error rendering {url}: {e}")
+            return None
+
+        self.pages_rendered += 1
+        return html.encode('utf-8')
+
+
+def make_renderer(mode: Optional[str] = None) -> Optional[PageRenderer]:
+    """A renderer for one crawl, or None when rendering is off."""
+    mode = mode or settings.SITE_AUDIT_RENDER_MODE
+    if mode == 'never':
+        return None
+    return PageRenderer(
+        browser_pool,
+        mode,
+        settings.SITE_AUDIT_RENDER_TIMEOUT,
+        settings.SITE_AUDIT_RENDER_IDLE_TIMEOUT,
+    )
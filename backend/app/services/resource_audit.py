@@ -0,0 +1,198 @@
+import asyncio
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+import aiohttp
+from app.core.http_client import ProbeResult, probe_url
+from app.services.site_crawler import HostLimiter
+
+COMPRESSED_ENCODINGS = {'gzip', 'br', 'deflate', 'zstd'}
+# Text resources smaller than this gain little from compression
+COMPRESSIBLE_KINDS = {'css', 'js'}
+MIN_COMPRESSIBLE_BYTES = 1024
+# Static assets cached for less than this are refetched too often
+MIN_CACHE_SECONDS = 7 * 24 * 3600
+MAX_AGE_RE = re.compile(r'(?:s-)?max-age\s*=\s*(\d+)')
+# Entries kept in each top-N list of the report
+REPORT_TOP = 10
+
+
+def cache_lifetime(cache_control: Optional[str]) -> Optional[int]:
+    """Seconds a response may be cached for, 0 if never, None if unspecified."""
+    if not cache_control:
+        return None
+    cache_control = cache_control.lower()
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+    lifetimes = [int(value) for value in MAX_AGE_RE.findall(cache_control)]
+    return max(lifetimes) if lifetimes else None
+
+
+def _resource_info(kind: str, probe: ProbeResult) -> Dict:
+    encoding = probe.headers.get('content-encoding', '').lower()
+    return {
+        'kind': kind,
+        'status': probe.status,
+        'error': probe.error,
+        'size_bytes': probe.size_bytes,
+        'compressed': encoding in COMPRESSED_ENCODINGS,
+        'cache_seconds': cache_lifetime(probe.headers.get('cache-control')),
+        'has_validator': 'etag' in probe.headers or 'last-modified' in probe.headers,
+    }
+
+
+def _kb(size: int) -> float:
+    return round(size / 1024, 1)
+
+
+class ResourceAuditor:
+    """
+    Measures the CSS, JavaScript, fonts and images the crawled pages load.
+
+    Every resource URL is probed once per audit, however many pages share
+    it, with at most `concurrency` requests in flight overall and
+    `per_host_limit` per host. HEAD is tried first, falling back to GET,
+    so most resources are sized without being downloaded. Resources used
+    by the most pages are probed first when there are more than
+    max_resources. A shared host_limiter (bulk audits) replaces the
+    per_host_limit.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        concurrency: int = 16,
+        per_host_limit: int = 4,
+        timeout: float = 10,
+        max_resources: int = 300,
+        host_limiter: Optional[HostLimiter] = None,
+    ):
+        self.session = session
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.host_limiter = host_limiter or HostLimiter(per_host_limit)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_resources = max_resources
+
+    async def _probe(self, url: str) -> ProbeResult:
+        async with self.semaphore:
+            async with self.host_limiter.slot(urlparse(url).netloc):
+                return await probe_url(self.session, url, self.timeout)
+
+    async def audit(self, pages: List[Dict]) -> Dict:
+        """Page-weight and render-blocking report for the given crawled pages."""
+        kinds: Dict[str, str] = {}
+        usage: Counter = Counter()
+        for page in pages:
+            for url, kind in page['features'].resources.items():
+                kinds.setdefault(url, kind)
+                usage[url] += 1
+
+        to_probe = [url for url, _ in usage.most_common(self.max_resources)]
+        probes = await asyncio.gather(*(self._probe(url) for url in to_probe))
+        resources = {url: _resource_info(kinds[url], probe) for url, probe in zip(to_probe, probes)}
+
+        broken = [
+            {'url': url, 'kind': info['kind'], 'status': info['status'], 'error': info['error']}
+            for url, info in resources.items()
+            if info['status'] is None or info['status'] >= 400
+        ]
+        uncompressed = [
+            url for url, info in resources.items()
+            if info['kind'] in COMPRESSIBLE_KINDS
+            and not info['compressed']
+            and (info['size_bytes'] or 0) >= MIN_COMPRESSIBLE_BYTES
+        ]
+        short_cache = [
+            url for url, info in resources.items()
+            if info['status'] is not None and info['status'] < 400
+            and (info['cache_seconds'] or 0) < MIN_CACHE_SECONDS
+        ]
+        largest = sorted(
+            (item for item in resources.items() if item[1]['size_bytes']),
+            key=lambda item: item[1]['size_bytes'],
+            reverse=True,
+        )
+
+        return {
+            'resources_found': len(kinds),
+            'resources_checked': len(resources),
+            'by_type': self._by_type(resources),
+            **self._page_weights(pages, resources),
+            'render_blocking': self._render_blocking(pages, resources),
+            'largest_resources': [
+                {'url': url, 'kind': info['kind'], 'size_kb': _kb(info['size_bytes']), 'pages': usage[url]}
+                for url, info in largest[:REPORT_TOP]
+            ],
+            'broken_count': len(broken),
+            'broken': broken[:REPORT_TOP],
+            'uncompressed_count': len(uncompressed),
+            'uncompressed': uncompressed[:REPORT_TOP],
+            'short_cache_count': len(short_cache),
+            'short_cache': short_cache[:REPORT_TOP],
+        }
+
+    @staticmethod
+    def _by_type(resources: Dict[str, Dict]) -> Dict[str, Dict]:
+        by_type: Dict[str, Dict] = {}
+        for info in resources.values():
+            totals = by_type.setdefault(info['kind'], {'count': 0, 'size_kb': 0.0})
+            totals['count'] += 1
+            totals['size_kb'] += (info['size_bytes'] or 0) / 1024
+        for totals in by_type.values():
+            totals['size_kb'] = round(totals['size_kb'], 1)
+        return by_type
+
+    @staticmethod
+    def _page_weights(pages: List[Dict], resources: Dict[str, Dict]) -> Dict:
+        """
+        HTML plus every measured resource of each page. Sets
+        page['page_weight_bytes'] for the per-page analysis.
+        """
+        weights = []
+        for page in pages:
+            weight = page.get('size_bytes', 0) + sum(
+                resources[url]['size_bytes'] or 0
+                for url in page['features'].resources
+                if url in resources
+            )
+            page['page_weight_bytes'] = weight
+            weights.append((weight, page))
+
+        weights.sort(key=lambda item: item[0], reverse=True)
+        return {
+            'avg_page_weight_kb': _kb(sum(weight for weight, _ in weights) / len(weights)) if weights else 0.0,
+            'max_page_weight_kb': _kb(weights[0][0]) if weights else 0.0,
+            'heaviest_pages': [
+                {'url': page['url'], 'weight_kb': _kb(weight), 'resources': len(page['features'].resources)}
+                for weight, page in weights[:5]
+            ],
+        }
+
+    @staticmethod
+    def _render_blocking(pages: List[Dict], resources: Dict[str, Dict]) -> Dict:
+        """Blocking stylesheets and scripts per page. Sets page['render_blocking']."""
+        blocking_usage: Counter = Counter()
+        blocking_bytes = []
+        for page in pages:
+            blocking = page['features'].render_blocking
+            page['render_blocking'] = len(blocking)
+            blocking_usage.update(blocking)
+            blocking_bytes.append(sum(
+                resources[url]['size_bytes'] or 0 for url in blocking if url in resources
+            ))
+
+        return {
+            'pages_with_blocking': sum(1 for page in pages if page['render_blocking']),
+            'avg_per_page': round(sum(page['render_blocking'] for page in pages) / len(pages), 1) if pages else 0.0,
+            'avg_blocking_kb': _kb(sum(blocking_bytes) / len(blocking_bytes)) if blocking_bytes else 0.0,
+            'top': [
+                {
+                    'url': url,
+                    'kind': resources[url]['kind'] if url in resources else None,
+                    'size_kb': _kb(resources[url]['size_bytes'] or 0) if url in resources else None,
+                    'pages': count,
+                }
+                for url, count in blocking_usage.most_common(REPORT_TOP)
+            ],
+        }
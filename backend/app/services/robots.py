@@ -0,0 +1,242 @@
+import aiohttp
+import asyncio
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, urljoin
+from urllib.robotparser import RobotFileParser
+from lxml import etree
+from app.core.config import settings
+from app.core.http_client import CRAWLER_HEADERS, read_capped
+
+if TYPE_CHECKING:
+    from app.services.site_crawler import HostLimiter
+
+ROBOTS_MAX_BYTES = 512 * 1024
+SITEMAP_MAX_BYTES = 10 * 1024 * 1024
+FETCH_TIMEOUT = aiohttp.ClientTimeout(total=10)
+# Sitemap XML comes from untrusted sites: no entities, no network access
+SITEMAP_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, recover=True)
+
+
+@dataclass(slots=True)
+class SitemapEntry:
+    url: str
+    priority: float = 0.5
+    lastmod: Optional[float] = None  # POSIX timestamp
+
+
+@dataclass(slots=True)
+class HostPolicy:
+    """Crawl rules and sitemap URLs for one scheme://host."""
+    robots: Optional[RobotFileParser] = None
+    crawl_delay: Optional[float] = None
+    sitemap_entries: List[SitemapEntry] = field(default_factory=list)
+
+    def can_fetch(self, url: str) -> bool:
+        if self.robots is None:
+            return True
+        return self.robots.can_fetch(CRAWLER_HEADERS['User-Agent'], url)
+
+    def seeds(self, limit: int) -> List[SitemapEntry]:
+        """The most important sitemap URLs: highest priority, then most recently modified."""
+        ranked = sorted(
+            self.sitemap_entries,
+            key=lambda entry: (-entry.priority, -(entry.lastmod or 0)),
+        )
+        return ranked[:limit]
+
+
+def _parse_lastmod(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip().replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def _parse_priority(value: Optional[str]) -> float:
+    try:
+        return min(max(float(value), 0.0), 1.0) if value else 0.5
+    except ValueError:
+        return 0.5
+
+
+def parse_sitemap(body: bytes) -> Tuple[List[SitemapEntry], List[str]]:
+    """
+    Parse a sitemap or sitemap index.
+    Returns (page entries, child sitemap URLs).
+    """
+    if body[:2] == b'\x1f\x8b':
+        # Bounded decompression so a gzip bomb cannot blow up memory
+        try:
+            body = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body, SITEMAP_MAX_BYTES)
+        except zlib.error:
+            return [], []
+
+    try:
+        root = etree.fromstring(body, parser=SITEMAP_PARSER)
+    except etree.XMLSyntaxError:
+        return [], []
+    if root is None:
+        return [], []
+
+    entries = []
+    for url_el in root.iter('{*}url'):
+        loc = url_el.findtext('{*}loc')
+        if loc and loc.strip():
+            entries.append(SitemapEntry(
+                url=loc.strip(),
+                priority=_parse_priority(url_el.findtext('{*}priority')),
+                lastmod=_parse_lastmod(url_el.findtext('{*}lastmod')),
+            ))
+
+    children = [
+        loc.strip()
+        for loc in (sitemap_el.findtext('{*}loc') for sitemap_el in root.iter('{*}sitemap'))
+        if loc and loc.strip()
+    ]
+    return entries, children
+
+
+class RobotsCache:
+    """
+    Per-host robots.txt and sitemap data, fetched once and kept for a TTL.
+
+    At most max_entries hosts are kept, least recently used first out.
+    Concurrent audits of the same host share one in-flight fetch, which
+    goes through the first audit's host_limiter when one is given.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._policies: 'OrderedDict[str, Tuple[float, HostPolicy]]' = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def get_policy(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        host_limiter: Optional['HostLimiter'] = None,
+    ) -> HostPolicy:
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}".lower()
+
+        cached = self._policies.get(origin)
+        if cached and cached[0] > time.time():
+            self._policies.move_to_end(origin)
+            return cached[1]
+
+        task = self._in_flight.get(origin)
+        if task is None:
+            task = asyncio.create_task(self._load_and_store(session, origin, host_limiter))
+            self._in_flight[origin] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(origin, None))
+        # One audit giving up must not cancel the fetch others are waiting on
+        return await asyncio.shield(task)
+
+    async def _load_and_store(
+        self,
+        session: aiohttp.ClientSession,
+        origin: str,
+        host_limiter: Optional['HostLimiter'] = None,
+    ) -> HostPolicy:
+        policy = await self._load_policy(session, origin, host_limiter)
+        self._policies[origin] = (time.time() + self.ttl_seconds, policy)
+        self._policies.move_to_end(origin)
+        while len(self._policies) > self.max_entries:
+            self._policies.popitem(last=False)
+        return policy
+
+    async def _load_policy(
+        self,
+        session: aiohttp.ClientSession,
+        origin: str,
+        host_limiter: Optional['HostLimiter'] = None,
+    ) -> HostPolicy:
+        policy = HostPolicy()
+        sitemap_urls = [urljoin(origin, '/sitemap.xml')]
+
+        robots_body = await self._fetch(session, urljoin(origin, '/robots.txt'), ROBOTS_MAX_BYTES, host_limiter)
+        if robots_body is not None:
+            parser = RobotFileParser()
+            parser.parse(robots_body.decode('utf-8', errors='replace').splitlines())
+            # can_fetch() treats a parser that was never "read" as disallow-all
+            parser.modified()
+            policy.robots = parser
+
+            delay = parser.crawl_delay(CRAWLER_HEADERS['User-Agent'])
+            if delay:
+                policy.crawl_delay = min(float(delay), settings.SITE_AUDIT_MAX_CRAWL_DELAY)
+            if parser.site_maps():
+                sitemap_urls = parser.site_maps()
+
+        policy.sitemap_entries = await self._load_sitemaps(session, sitemap_urls, host_limiter)
+        return policy
+
+    async def _load_sitemaps(
+        self,
+        session: aiohttp.ClientSession,
+        sitemap_urls: List[str],
+        host_limiter: Optional['HostLimiter'] = None,
+    ) -> List[SitemapEntry]:
+        entries: List[SitemapEntry] = []
+        queue = list(dict.fromkeys(sitemap_urls))
+        seen = set(queue)
+        files_fetched = 0
+
+        while queue and files_fetched < settings.SITE_AUDIT_SITEMAP_MAX_FILES:
+            batch = queue[:settings.SITE_AUDIT_SITEMAP_MAX_FILES - files_fetched]
+            queue = queue[len(batch):]
+            files_fetched += len(batch)
+
+            bodies = await asyncio.gather(*(
+                self._fetch(session, sitemap_url, SITEMAP_MAX_BYTES, host_limiter) for sitemap_url in batch
+            ))
+            for body in bodies:
+                if not body:
+                    continue
+                page_entries, children = await asyncio.to_thread(parse_sitemap, body)
+                entries.extend(page_entries)
+                for child in children:
+                    if child not in seen:
+                        seen.add(child)
+                        queue.append(child)
+
+            if len(entries) >= settings.SITE_AUDIT_SITEMAP_MAX_URLS:
+                break
+
+        return entries[:settings.SITE_AUDIT_SITEMAP_MAX_URLS]
+
+    async def _fetch(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        max_bytes: int,
+        host_limiter: Optional['HostLimiter'] = None,
+    ) -> Optional[bytes]:
+        try:
+            if host_limiter is None:
+                return await self._get(session, url, max_bytes)
+            async with host_limiter.slot(urlparse(url).netloc):
+                return await self._get(session, url, max_bytes)
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+
+    @staticmethod
+    async def _get(session: aiohttp.ClientSession, url: str, max_bytes: int) -> Optional[bytes]:
+        async with session.get(url, timeout=FETCH_TIMEOUT, allow_redirects=True) as response:
+            if response.status != 200:
+                return None
+            body, _ = await read_capped(response, max_bytes)
+            return body
+
+
+robots_cache = RobotsCache(settings.SITE_AUDIT_ROBOTS_TTL, settings.SITE_AUDIT_ROBOTS_CACHE_MAX_ENTRIES)
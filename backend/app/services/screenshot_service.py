@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import io
+import re
+from typing import Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.screenshot import Screenshot
+from app.services.browser_pool import BrowserPool, BrowserUnavailable, browser_pool
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it screenshots stay JPEG
+    Image = None
+
+# Content-addressed file names, e.g. 3f2a...9c.jpg
+SCREENSHOT_NAME_RE = re.compile(r'^[0-9a-f]{32}\.(jpg|webp)$')
+SCREENSHOT_URL_PREFIX = '/api/site-audit/screenshots'
+CONTENT_TYPES = {'jpg': 'image/jpeg', 'webp': 'image/webp'}
+
+
+def _to_webp(jpeg: bytes, quality: int) -> bytes:
+    output = io.BytesIO()
+    Image.open(io.BytesIO(jpeg)).save(output, format='WEBP', quality=quality, method=4)
+    return output.getvalue()
+
+
+class ScreenshotService:
+    """
+    Above-the-fold screenshots of audited pages.
+
+    Pages are rendered in the shared BrowserPool, captured as JPEG (or
+    re-encoded to WebP when configured and Pillow is installed) and stored
+    in the database under the hash of the image bytes, so identical renders
+    share a row and the API can serve screenshots taken by any worker.
+    Returned URLs are absolute (base_url), as the frontend is served from
+    another origin.
+    """
+
+    def __init__(self, pool: BrowserPool, base_url: str, image_format: str, quality: int, timeout: float):
+        self.pool = pool
+        self.base_url = base_url.rstrip('/')
+        self.image_format = 'webp' if image_format.lower() == 'webp' and Image is not None else 'jpg'
+        self.quality = quality
+        self.timeout_ms = timeout * 1000
+
+    async def capture(self, url: str) -> Optional[str]:
+        """Screenshot a page and return its URL, or None if it could not be taken."""
+        try:
+            async with self.pool.page() as page:
+                try:
+                    await page.goto(url, wait_until='load', timeout=self.timeout_ms)
+                except Exception as e:
+                    # Slow third-party assets: capture whatever has rendered
+                    if 'Timeout' not in type(e).__name__:
+                        raise
+                image = await page.screenshot(type='jpeg', quality=self.quality, full_page=False)
+        except BrowserUnavailable:
+            return None
+        except Exception as e:
+            print(f"Error taking screenshot of {url}: {e}")
+            return None
+
+        try:
+            name = await asyncio.to_thread(self._store, image)
+        except Exception as e:
+            print(f"Error storing screenshot of {url}: {e}")
+            return None
+        return f"{self.base_url}{SCREENSHOT_URL_PREFIX}/{name}"
+
+    def _store(self, image: bytes) -> str:
+        if self.image_format == 'webp':
+            image = _to_webp(image, self.quality)
+        name = f"{hashlib.blake2b(image, digest_size=16).hexdigest()}.{self.image_format}"
+        db = SessionLocal()
+        try:
+            if db.get(Screenshot, name) is None:
+                db.add(Screenshot(name=name, content_type=CONTENT_TYPES[self.image_format], data=image))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # The same render was stored concurrently
+                    db.rollback()
+        finally:
+            db.close()
+        return name
+
+    def load(self, name: str) -> Optional[Tuple[bytes, str]]:
+        """Image bytes and content type of a stored screenshot, or None for unknown or invalid names."""
+        if not SCREENSHOT_NAME_RE.match(name):
+            return None
+        db = SessionLocal()
+        try:
+            screenshot = db.get(Screenshot, name)
+            return (screenshot.data, screenshot.content_type) if screenshot else None
+        finally:
+            db.close()
+
+
+screenshot_service = ScreenshotService(
+    browser_pool,
+    settings.PUBLIC_API_URL,
+    settings.SCREENSHOT_FORMAT,
+    settings.SCREENSHOT_QUALITY,
+    settings.SCREENSHOT_TIMEOUT,
+)
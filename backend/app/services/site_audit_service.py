@@ -1,44 +1,357 @@
 import aiohttp
 import asyncio
-import ssl
-import certifi
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List, Dict, Optional, Set, Tuple
+from urllib.parse import urlparse
 from datetime import datetime
 import time
-import re
 from anthropic import Anthropic
 from app.core.config import settings
+from app.core.http_client import crawler_client
+from app.services.audit_snapshot_service import PageSnapshots, audit_scope, diff_issues, page_scope, run_snapshot_query
+from app.services.audit_rules import CompiledRules, rule_registry
+from app.services.audit_result_cache import audit_cache_key, audit_result_cache, suggestions_key, suggestions_store
+from app.services.crawl_cache import crawl_cache
+from app.services.crawl_traps import PRUNE_FACET, TRAP_REASONS, UrlPatternGuard
+from app.services.duplicate_content import find_duplicate_content
+from app.services.page_features import PageFeatures, SelectorSet, extract_page_features
+from app.services.page_renderer import PageRenderer, make_renderer
+from app.services.link_checker import link_checker
+from app.services.link_graph import MAX_HEALTHY_CLICK_DEPTH, LinkGraphMetrics
+from app.services.resource_audit import ResourceAuditor
+from app.services.robots import robots_cache
+from app.services.screenshot_service import screenshot_service
+from app.services.site_crawler import FairScheduler, HostLimiter, PageCallback, SiteCrawler
+from app.services.url_canonicalizer import default_canonicalizer
+
+MAX_SUGGESTIONS = 7
+WEBHOOK_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+# Shown when the AI suggestion call fails
+FALLBACK_SUGGESTIONS = [
+    {
+        'priority': 'high',
+        'title': 'Improve Page Load Speed',
+        'description': 'Optimize images and minimize JavaScript to reduce load time.',
+        'impact': '15-20% improvement in user engagement'
+    },
+    {
+        'priority': 'high',
+        'title': 'Add Missing Meta Descriptions',
+        'description': 'Write unique, compelling meta descriptions for all pages.',
+        'impact': '10-15% increase in click-through rate'
+    },
+    {
+        'priority': 'medium',
+        'title': 'Enhance Mobile Responsiveness',
+        'description': 'Ensure all elements scale properly on mobile devices.',
+        'impact': '25% improvement in mobile user experience'
+    }
+]
+
 
 class SiteAuditService:
     def __init__(self):
         self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-
-    async def audit_website(self, url: str, depth: int = 5) -> Dict:
+        self._parse_executor: Optional[ProcessPoolExecutor] = None
+        self._parse_slots: Optional[asyncio.Semaphore] = None
+        # Deferred suggestion tasks, referenced so they are not garbage collected mid-run
+        self._suggestion_tasks: Set[asyncio.Task] = set()
+        # Shared by every bulk audit in this process
+        self._bulk_scheduler: Optional[FairScheduler] = None
+        self._bulk_sites: Optional[asyncio.Semaphore] = None
+
+    async def audit_website(
+        self,
+        url: str,
+        depth: int = 5,
+        bypass_cache: bool = False,
+        force_refresh: bool = False,
+        defer_suggestions: bool = False,
+        suggestions_webhook_url: Optional[str] = None,
+        host_limiter: Optional[HostLimiter] = None,
+        include_screenshot: bool = False,
+        render_mode: Optional[str] = None,
+        rule_pack: Optional[str] = None,
+    ) -> Dict:
         """
         Main entry point for website audit.
-        Returns comprehensive audit data.
+        Returns comprehensive audit data, served from the result cache when
+        the same site was audited recently.
+
+        With defer_suggestions, the scored audit is returned without waiting
+        for the AI suggestions; they are fetched later by suggestions_id
+        (and POSTed to suggestions_webhook_url, if given).
+
+        render_mode ('auto', 'always' or 'never') overrides
+        SITE_AUDIT_RENDER_MODE for loading pages in a headless browser.
+
+        rule_pack names a registered custom rule pack to score with on top
+        of the base rules; raises ValueError for an unknown pack.
+        """
+        rule_registry.get(rule_pack)  # fail fast on an unknown pack
+
+        async def run_audit() -> Dict:
+            return await self._run_audit(
+                url, depth, bypass_cache, defer_suggestions, suggestions_webhook_url, host_limiter,
+                include_screenshot, render_mode, rule_pack,
+            )
+
+        if not settings.AUDIT_CACHE_ENABLED:
+            return {**await run_audit(), 'from_cache': False}
+
+        key = audit_cache_key(url, depth, render_mode, rule_pack, defer_suggestions, include_screenshot)
+        if defer_suggestions and suggestions_webhook_url:
+            # Only the audit that defers the suggestions calls the webhook, so
+            # this request can't be served by a cached or in-flight audit
+            result = await run_audit()
+            await audit_result_cache.set(key, result)
+            return {**result, 'from_cache': False}
+
+        result, from_cache = await audit_result_cache.get_or_compute(
+            key,
+            run_audit,
+            # Re-downloading every page only makes sense with a fresh result
+            force_refresh=force_refresh or bypass_cache,
+        )
+        if from_cache:
+            result = await self._with_ready_suggestions(result)
+        return {**result, 'from_cache': from_cache}
+
+    async def _with_ready_suggestions(self, result: Dict) -> Dict:
+        if result.get('suggestions_status') == 'pending':
+            # Suggestions deferred by an earlier audit may be ready by now
+            deferred = await self.get_suggestions(result['suggestions_id'])
+            if deferred and deferred['status'] == 'ready':
+                result = {**result, 'suggestions': deferred['suggestions'], 'suggestions_status': 'ready'}
+        return result
+
+    async def bulk_audit(
+        self,
+        urls: List[str],
+        depth: int = 5,
+        bypass_cache: bool = False,
+        force_refresh: bool = False,
+        defer_suggestions: bool = False,
+        include_screenshot: bool = False,
+        render_mode: Optional[str] = None,
+        rule_pack: Optional[str] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Audit many sites at once, yielding each site's outcome as it finishes.
+
+        Every audit sends its requests (pages, robots.txt and sitemaps, link
+        checks and resource probes) through one shared FairScheduler, so
+        they are capped globally and per domain and domains take turns for
+        free slots.
+        At most SITE_AUDIT_BULK_CONCURRENT_SITES audits run at a time.
+        """
+        if self._bulk_scheduler is None:
+            self._bulk_scheduler = FairScheduler(
+                settings.SITE_AUDIT_BULK_GLOBAL_CONCURRENCY,
+                settings.SITE_AUDIT_CRAWL_PER_HOST,
+            )
+            self._bulk_sites = asyncio.Semaphore(settings.SITE_AUDIT_BULK_CONCURRENT_SITES)
+
+        async def audit_site(url: str) -> Dict:
+            async with self._bulk_sites:
+                try:
+                    key = audit_cache_key(url, depth, render_mode, rule_pack, defer_suggestions, include_screenshot)
+                    cached = None
+                    if settings.AUDIT_CACHE_ENABLED and not (force_refresh or bypass_cache):
+                        cached = await audit_result_cache.get(key)
+                    if cached is not None:
+                        result = {**await self._with_ready_suggestions(cached), 'from_cache': True}
+                    else:
+                        # Run in this task, not the cache's shared single-flight, so the
+                        # crawl uses the bulk scheduler and stops when the task is cancelled
+                        result = await self._run_audit(
+                            url, depth, bypass_cache, defer_suggestions, None, self._bulk_scheduler,
+                            include_screenshot, render_mode, rule_pack,
+                        )
+                        if settings.AUDIT_CACHE_ENABLED:
+                            await audit_result_cache.set(key, result)
+                        result = {**result, 'from_cache': False}
+                    return {'url': url, 'success': True, 'result': result}
+                except Exception as e:
+                    return {'url': url, 'success': False, 'error': str(e)}
+
+        # The same site listed twice is audited once
+        unique_urls = []
+        seen_keys = set()
+        for url in urls:
+            key = audit_cache_key(url, depth, render_mode, rule_pack, defer_suggestions, include_screenshot)
+            if key not in seen_keys:
+                seen_keys.add(key)
+                unique_urls.append(url)
+
+        tasks = [asyncio.create_task(audit_site(url)) for url in unique_urls]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # The client went away: stop the audits that have not finished
+            for task in tasks:
+                task.cancel()
+
+    async def stream_audit(
+        self,
+        url: str,
+        depth: int = 5,
+        bypass_cache: bool = False,
+        force_refresh: bool = False,
+        include_screenshot: bool = False,
+        render_mode: Optional[str] = None,
+        rule_pack: Optional[str] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Progress events for an audit, ending with a 'result' event that
+        carries the same payload audit_website() returns.
+        """
+        rule_registry.get(rule_pack)  # fail fast on an unknown pack
+        key = audit_cache_key(url, depth, render_mode, rule_pack, include_screenshot=include_screenshot)
+        if settings.AUDIT_CACHE_ENABLED and not (force_refresh or bypass_cache):
+            cached = await audit_result_cache.get(key)
+            if cached is not None:
+                yield {'event': 'result', 'data': {**cached, 'from_cache': True}}
+                return
+
+        async for event in self._audit_events(
+            url, depth, bypass_cache, include_screenshot=include_screenshot, render_mode=render_mode,
+            rule_pack=rule_pack,
+        ):
+            if event['event'] == 'result':
+                if settings.AUDIT_CACHE_ENABLED:
+                    await audit_result_cache.set(key, event['data'])
+                event = {'event': 'result', 'data': {**event['data'], 'from_cache': False}}
+            yield event
+
+    async def _run_audit(
+        self,
+        url: str,
+        depth: int,
+        bypass_cache: bool,
+        defer_suggestions: bool = False,
+        suggestions_webhook_url: Optional[str] = None,
+        host_limiter: Optional[HostLimiter] = None,
+        include_screenshot: bool = False,
+        render_mode: Optional[str] = None,
+        rule_pack: Optional[str] = None,
+    ) -> Dict:
+        """
+        Crawl, analyze and generate suggestions for a site.
+        """
+        async for event in self._audit_events(
+            url, depth, bypass_cache, defer_suggestions, suggestions_webhook_url, host_limiter,
+            include_screenshot, render_mode, rule_pack,
+        ):
+            if event['event'] == 'result':
+                return event['data']
+        raise Exception("Audit finished without a result")
+
+    async def _audit_events(
+        self,
+        url: str,
+        depth: int,
+        bypass_cache: bool,
+        defer_suggestions: bool = False,
+        suggestions_webhook_url: Optional[str] = None,
+        host_limiter: Optional[HostLimiter] = None,
+        include_screenshot: bool = False,
+        render_mode: Optional[str] = None,
+        rule_pack: Optional[str] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        The audit pipeline as a sequence of events: 'started', 'page' for
+        each fetched page, 'crawl_complete', one 'analysis' per analyzer as it finishes,
+        'scores', 'screenshot', one 'suggestion' per AI suggestion (unless
+        deferred) and finally 'result'.
         """
         start_time = time.time()
+        rules = rule_registry.get(rule_pack)
+        yield {'event': 'started', 'data': {'url': url, 'max_pages': depth}}
+
+        # The homepage screenshot renders in the browser pool while the crawl runs
+        screenshot_task = None
+        if include_screenshot and settings.SCREENSHOTS_ENABLED:
+            screenshot_task = asyncio.create_task(screenshot_service.capture(url))
 
         try:
-            # Crawl pages
-            pages = await self._crawl_pages(url, max_pages=depth)
+            # Snapshots of the last audit with the same settings: unchanged
+            # pages skip parsing, issues are diffed
+            site = default_canonicalizer.host(url)
+            scope = audit_scope(depth, render_mode, rule_pack)
+            snapshots = None
+            previous_audit = None
+            if settings.SITE_AUDIT_INCREMENTAL:
+                snapshots = await PageSnapshots.load(site, page_scope(render_mode), reuse=not bypass_cache)
+                previous_audit = await self._load_previous_audit(site, scope)
+
+            # Crawl pages, reporting each one as it arrives
+            fetched_pages: asyncio.Queue = asyncio.Queue()
+            crawl_task = asyncio.create_task(self._crawl_pages(
+                url, max_pages=depth, bypass_cache=bypass_cache,
+                on_page=fetched_pages.put_nowait, snapshots=snapshots, host_limiter=host_limiter,
+                renderer=make_renderer(render_mode), selectors=rules.selectors,
+            ))
+            crawl_task.add_done_callback(lambda _: fetched_pages.put_nowait(None))
+
+            try:
+                pages_fetched = 0
+                while (page := await fetched_pages.get()) is not None:
+                    pages_fetched += 1
+                    yield {'event': 'page', 'data': {
+                        'url': page['url'],
+                        'title': page.get('title'),
+                        'status_code': page['status'],
+                        'load_time_ms': page.get('load_time', 0),
+                        'depth': page['depth'],
+                        'pages_fetched': pages_fetched,
+                        'max_pages': depth,
+                    }}
+                pages, crawl_stats, link_graph = await crawl_task
+            finally:
+                # The consumer went away mid-crawl
+                crawl_task.cancel()
 
             if not pages:
                 raise Exception("Failed to fetch website content")
 
-            # Run analyses in parallel
-            seo_analysis_task = self._analyze_seo(pages, url)
-            design_analysis_task = self._analyze_design(url, pages)
-            content_analysis_task = self._analyze_content(pages)
+            link_graph_summary = link_graph.summary if link_graph else None
+            if link_graph is not None:
+                for page in pages:
+                    page['link_metrics'] = link_graph.for_page(default_canonicalizer.key(page['url']))
 
-            seo_analysis, design_analysis, content_analysis = await asyncio.gather(
-                seo_analysis_task,
-                design_analysis_task,
-                content_analysis_task
-            )
+            yield {'event': 'crawl_complete', 'data': {
+                'pages_analyzed': len(pages),
+                'crawl_stats': crawl_stats,
+                'link_graph': link_graph_summary,
+            }}
+
+            # Run analyses in parallel, reporting each as it finishes
+            async def run_analysis(category: str, analysis_task) -> Tuple[str, Dict]:
+                return category, await analysis_task
+
+            analyses: Dict[str, Dict] = {}
+            for finished in asyncio.as_completed([
+                run_analysis('seo', self._analyze_seo(
+                    pages, url, link_graph_summary, crawl_stats.get('url_patterns'), rules, host_limiter,
+                )),
+                run_analysis('design', self._analyze_design(url, pages, rules, host_limiter)),
+                run_analysis('content', self._analyze_content(pages, rules)),
+            ]):
+                category, analysis = await finished
+                analyses[category] = analysis
+                yield {'event': 'analysis', 'data': {'category': category, **analysis}}
+
+            seo_analysis = analyses['seo']
+            design_analysis = analyses['design']
+            content_analysis = analyses['content']
 
             # Calculate overall score
             overall_score = self._calculate_overall_score(
@@ -54,29 +367,104 @@ class SiteAuditService:
             critical_count = sum(1 for issue in all_issues if issue['severity'] == 'critical')
             warning_count = sum(1 for issue in all_issues if issue['severity'] == 'warning')
 
-            # Generate AI suggestions
-            suggestions = await self._generate_ai_suggestions({
+            yield {'event': 'scores', 'data': {
+                'overall_score': overall_score,
+                'seo_score': seo_analysis['score'],
+                'design_score': design_analysis['score'],
+                'content_score': content_analysis['score'],
+                'total_issues': len(all_issues),
+                'critical_issues': critical_count,
+                'warnings': warning_count,
+            }}
+
+            audit_data = {
                 'seo': seo_analysis,
                 'design': design_analysis,
                 'content': content_analysis,
                 'overall_score': overall_score
-            })
+            }
+            domain = urlparse(url).netloc
 
-            # Prepare page analysis
-            page_analyses = [
-                {
+            screenshot_url = None
+            if screenshot_task is not None:
+                screenshot_url = await screenshot_task
+                if screenshot_url:
+                    yield {'event': 'screenshot', 'data': {'screenshot_url': screenshot_url}}
+
+            issue_diff = None
+            previous_suggestions = None
+            if previous_audit is not None:
+                issue_diff = {
+                    'previous_analyzed_at': previous_audit['analyzed_at'],
+                    'previous_overall_score': previous_audit['overall_score'],
+                    **diff_issues(previous_audit['issues'], all_issues),
+                }
+                # With no new or resolved issues, the last audit's suggestions still apply
+                if not issue_diff['new_issues'] and not issue_diff['resolved_issues']:
+                    previous_suggestions = previous_audit['suggestions']
+                issue_diff['suggestions_reused'] = bool(previous_suggestions)
+
+            suggestions = []
+            suggestions_id = None
+            suggestions_status = None
+            if previous_suggestions:
+                suggestions = previous_suggestions
+                for suggestion in suggestions:
+                    yield {'event': 'suggestion', 'data': suggestion}
+                await self._save_snapshots(snapshots, scope, overall_score, all_issues, suggestions)
+            elif defer_suggestions:
+                await self._save_snapshots(snapshots, scope, overall_score, all_issues, None)
+                # Return the scores now; the AI call finishes in the background
+                suggestions_id = await self._defer_suggestions(
+                    audit_data, domain, suggestions_webhook_url, (site, scope) if snapshots else None
+                )
+                suggestions_status = 'pending'
+            else:
+                # Generate AI suggestions, passing each on as soon as it is complete
+                async for suggestion in self._stream_ai_suggestions(audit_data):
+                    suggestions.append(suggestion)
+                    yield {'event': 'suggestion', 'data': suggestion}
+                await self._save_snapshots(snapshots, scope, overall_score, all_issues, suggestions)
+
+            # Prepare page analysis, with per-page scores for every scored page
+            page_scores = {
+                entry['url']: {}
+                for entry in seo_analysis['page_scores']
+            }
+            for category, analysis in (('seo', seo_analysis), ('design', design_analysis), ('content', content_analysis)):
+                for entry in analysis['page_scores']:
+                    page_scores[entry['url']][category] = entry
+
+            page_analyses = []
+            for page in pages:
+                scores = page_scores.get(page['url'])
+                page_analysis = {
                     'url': page['url'],
                     'title': page.get('title'),
                     'status_code': page['status'],
-                    'load_time_ms': page.get('load_time', 0)
+                    'load_time_ms': page.get('load_time', 0),
+                    'timing': page.get('timing'),
+                    'page_weight_kb': round(page['page_weight_bytes'] / 1024, 1) if 'page_weight_bytes' in page else None,
+                    'render_blocking_resources': page.get('render_blocking'),
+                    'content_unchanged': page['unchanged'] if snapshots else None,
+                    'rendered': page['rendered'],
+                    **(page.get('link_metrics') or {}),
                 }
-                for page in pages
-            ]
+                if scores:
+                    page_analysis.update({
+                        'seo_score': scores['seo']['score'],
+                        'design_score': scores['design']['score'],
+                        'content_score': scores['content']['score'],
+                        'overall_score': self._calculate_overall_score(
+                            scores['seo']['score'], scores['design']['score'], scores['content']['score']
+                        ),
+                        'issues_count': sum(entry['issues'] for entry in scores.values()),
+                    })
+                page_analyses.append(page_analysis)
 
             duration = time.time() - start_time
-            domain = urlparse(url).netloc
 
-            return {
+            yield {'event': 'result', 'data': {
                 'success': True,
                 'domain': domain,
                 'pages_analyzed': len(pages),
@@ -92,13 +480,19 @@ class SiteAuditService:
                 'design_analysis': design_analysis,
                 'content_analysis': content_analysis,
                 'suggestions': suggestions,
-                'screenshot_url': None,  # Will be implemented with Playwright
+                'suggestions_id': suggestions_id,
+                'suggestions_status': suggestions_status,
+                'screenshot_url': screenshot_url,
                 'pages': page_analyses,
                 'lighthouse_score': design_analysis.get('lighthouse'),
                 'pagespeed_score': design_analysis.get('pagespeed'),
+                'issue_diff': issue_diff,
+                'crawl_stats': crawl_stats,
+                'link_graph': link_graph_summary,
+                'rule_set': rules.info,
                 'analyzed_at': datetime.now().isoformat(),
                 'analysis_duration_seconds': round(duration, 2)
-            }
+            }}
 
         except Exception as e:
             print(f"Error during audit: {e}")
@@ -106,341 +500,437 @@ class SiteAuditService:
             traceback.print_exc()
             raise
 
-    async def _crawl_pages(self, start_url: str, max_pages: int = 5) -> List[Dict]:
+        finally:
+            if screenshot_task is not None:
+                screenshot_task.cancel()
+
+    async def _crawl_pages(
+        self,
+        start_url: str,
+        max_pages: int = 5,
+        bypass_cache: bool = False,
+        on_page: Optional[PageCallback] = None,
+        snapshots: Optional[PageSnapshots] = None,
+        host_limiter: Optional[HostLimiter] = None,
+        renderer: Optional[PageRenderer] = None,
+        selectors: Optional[SelectorSet] = None,
+    ) -> Tuple[List[Dict], Dict, Optional[LinkGraphMetrics]]:
         """
         Crawl website pages starting from the homepage.
+        Returns compact page summaries, crawl statistics and internal
+        link graph metrics.
+        With bypass_cache, every page is downloaded fresh (and re-cached).
+        on_page is called with each page as soon as it is fetched.
+        Pages unchanged since their snapshot are not parsed again.
+        host_limiter replaces the crawl's own per-host limits (bulk audits).
+        With a renderer, app-shell pages are analyzed on their rendered DOM.
+        selectors (a rule pack's custom selectors) are counted while parsing.
+        """
+        max_pages = min(max_pages, settings.SITE_AUDIT_MAX_PAGES)
+        session = await crawler_client.get_session()
+        crawler = SiteCrawler(
+            session,
+            max_pages=max_pages,
+            concurrency=settings.SITE_AUDIT_CRAWL_CONCURRENCY,
+            per_host_limit=settings.SITE_AUDIT_CRAWL_PER_HOST,
+            extract_features=self._extract_features,
+            memory_budget_bytes=settings.SITE_AUDIT_MEMORY_BUDGET_MB * 1024 * 1024,
+            max_page_bytes=settings.SITE_AUDIT_MAX_PAGE_BYTES,
+            # When only the homepage is scored, other pages just need their head
+            head_only_when_saturated=not settings.SITE_AUDIT_SCORE_ALL_PAGES,
+            cache=crawl_cache if settings.CRAWL_CACHE_ENABLED else None,
+            cache_read=not bypass_cache,
+            robots=robots_cache if settings.SITE_AUDIT_RESPECT_ROBOTS else None,
+            on_page=on_page,
+            snapshots=snapshots,
+            host_limiter=host_limiter,
+            renderer=renderer,
+            url_guard=self._url_guard(max_pages) if settings.SITE_AUDIT_URL_PATTERN_GUARD else None,
+            selectors=selectors,
+        )
+        pages = await crawler.crawl(start_url)
+        # Vectorized, but large graphs still take a noticeable fraction of a second
+        link_graph = await asyncio.to_thread(crawler.link_graph.analyze, default_canonicalizer.key(start_url))
+        return pages, crawler.stats, link_graph
+
+    @staticmethod
+    def _url_guard(max_pages: int) -> UrlPatternGuard:
+        return UrlPatternGuard(
+            max_pattern_urls=max(
+                settings.SITE_AUDIT_PATTERN_MIN_URLS, int(max_pages * settings.SITE_AUDIT_PATTERN_MAX_SHARE)
+            ),
+            max_query_urls=settings.SITE_AUDIT_QUERY_PATTERN_MAX_URLS,
+        )
+
+    def _get_parse_executor(self) -> Optional[ProcessPoolExecutor]:
+        # Daemonic processes (Celery's prefork pool children) may not start
+        # children of their own, so parse on the thread pool there instead
+        if multiprocessing.current_process().daemon:
+            return None
+        if self._parse_executor is None and settings.SITE_AUDIT_PARSE_WORKERS > 0:
+            self._parse_executor = ProcessPoolExecutor(max_workers=settings.SITE_AUDIT_PARSE_WORKERS)
+        return self._parse_executor
+
+    async def _extract_features(
+        self,
+        body: bytes,
+        url: str,
+        encoding: Optional[str],
+        selectors: Optional[SelectorSet] = None,
+    ) -> PageFeatures:
         """
-        pages = []
-        visited = set()
-        to_visit = [start_url]
-        base_domain = urlparse(start_url).netloc
+        Parse a fetched page off the event loop.
 
-        # Create SSL context with certifi certificates
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
+        HTML parsing is pure CPU work, so it runs in a process pool and only
+        the picklable PageFeatures record comes back. The semaphore bounds how
+        many pages are queued for the pool at once, across all audits.
+        """
+        if self._parse_slots is None:
+            self._parse_slots = asyncio.Semaphore(settings.SITE_AUDIT_PARSE_QUEUE_SIZE)
 
-        # Headers to mimic a real browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
+        async with self._parse_slots:
+            loop = asyncio.get_running_loop()
+            # With no parse workers configured, fall back to the default thread pool
+            executor = self._get_parse_executor()
+            try:
+                return await loop.run_in_executor(executor, extract_page_features, body, url, encoding, selectors)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed on a huge page); start a fresh pool next time
+                self._parse_executor = None
+                raise
+
+    def shutdown(self):
+        """Release the parse worker processes and the crawl cache."""
+        crawl_cache.close()
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown(wait=False, cancel_futures=True)
+            self._parse_executor = None
+
+    def _pages_to_score(self, pages: List[Dict]) -> List[Dict]:
+        """Every crawled page, or just the homepage when site-wide scoring is off."""
+        return pages if settings.SITE_AUDIT_SCORE_ALL_PAGES else pages[:1]
+
+    async def _analyze_seo(
+        self,
+        pages: List[Dict],
+        base_url: str,
+        link_graph: Optional[Dict] = None,
+        url_patterns: Optional[Dict] = None,
+        rules: Optional[CompiledRules] = None,
+        host_limiter: Optional[HostLimiter] = None,
+    ) -> Dict:
+        """
+        Analyze SEO aspects of every crawled page and roll them up site-wide,
+        including the internal link structure when link_graph is given and
+        the crawl traps / URL patterns pruned during the crawl.
+        Pages are scored by `rules` (default: the base rule set).
+        """
+        rules = rules or rule_registry.get()
+        scored = self._pages_to_score(pages)
+        results = [self._score_seo(page, rules) for page in scored]
+        analysis = self._aggregate_results(results, scored)
+
+        titles = [page['features'].title for page in scored]
+        descriptions = [page['features'].meta_description for page in scored]
+        h1_distribution = {'0': 0, '1': 0, '2+': 0}
+        for page in scored:
+            h1_count = page['features'].h1_count
+            h1_distribution['0' if h1_count == 0 else '1' if h1_count == 1 else '2+'] += 1
+
+        analysis['details']['site'] = {
+            'pages_missing_title_pct': self._percent(sum(1 for t in titles if not (t and t.strip())), len(scored)),
+            'pages_missing_meta_description_pct': self._percent(sum(1 for d in descriptions if not d), len(scored)),
+            'pages_missing_canonical_pct': self._percent(
+                sum(1 for page in scored if not page['features'].has_canonical), len(scored)
+            ),
+            'h1_distribution': h1_distribution,
+            'duplicate_titles': self._find_duplicates(titles, scored),
+            'duplicate_meta_descriptions': self._find_duplicates(descriptions, scored),
         }
 
-        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
-            while to_visit and len(pages) < max_pages:
-                url = to_visit.pop(0)
-
-                if url in visited:
-                    continue
+        duplicate_titles = analysis['details']['site']['duplicate_titles']
+        if duplicate_titles:
+            analysis['issues'].append({
+                'severity': 'warning',
+                'category': 'seo',
+                'title': 'Duplicate Title Tags',
+                'description': f'{len(duplicate_titles)} title(s) are shared by more than one page. Each page should have a unique title.',
+                'pages_affected': sum(len(group['urls']) for group in duplicate_titles)
+            })
 
-                visited.add(url)
+        duplicate_descriptions = analysis['details']['site']['duplicate_meta_descriptions']
+        if duplicate_descriptions:
+            analysis['issues'].append({
+                'severity': 'info',
+                'category': 'seo',
+                'title': 'Duplicate Meta Descriptions',
+                'description': f'{len(duplicate_descriptions)} meta description(s) are shared by more than one page. Write a unique description for each page.',
+                'pages_affected': sum(len(group['urls']) for group in duplicate_descriptions)
+            })
 
-                try:
-                    start_time = time.time()
-                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=15), allow_redirects=True) as response:
-                        load_time = (time.time() - start_time) * 1000
-
-                        # Accept 200 and 403 (some sites return 403 but still have content)
-                        if response.status in [200, 403]:
-                            html = await response.text()
-                            soup = BeautifulSoup(html, 'html.parser')
-
-                            # Extract title
-                            title = soup.find('title')
-                            title_text = title.get_text() if title else None
-
-                            pages.append({
-                                'url': url,
-                                'html': html,
-                                'soup': soup,
-                                'status': response.status,
-                                'title': title_text,
-                                'load_time': load_time
-                            })
-
-                            # Extract links for further crawling (only if we need more pages)
-                            if len(pages) < max_pages:
-                                for link in soup.find_all('a', href=True):
-                                    href = link['href']
-                                    absolute_url = urljoin(url, href)
-                                    link_domain = urlparse(absolute_url).netloc
-
-                                    # Only crawl same domain
-                                    if link_domain == base_domain and absolute_url not in visited:
-                                        to_visit.append(absolute_url)
+        if link_graph is not None:
+            analysis['issues'].extend(self._link_graph_issues(link_graph))
 
-                except Exception as e:
-                    print(f"Error crawling {url}: {e}")
-                    continue
+        if url_patterns and url_patterns['pruned_patterns_count']:
+            analysis['details']['url_patterns'] = url_patterns
+            analysis['issues'].extend(self._url_pattern_issues(url_patterns))
 
-        return pages
+        if settings.SITE_AUDIT_LINK_CHECK_ENABLED:
+            links = await self._check_links(pages, base_url, host_limiter)
+            analysis['details']['links'] = links
+            analysis['issues'].extend(self._link_issues(links))
+        return analysis
 
-    async def _analyze_seo(self, pages: List[Dict], base_url: str) -> Dict:
-        """
-        Analyze SEO aspects of the website.
-        """
-        score = 0
+    def _link_graph_issues(self, link_graph: Dict) -> List[Dict]:
         issues = []
-
-        # Analyze first page (homepage) primarily
-        main_page = pages[0]
-        soup = main_page['soup']
-
-        # Title tag (15 points)
-        title = soup.find('title')
-        if title and title.get_text().strip():
-            title_text = title.get_text().strip()
-            if 30 <= len(title_text) <= 60:
-                score += 15
-            else:
-                score += 10
-                issues.append({
-                    'severity': 'warning',
-                    'category': 'seo',
-                    'title': 'Title Length Not Optimal',
-                    'description': f'Title is {len(title_text)} characters. Optimal length is 30-60 characters.'
-                })
-        else:
+        if link_graph['orphan_pages_count']:
             issues.append({
-                'severity': 'critical',
+                'severity': 'warning',
                 'category': 'seo',
-                'title': 'Missing Title Tag',
-                'description': 'Every page should have a unique, descriptive title tag.'
+                'title': 'Orphan Pages',
+                'description': f"{link_graph['orphan_pages_count']} page(s) are not linked from any other crawled page (reached only through the sitemap), e.g. {link_graph['orphan_pages'][0]}. Link to them from related pages.",
+                'pages_affected': link_graph['orphan_pages_count']
             })
 
-        # Meta description (10 points)
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            desc_text = meta_desc['content']
-            if 120 <= len(desc_text) <= 160:
-                score += 10
-            else:
-                score += 5
-                issues.append({
-                    'severity': 'warning',
-                    'category': 'seo',
-                    'title': 'Meta Description Length Not Optimal',
-                    'description': f'Meta description is {len(desc_text)} characters. Optimal length is 120-160 characters.'
-                })
-        else:
+        if link_graph['deep_pages_count']:
             issues.append({
-                'severity': 'critical',
+                'severity': 'info',
                 'category': 'seo',
-                'title': 'Missing Meta Description',
-                'description': 'Meta descriptions help search engines understand page content.'
+                'title': 'Deeply Buried Pages',
+                'description': f"{link_graph['deep_pages_count']} page(s) are more than {MAX_HEALTHY_CLICK_DEPTH} clicks from the homepage (up to {link_graph['max_click_depth']}). Flatten the navigation or add hub pages.",
+                'pages_affected': link_graph['deep_pages_count']
             })
 
-        # H1 tag (10 points)
-        h1_tags = soup.find_all('h1')
-        if len(h1_tags) == 1:
-            score += 10
-        elif len(h1_tags) == 0:
+        # A one-page crawl has no internal structure to speak of
+        if link_graph['dead_end_pages_count'] and link_graph['pages'] > 1:
             issues.append({
-                'severity': 'critical',
-                'category': 'seo',
-                'title': 'Missing H1 Tag',
-                'description': 'Every page should have exactly one H1 tag describing the main content.'
-            })
-        else:
-            score += 5
-            issues.append({
-                'severity': 'warning',
+                'severity': 'info',
                 'category': 'seo',
-                'title': 'Multiple H1 Tags',
-                'description': f'Found {len(h1_tags)} H1 tags. Best practice is to have exactly one H1 per page.'
+                'title': 'Dead-End Pages',
+                'description': f"{link_graph['dead_end_pages_count']} page(s) link to no other page on the site, e.g. {link_graph['dead_end_pages'][0]}.",
+                'pages_affected': link_graph['dead_end_pages_count']
             })
+        return issues
 
-        # Heading hierarchy (10 points)
-        h2_tags = soup.find_all('h2')
-        h3_tags = soup.find_all('h3')
-        if h2_tags:
-            score += 10
-        else:
+    def _url_pattern_issues(self, url_patterns: Dict) -> List[Dict]:
+        issues = []
+        patterns = url_patterns['pruned_patterns']
+        by_reason = url_patterns['by_reason']
+        traps = [entry for entry in patterns if entry['reason'] in TRAP_REASONS]
+        trap_patterns = sum(by_reason[reason]['patterns'] for reason in TRAP_REASONS if reason in by_reason)
+        if trap_patterns:
             issues.append({
                 'severity': 'warning',
                 'category': 'seo',
-                'title': 'Poor Heading Structure',
-                'description': 'Use H2-H6 tags to create a clear content hierarchy.'
+                'title': 'Crawl Traps',
+                'description': f"{trap_patterns} URL pattern(s) generate endlessly nested or repeating paths, e.g. {traps[0]['example']}. Fix the relative links or block the pattern in robots.txt.",
+                'pages_affected': sum(by_reason[reason]['urls_pruned'] for reason in TRAP_REASONS if reason in by_reason)
             })
 
-        # Image alt tags (15 points)
-        images = soup.find_all('img')
-        if images:
-            images_with_alt = [img for img in images if img.get('alt')]
-            alt_percentage = (len(images_with_alt) / len(images)) * 100
-
-            if alt_percentage == 100:
-                score += 15
-            elif alt_percentage >= 80:
-                score += 10
-            elif alt_percentage >= 50:
-                score += 5
-
-            if alt_percentage < 100:
-                issues.append({
-                    'severity': 'warning' if alt_percentage >= 50 else 'critical',
-                    'category': 'seo',
-                    'title': 'Missing Image Alt Text',
-                    'description': f'Only {alt_percentage:.0f}% of images have alt text. All images should have descriptive alt attributes.'
-                })
-        else:
-            score += 15  # No images, so no issue
-
-        # OpenGraph tags (10 points)
-        og_tags = soup.find_all('meta', attrs={'property': re.compile(r'^og:')})
-        if len(og_tags) >= 4:  # og:title, og:description, og:image, og:url
-            score += 10
-        elif len(og_tags) > 0:
-            score += 5
+        # Path templates over their share are only budget spreading; query facets are the problem
+        facets = [entry for entry in patterns if entry['reason'] == PRUNE_FACET]
+        if PRUNE_FACET in by_reason:
             issues.append({
                 'severity': 'info',
                 'category': 'seo',
-                'title': 'Incomplete OpenGraph Tags',
-                'description': 'Add more OpenGraph tags for better social media sharing.'
+                'title': 'Faceted and Parameterized URLs',
+                'description': f"{by_reason[PRUNE_FACET]['patterns']} page(s) have many filter, sort or pagination URL variants, e.g. {facets[0]['pattern']}. Point the variants at a canonical URL or keep crawlers out of the parameter combinations.",
+                'pages_affected': by_reason[PRUNE_FACET]['urls_pruned']
             })
-        else:
+        return issues
+
+    async def _check_links(
+        self,
+        pages: List[Dict],
+        base_url: str,
+        host_limiter: Optional[HostLimiter] = None,
+    ) -> Dict:
+        """
+        Check every link on the crawled pages once (recently checked links
+        come from cache) and report broken links and redirects.
+        host_limiter replaces the per-host limits (bulk audits).
+        """
+        session = await crawler_client.get_session()
+        return await link_checker.check(
+            session,
+            pages,
+            default_canonicalizer.host(base_url),
+            concurrency=settings.SITE_AUDIT_LINK_CHECK_CONCURRENCY,
+            per_host_limit=settings.SITE_AUDIT_CRAWL_PER_HOST,
+            timeout=settings.SITE_AUDIT_LINK_CHECK_TIMEOUT,
+            max_links=settings.SITE_AUDIT_LINK_CHECK_MAX,
+            host_limiter=host_limiter,
+        )
+
+    def _link_issues(self, links: Dict) -> List[Dict]:
+        issues = []
+        if links['broken_internal_count']:
+            example = links['broken_internal'][0]
             issues.append({
-                'severity': 'warning',
+                'severity': 'critical',
                 'category': 'seo',
-                'title': 'Missing OpenGraph Tags',
-                'description': 'OpenGraph tags improve how your site appears when shared on social media.'
+                'title': 'Broken Internal Links',
+                'description': f"{links['broken_internal_count']} internal link(s) lead to errors, e.g. {example['url']} ({example['status'] or example['error']}). Fix or remove them.",
+                'pages_affected': links['pages_with_broken_internal']
             })
 
-        # Structured data (10 points)
-        json_ld = soup.find_all('script', attrs={'type': 'application/ld+json'})
-        if json_ld:
-            score += 10
-        else:
+        if links['broken_external_count']:
+            example = links['broken_external'][0]
             issues.append({
-                'severity': 'info',
+                'severity': 'warning',
                 'category': 'seo',
-                'title': 'No Structured Data',
-                'description': 'Implement schema.org structured data to help search engines understand your content.'
+                'title': 'Broken External Links',
+                'description': f"{links['broken_external_count']} outbound link(s) no longer resolve, e.g. {example['url']} ({example['status'] or example['error']})."
             })
 
-        # Canonical URL (5 points)
-        canonical = soup.find('link', attrs={'rel': 'canonical'})
-        if canonical:
-            score += 5
-        else:
+        if links['redirect_chains_count']:
+            longest = links['redirect_chains'][0]
             issues.append({
-                'severity': 'info',
+                'severity': 'warning',
                 'category': 'seo',
-                'title': 'Missing Canonical URL',
-                'description': 'Canonical tags prevent duplicate content issues.'
+                'title': 'Redirect Chains',
+                'description': f"{links['redirect_chains_count']} internal link(s) pass through several redirects (up to {longest['hops']}). Link straight to the final URL."
             })
-
-        # Mobile viewport (5 points)
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        if viewport:
-            score += 5
-        else:
+        elif links['internal_redirects_count']:
             issues.append({
-                'severity': 'warning',
+                'severity': 'info',
                 'category': 'seo',
-                'title': 'Missing Viewport Meta Tag',
-                'description': 'Add viewport meta tag for mobile responsiveness.'
+                'title': 'Internal Links to Redirects',
+                'description': f"{links['internal_redirects_count']} internal link(s) point at a URL that redirects. Update them to the final URL."
             })
+        return issues
+
+    def _score_seo(self, page: Dict, rules: CompiledRules) -> Dict:
+        """
+        Score the SEO aspects of a single page.
+        """
+        result = rules.evaluate('seo', page)
+        features = page['features']
 
         return {
-            'score': min(score, 100),
-            'issues': issues,
+            **result,
             'details': {
-                'title_tag': title.get_text() if title else None,
-                'meta_description': meta_desc['content'] if meta_desc else None,
-                'h1_count': len(h1_tags),
-                'images_total': len(images) if images else 0,
-                'images_with_alt': len(images_with_alt) if images else 0,
-                'og_tags_count': len(og_tags),
-                'has_structured_data': len(json_ld) > 0
+                'title_tag': features.title,
+                'meta_description': features.meta_description,
+                'h1_count': features.h1_count,
+                'images_total': features.images_total,
+                'images_with_alt': features.images_with_alt,
+                'og_tags_count': features.og_tags_count,
+                'has_structured_data': features.json_ld_count > 0
             }
         }
 
-    async def _analyze_design(self, url: str, pages: List[Dict]) -> Dict:
+    async def _analyze_design(
+        self,
+        url: str,
+        pages: List[Dict],
+        rules: Optional[CompiledRules] = None,
+        host_limiter: Optional[HostLimiter] = None,
+    ) -> Dict:
         """
-        Analyze design and performance aspects.
+        Analyze design and performance aspects of every crawled page.
         """
-        score = 0
+        rules = rules or rule_registry.get()
+        scored = self._pages_to_score(pages)
+        results = [self._score_design(page, rules) for page in scored]
+        analysis = self._aggregate_results(results, scored)
+        analysis['lighthouse'] = results[0]['lighthouse']
+        analysis['pagespeed'] = results[0]['pagespeed']
+
+        load_times = [page.get('load_time', 0) for page in scored]
+        ttfbs = [(page.get('timing') or {}).get('ttfb_ms', page.get('load_time', 0)) for page in scored]
+        slowest = sorted(scored, key=lambda page: page.get('load_time', 0), reverse=True)[:5]
+        analysis['details']['site'] = {
+            'avg_load_time_ms': round(sum(load_times) / len(load_times), 1),
+            'max_load_time_ms': round(max(load_times), 1),
+            'avg_ttfb_ms': round(sum(ttfbs) / len(ttfbs), 1),
+            'max_ttfb_ms': round(max(ttfbs), 1),
+            'slowest_pages': [
+                {'url': page['url'], 'load_time_ms': round(page.get('load_time', 0), 1)} for page in slowest
+            ],
+            'pages_not_mobile_responsive_pct': self._percent(
+                sum(1 for page in scored if not page['features'].has_viewport), len(scored)
+            ),
+        }
+
+        if settings.SITE_AUDIT_RESOURCES_ENABLED:
+            resources = await self._audit_resources(scored, host_limiter)
+            analysis['details']['resources'] = resources
+            analysis['issues'].extend(self._resource_issues(resources, len(scored)))
+        return analysis
+
+    async def _audit_resources(self, pages: List[Dict], host_limiter: Optional[HostLimiter] = None) -> Dict:
+        """
+        Probe the CSS, JavaScript, fonts and images of the given pages (each
+        unique URL once) and report page weight and render-blocking resources.
+        host_limiter replaces the per-host limits (bulk audits).
+        """
+        session = await crawler_client.get_session()
+        auditor = ResourceAuditor(
+            session,
+            concurrency=settings.SITE_AUDIT_RESOURCE_CONCURRENCY,
+            per_host_limit=settings.SITE_AUDIT_CRAWL_PER_HOST,
+            timeout=settings.SITE_AUDIT_RESOURCE_TIMEOUT,
+            max_resources=settings.SITE_AUDIT_RESOURCE_MAX,
+            host_limiter=host_limiter,
+        )
+        return await auditor.audit(pages)
+
+    def _resource_issues(self, resources: Dict, page_count: int) -> List[Dict]:
         issues = []
+        if resources['broken_count']:
+            issues.append({
+                'severity': 'warning',
+                'category': 'design',
+                'title': 'Broken Page Resources',
+                'description': f"{resources['broken_count']} CSS, JavaScript, font or image file(s) fail to load, e.g. {resources['broken'][0]['url']}."
+            })
 
-        main_page = pages[0]
-        soup = main_page['soup']
+        if resources['avg_page_weight_kb'] > 2500:
+            issues.append({
+                'severity': 'warning',
+                'category': 'design',
+                'title': 'Heavy Pages',
+                'description': f"Pages weigh {resources['avg_page_weight_kb'] / 1024:.1f} MB on average. Compress images and trim scripts to stay under 2.5 MB."
+            })
 
-        # Mobile responsive (20 points)
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        if viewport:
-            score += 20
-        else:
+        blocking = resources['render_blocking']
+        if blocking['avg_per_page'] >= 3:
             issues.append({
-                'severity': 'critical',
+                'severity': 'warning' if blocking['avg_per_page'] >= 6 else 'info',
                 'category': 'design',
-                'title': 'Not Mobile Responsive',
-                'description': 'Add viewport meta tag and ensure responsive design for mobile devices.'
+                'title': 'Render-Blocking Resources',
+                'description': f"Pages load {blocking['avg_per_page']} stylesheets and synchronous scripts in <head> before they can render. Defer scripts and inline critical CSS.",
+                'pages_affected': blocking['pages_with_blocking']
             })
 
-        # Load time (20 points)
-        load_time = main_page.get('load_time', 0)
-        if load_time < 1000:  # < 1 second
-            score += 20
-        elif load_time < 3000:  # < 3 seconds
-            score += 15
-        elif load_time < 5000:  # < 5 seconds
-            score += 10
-        else:
+        if resources['uncompressed_count']:
             issues.append({
                 'severity': 'warning',
                 'category': 'design',
-                'title': 'Slow Page Load Time',
-                'description': f'Page loads in {load_time/1000:.2f} seconds. Aim for under 3 seconds.'
+                'title': 'Uncompressed Text Resources',
+                'description': f"{resources['uncompressed_count']} CSS/JavaScript file(s) are served without gzip or Brotli compression."
             })
 
-        # CSS Framework detection (5 points)
-        has_css = soup.find('link', attrs={'rel': 'stylesheet'}) or soup.find('style')
-        if has_css:
-            score += 5
-
-        # Font readability (5 points)
-        # Check if custom fonts are loaded
-        font_links = soup.find_all('link', attrs={'href': re.compile(r'font')})
-        if font_links or soup.find('style', text=re.compile(r'@font-face')):
-            score += 5
-
-        # Images optimization check (10 points)
-        images = soup.find_all('img')
-        if images:
-            # Check for lazy loading
-            lazy_images = [img for img in images if img.get('loading') == 'lazy']
-            if len(lazy_images) > 0:
-                score += 5
-
-            # Check for responsive images
-            responsive_images = [img for img in images if img.get('srcset')]
-            if len(responsive_images) > 0:
-                score += 5
-
-            if len(lazy_images) == 0 and len(images) > 3:
-                issues.append({
-                    'severity': 'info',
-                    'category': 'design',
-                    'title': 'Images Not Lazy Loaded',
-                    'description': 'Implement lazy loading for images to improve initial page load.'
-                })
-
-        # Color contrast (placeholder - would need more complex analysis)
-        score += 10
-
-        # Accessibility features (10 points)
-        # Check for aria labels
-        aria_elements = soup.find_all(attrs={'aria-label': True})
-        if aria_elements:
-            score += 10
-        else:
+        if resources['short_cache_count']:
             issues.append({
                 'severity': 'info',
                 'category': 'design',
-                'title': 'Limited Accessibility Features',
-                'description': 'Add ARIA labels and improve accessibility for screen readers.'
+                'title': 'Short Cache Lifetimes',
+                'description': f"{resources['short_cache_count']} resource(s) are cached for less than a week. Serve static assets with a long Cache-Control max-age."
             })
+        return issues
+
+    def _score_design(self, page: Dict, rules: CompiledRules) -> Dict:
+        """
+        Score the design and performance aspects of a single page.
+        """
+        result = rules.evaluate('design', page)
+        features = page['features']
+        load_time = page.get('load_time', 0)
+        timing = page.get('timing') or {}
+        ttfb = timing.get('ttfb_ms', load_time)
+        size_kb = page.get('size_bytes', 0) / 1024
 
         # Try to call Google PageSpeed Insights (optional)
         lighthouse_score = None
@@ -450,167 +940,132 @@ class SiteAuditService:
         # For now, we'll use placeholder data
 
         return {
-            'score': min(score, 100),
-            'issues': issues,
+            **result,
             'lighthouse': lighthouse_score,
             'pagespeed': pagespeed_score,
             'details': {
                 'load_time_ms': load_time,
-                'is_mobile_responsive': viewport is not None,
-                'has_custom_fonts': len(font_links) > 0 if font_links else False,
-                'images_lazy_loaded': len(lazy_images) if images else 0,
-                'total_images': len(images) if images else 0
+                'ttfb_ms': ttfb,
+                'html_size_kb': round(size_kb, 1),
+                'is_mobile_responsive': features.has_viewport,
+                'has_custom_fonts': features.font_links_count > 0,
+                'images_lazy_loaded': features.images_lazy,
+                'total_images': features.images_total
             }
         }
 
-    async def _analyze_content(self, pages: List[Dict]) -> Dict:
+    async def _analyze_content(self, pages: List[Dict], rules: Optional[CompiledRules] = None) -> Dict:
         """
-        Analyze content quality and structure.
+        Analyze content quality and structure of every crawled page.
         """
-        score = 0
-        issues = []
+        rules = rules or rule_registry.get()
+        scored = self._pages_to_score(pages)
+        results = [self._score_content(page, rules) for page in scored]
+        analysis = self._aggregate_results(results, scored)
+
+        word_counts = [page['features'].word_count for page in scored]
+        analysis['details']['site'] = {
+            'avg_word_count': round(sum(word_counts) / len(word_counts)),
+            'thin_pages': sum(1 for count in word_counts if count < 300),
+            'pages_without_cta_pct': self._percent(
+                sum(1 for page in scored if not page['features'].has_cta), len(scored)
+            ),
+            'duplicate_content': find_duplicate_content(scored),
+        }
 
-        main_page = pages[0]
-        soup = main_page['soup']
-
-        # Extract main content text
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer"]):
-            script.decompose()
-
-        text = soup.get_text()
-        # Clean up text
-        lines = (line.strip() for line in text.splitlines())
-        text = ' '.join(line for line in lines if line)
-
-        word_count = len(text.split())
-
-        # Content length (20 points)
-        if word_count >= 300:
-            score += 20
-        elif word_count >= 200:
-            score += 15
-        elif word_count >= 100:
-            score += 10
-        else:
-            issues.append({
+        duplicates = analysis['details']['site']['duplicate_content']
+        if duplicates['exact_duplicate_clusters_count']:
+            analysis['issues'].append({
                 'severity': 'warning',
                 'category': 'content',
-                'title': 'Insufficient Content',
-                'description': f'Page has only {word_count} words. Aim for at least 300 words of quality content.'
+                'title': 'Duplicate Content',
+                'description': f"{duplicates['exact_duplicate_pages']} pages share identical text in {duplicates['exact_duplicate_clusters_count']} group(s). Merge them or point them to one canonical URL.",
+                'pages_affected': duplicates['exact_duplicate_pages']
             })
-
-        # Readability (20 points - simplified Flesch-Kincaid)
-        sentences = text.split('.')
-        sentence_count = len([s for s in sentences if s.strip()])
-
-        if sentence_count > 0:
-            avg_words_per_sentence = word_count / sentence_count
-
-            if avg_words_per_sentence <= 20:  # Good readability
-                score += 20
-            elif avg_words_per_sentence <= 25:
-                score += 15
-            elif avg_words_per_sentence <= 30:
-                score += 10
-            else:
-                issues.append({
-                    'severity': 'warning',
-                    'category': 'content',
-                    'title': 'Poor Readability',
-                    'description': f'Average sentence length is {avg_words_per_sentence:.1f} words. Aim for 15-20 words per sentence.'
-                })
-
-        # Paragraph structure (10 points)
-        paragraphs = soup.find_all('p')
-        if len(paragraphs) >= 3:
-            score += 10
-        else:
-            issues.append({
+        if duplicates['near_duplicate_clusters_count']:
+            analysis['issues'].append({
                 'severity': 'info',
                 'category': 'content',
-                'title': 'Limited Content Structure',
-                'description': 'Break content into more paragraphs for better readability.'
-            })
-
-        # Internal links (15 points)
-        base_domain = urlparse(pages[0]['url']).netloc
-        all_links = soup.find_all('a', href=True)
-        internal_links = [link for link in all_links if base_domain in link.get('href', '')]
-
-        if len(internal_links) >= 5:
-            score += 15
-        elif len(internal_links) >= 3:
-            score += 10
-        elif len(internal_links) >= 1:
-            score += 5
-        else:
-            issues.append({
-                'severity': 'warning',
-                'category': 'content',
-                'title': 'Insufficient Internal Linking',
-                'description': 'Add more internal links to help users and search engines navigate your site.'
+                'title': 'Near-Duplicate Pages',
+                'description': f"{duplicates['near_duplicate_pages']} pages are nearly identical to another page in {duplicates['near_duplicate_clusters_count']} group(s). Make each page's content distinct.",
+                'pages_affected': duplicates['near_duplicate_pages']
             })
+        return analysis
 
-        # External links (5 points)
-        external_links = [link for link in all_links if base_domain not in link.get('href', '') and link.get('href', '').startswith('http')]
-        if len(external_links) >= 2:
-            score += 5
-
-        # Headings for content structure (10 points)
-        h2_tags = soup.find_all('h2')
-        if len(h2_tags) >= 2:
-            score += 10
-        elif len(h2_tags) >= 1:
-            score += 5
-        else:
-            issues.append({
-                'severity': 'warning',
-                'category': 'content',
-                'title': 'Missing Content Headings',
-                'description': 'Use H2 tags to structure your content and improve scannability.'
-            })
+    def _score_content(self, page: Dict, rules: CompiledRules) -> Dict:
+        """
+        Score the content quality and structure of a single page.
+        """
+        result = rules.evaluate('content', page)
+        features = page['features']
 
-        # Call to action (10 points)
-        cta_keywords = ['contact', 'buy', 'shop', 'subscribe', 'sign up', 'get started', 'learn more']
-        buttons = soup.find_all(['button', 'a'])
-        has_cta = any(any(keyword in btn.get_text().lower() for keyword in cta_keywords) for btn in buttons)
+        return {
+            **result,
+            'details': {
+                # Word and sentence counts exclude script, style, nav and footer text
+                'word_count': features.word_count,
+                'sentence_count': features.sentence_count,
+                'paragraph_count': features.paragraph_count,
+                'internal_links': features.internal_links,
+                'external_links': features.external_links,
+                'has_cta': features.has_cta
+            }
+        }
 
-        if has_cta:
-            score += 10
-        else:
-            issues.append({
-                'severity': 'info',
-                'category': 'content',
-                'title': 'No Clear Call-to-Action',
-                'description': 'Add clear calls-to-action to guide users toward conversion.'
-            })
+    def _aggregate_results(self, results: List[Dict], pages: List[Dict]) -> Dict:
+        """
+        Roll per-page results up into one site-level analysis.
 
-        # Lists for scannability (10 points)
-        lists = soup.find_all(['ul', 'ol'])
-        if len(lists) >= 1:
-            score += 10
-        else:
-            issues.append({
-                'severity': 'info',
-                'category': 'content',
-                'title': 'No Lists or Bullet Points',
-                'description': 'Use lists to make content more scannable and digestible.'
-            })
+        The site score is the mean page score. Issues are merged by title,
+        keeping the worst severity and noting how many pages they affect.
+        Details stay those of the homepage, plus each page's score.
+        """
+        severity_rank = {'critical': 0, 'warning': 1, 'info': 2}
+        merged: Dict[Tuple[str, str], Dict] = {}
+        for result in results:
+            for issue in result['issues']:
+                key = (issue['category'], issue['title'])
+                existing = merged.get(key)
+                if existing is None:
+                    merged[key] = dict(issue, pages_affected=1)
+                else:
+                    existing['pages_affected'] += 1
+                    if severity_rank.get(issue['severity'], 3) < severity_rank.get(existing['severity'], 3):
+                        existing['severity'] = issue['severity']
+
+        issues = list(merged.values())
+        if len(pages) > 1:
+            for issue in issues:
+                issue['description'] += f" Affects {issue['pages_affected']} of {len(pages)} pages."
 
         return {
-            'score': min(score, 100),
+            'score': round(sum(result['score'] for result in results) / len(results)),
             'issues': issues,
-            'details': {
-                'word_count': word_count,
-                'sentence_count': sentence_count,
-                'paragraph_count': len(paragraphs),
-                'internal_links': len(internal_links),
-                'external_links': len(external_links),
-                'has_cta': has_cta
-            }
+            'details': dict(results[0]['details']),
+            'page_scores': [
+                {'url': page['url'], 'score': result['score'], 'issues': len(result['issues'])}
+                for page, result in zip(pages, results)
+            ],
         }
 
+    @staticmethod
+    def _percent(count: int, total: int) -> float:
+        return round(count / total * 100, 1) if total else 0.0
+
+    @staticmethod
+    def _find_duplicates(values: List[Optional[str]], pages: List[Dict]) -> List[Dict]:
+        """Values shared by more than one page, with the pages using them."""
+        groups: Dict[str, Tuple[str, List[str]]] = {}
+        for value, page in zip(values, pages):
+            if value and value.strip():
+                _, urls = groups.setdefault(value.strip().lower(), (value.strip(), []))
+                urls.append(page['url'])
+        return [
+            {'value': value, 'urls': urls}
+            for value, urls in groups.values()
+            if len(urls) > 1
+        ]
+
     def _calculate_overall_score(self, seo_score: int, design_score: int, content_score: int) -> int:
         """
         Calculate weighted overall score.
@@ -618,10 +1073,104 @@ class SiteAuditService:
         """
         return int((seo_score * 0.4) + (design_score * 0.35) + (content_score * 0.25))
 
+    async def _load_previous_audit(self, site: str, scope: str) -> Optional[Dict]:
+        try:
+            return await run_snapshot_query('get_previous_audit', site, scope)
+        except Exception as e:
+            logging.error(f"Error loading previous audit for {site}: {e}")
+            return None
+
+    async def _save_snapshots(
+        self,
+        snapshots: Optional[PageSnapshots],
+        scope: str,
+        overall_score: int,
+        issues: List[Dict],
+        suggestions: Optional[List[Dict]],
+    ):
+        """Store page snapshots and this audit's issues for the next re-audit."""
+        if snapshots is None:
+            return
+        await snapshots.save()
+        # Fallback suggestions are not worth reusing
+        if suggestions == FALLBACK_SUGGESTIONS:
+            suggestions = None
+        try:
+            await run_snapshot_query('save_site_snapshot', snapshots.site, scope, overall_score, issues, suggestions)
+        except Exception as e:
+            logging.error(f"Error saving site snapshot for {snapshots.site}: {e}")
+
+    async def wait_for_suggestions(self):
+        """Wait until every deferred suggestion task has finished."""
+        if self._suggestion_tasks:
+            await asyncio.gather(*self._suggestion_tasks, return_exceptions=True)
+
+    async def get_suggestions(self, suggestions_id: str) -> Optional[Dict]:
+        """Deferred suggestions by ID: status 'pending' or 'ready', plus the suggestions."""
+        return await suggestions_store.get(suggestions_key(suggestions_id))
+
+    async def _defer_suggestions(
+        self,
+        audit_data: Dict,
+        domain: str,
+        webhook_url: Optional[str],
+        snapshot: Optional[Tuple[str, str]] = None,
+    ) -> str:
+        suggestions_id = uuid.uuid4().hex
+        await suggestions_store.set(suggestions_key(suggestions_id), {
+            'suggestions_id': suggestions_id,
+            'status': 'pending',
+            'domain': domain,
+            'suggestions': [],
+        })
+        task = asyncio.create_task(self._complete_suggestions(suggestions_id, audit_data, domain, webhook_url, snapshot))
+        self._suggestion_tasks.add(task)
+        task.add_done_callback(self._suggestion_tasks.discard)
+        return suggestions_id
+
+    async def _complete_suggestions(
+        self,
+        suggestions_id: str,
+        audit_data: Dict,
+        domain: str,
+        webhook_url: Optional[str],
+        snapshot: Optional[Tuple[str, str]] = None,
+    ):
+        """snapshot is the (site, scope) whose stored audit gets the suggestions."""
+        suggestions = await self._generate_ai_suggestions(audit_data)
+        if snapshot and suggestions != FALLBACK_SUGGESTIONS:
+            try:
+                await run_snapshot_query('save_site_suggestions', *snapshot, suggestions)
+            except Exception as e:
+                logging.error(f"Error saving suggestions snapshot for {snapshot[0]}: {e}")
+        payload = {
+            'suggestions_id': suggestions_id,
+            'status': 'ready',
+            'domain': domain,
+            'suggestions': suggestions,
+        }
+        await suggestions_store.set(suggestions_key(suggestions_id), payload)
+
+        if webhook_url:
+            try:
+                session = await crawler_client.get_session()
+                async with session.post(webhook_url, json=payload, timeout=WEBHOOK_TIMEOUT) as response:
+                    if response.status >= 400:
+                        print(f"Error delivering suggestions webhook to {webhook_url}: HTTP {response.status}")
+            except Exception as e:
+                print(f"Error delivering suggestions webhook to {webhook_url}: {e}")
+
     async def _generate_ai_suggestions(self, audit_data: Dict) -> List[Dict]:
         """
         Use Claude AI to generate intelligent suggestions.
         """
+        return [suggestion async for suggestion in self._stream_ai_suggestions(audit_data)]
+
+    async def _stream_ai_suggestions(self, audit_data: Dict) -> AsyncIterator[Dict]:
+        """
+        Stream Claude's response, yielding each suggestion as soon as the
+        next one starts (or the response ends).
+        """
         seo = audit_data['seo']
         design = audit_data['design']
         content = audit_data['content']
@@ -645,45 +1194,53 @@ IMPACT: [Expected improvement]
 
 Focus on the most impactful changes first. Be specific and actionable."""
 
-        try:
-            message = await asyncio.to_thread(
-                self.client.messages.create,
-                model="claude-3-haiku-20240307",
-                max_tokens=1500,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
-
-            response_text = message.content[0].text
-            suggestions = self._parse_ai_suggestions(response_text)
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
 
-            return suggestions[:7]  # Limit to 7 suggestions
+        def read_stream():
+            # The Anthropic client is synchronous, so the stream is read in a thread
+            try:
+                with self.client.messages.stream(
+                    model="claude-3-haiku-20240307",
+                    max_tokens=1500,
+                    messages=[{
+                        "role": "user",
+                        "content": prompt
+                    }]
+                ) as stream:
+                    for text in stream.text_stream:
+                        if stop.is_set():
+                            break
+                        loop.call_soon_threadsafe(chunks.put_nowait, text)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        reader = asyncio.create_task(asyncio.to_thread(read_stream))
+        emitted = 0
+        try:
+            response_text = ''
+            while (chunk := await chunks.get()) is not None:
+                response_text += chunk
+                # Everything before the last PRIORITY: marker is complete
+                complete = response_text.rsplit('PRIORITY:', 1)[0]
+                for suggestion in self._parse_ai_suggestions(complete)[emitted:MAX_SUGGESTIONS]:
+                    emitted += 1
+                    yield suggestion
+            await reader
+
+            for suggestion in self._parse_ai_suggestions(response_text)[emitted:MAX_SUGGESTIONS]:
+                emitted += 1
+                yield suggestion
 
         except Exception as e:
             print(f"Error generating AI suggestions: {e}")
-            # Return default suggestions if AI fails
-            return [
-                {
-                    'priority': 'high',
-                    'title': 'Improve Page Load Speed',
-                    'description': 'Optimize images and minimize JavaScript to reduce load time.',
-                    'impact': '15-20% improvement in user engagement'
-                },
-                {
-                    'priority': 'high',
-                    'title': 'Add Missing Meta Descriptions',
-                    'description': 'Write unique, compelling meta descriptions for all pages.',
-                    'impact': '10-15% increase in click-through rate'
-                },
-                {
-                    'priority': 'medium',
-                    'title': 'Enhance Mobile Responsiveness',
-                    'description': 'Ensure all elements scale properly on mobile devices.',
-                    'impact': '25% improvement in mobile user experience'
-                }
-            ]
+            # Return default suggestions if AI fails before suggesting anything
+            if not emitted:
+                for suggestion in FALLBACK_SUGGESTIONS:
+                    yield suggestion
+        finally:
+            stop.set()
 
     def _format_issues_for_prompt(self, issues: List[Dict]) -> str:
         """Format issues for AI prompt."""
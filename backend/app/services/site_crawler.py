@@ -0,0 +1,652 @@
+import aiohttp
+import asyncio
+import heapq
+import re
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urlparse
+from app.core.http_client import READ_CHUNK_BYTES, RequestTiming
+from app.services.audit_snapshot_service import PageSnapshots, content_hash
+from app.services.crawl_traps import UrlPatternGuard
+from app.services.crawl_cache import CachedPage, CrawlCache
+from app.services.link_graph import LinkGraph
+from app.services.page_features import PageFeatures, SelectorSet, extract_page_features
+from app.services.page_renderer import PageRenderer
+from app.services.robots import HostPolicy, RobotsCache
+from app.services.url_canonicalizer import (
+    BloomFilter,
+    UrlCanonicalizer,
+    VisitedSet,
+    default_canonicalizer,
+    make_visited_set,
+)
+
+# (body, url, encoding) -> features; lets the caller move parsing off the event loop
+FeatureExtractor = Callable[[bytes, str, Optional[str], Optional[SelectorSet]], Awaitable[PageFeatures]]
+# Called with each page summary as soon as it is fetched (progress reporting)
+PageCallback = Callable[[Dict], None]
+
+# Rough per-entry cost of a URL held in the frontier/visited set, beyond its characters
+URL_OVERHEAD_BYTES = 120
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+# Priority of URLs found through links rather than the sitemap (the sitemap default)
+DEFAULT_PRIORITY = 0.5
+# End of the document head; <body> covers pages that never close it
+HEAD_END_RE = re.compile(rb'</head\s*>|<body[\s>]', re.IGNORECASE)
+
+
+def unique_links(links: List[str]) -> List[str]:
+    """http(s) links in first-seen order, without fragments or repeats."""
+    unique = {}
+    for link in links:
+        if link.startswith(('http://', 'https://')):
+            unique.setdefault(urldefrag(link)[0], None)
+    return list(unique)
+
+
+class HostLimiter:
+    """
+    Caps the number of in-flight requests against any single host, and
+    spaces request starts when a host asks for a crawl delay.
+    """
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._delays: Dict[str, float] = {}
+        self._pacing_locks: Dict[str, asyncio.Lock] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def set_delay(self, host: str, seconds: float):
+        self._delays[host] = seconds
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        async with semaphore:
+            delay = self._delays.get(host)
+            if delay:
+                await self._pace(host, delay)
+            yield
+
+    async def _pace(self, host: str, delay: float):
+        lock = self._pacing_locks.get(host)
+        if lock is None:
+            lock = self._pacing_locks[host] = asyncio.Lock()
+        async with lock:
+            loop = asyncio.get_running_loop()
+            wait = self._next_start.get(host, 0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_start[host] = loop.time() + delay
+
+
+class FairScheduler(HostLimiter):
+    """
+    Host limiter shared by many concurrent audits (bulk audits).
+
+    At most global_limit requests are in flight across all hosts, and at
+    most per_host against any one host. When a slot frees up, hosts with
+    waiting requests take turns, so a site with thousands of queued URLs
+    cannot starve the others.
+    """
+
+    def __init__(self, global_limit: int, per_host: int):
+        super().__init__(per_host)
+        self.global_limit = max(1, global_limit)
+        self._active = 0
+        self._active_by_host: Dict[str, int] = {}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        # Hosts with waiting requests, in round-robin order
+        self._turns: Deque[str] = deque()
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        delay = self._delays.get(host)
+        if delay:
+            await self._acquire_paced(host, delay)
+        else:
+            await self._acquire(host)
+        try:
+            yield
+        finally:
+            self._release(host)
+
+    async def _acquire_paced(self, host: str, delay: float):
+        # The crawl delay is waited out before queueing for a slot, so a
+        # slow host never holds global capacity while it sleeps
+        lock = self._pacing_locks.get(host)
+        if lock is None:
+            lock = self._pacing_locks[host] = asyncio.Lock()
+        async with lock:
+            loop = asyncio.get_running_loop()
+            wait = self._next_start.get(host, 0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._acquire(host)
+            self._next_start[host] = loop.time() + delay
+
+    async def _acquire(self, host: str):
+        # A host never jumps its own queue; other hosts may use spare capacity
+        if not self._waiters.get(host) and self._has_capacity(host):
+            self._take(host)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self._waiters.get(host)
+        if queue is None:
+            queue = self._waiters[host] = deque()
+            self._turns.append(host)
+        queue.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the request was cancelled
+                self._release(host)
+            raise
+
+    def _has_capacity(self, host: str) -> bool:
+        return self._active < self.global_limit and self._active_by_host.get(host, 0) < self.per_host
+
+    def _take(self, host: str):
+        self._active += 1
+        self._active_by_host[host] = self._active_by_host.get(host, 0) + 1
+
+    def _release(self, host: str):
+        self._active -= 1
+        remaining = self._active_by_host[host] - 1
+        if remaining:
+            self._active_by_host[host] = remaining
+        else:
+            del self._active_by_host[host]
+        self._dispatch()
+
+    def _dispatch(self):
+        # Hosts skipped in a row because they are at their per-host limit
+        blocked = 0
+        while self._turns and self._active < self.global_limit and blocked < len(self._turns):
+            host = self._turns.popleft()
+            queue = self._waiters[host]
+            while queue and queue[0].done():  # cancelled while waiting
+                queue.popleft()
+            if not queue:
+                del self._waiters[host]
+                continue
+            if self._active_by_host.get(host, 0) >= self.per_host:
+                self._turns.append(host)
+                blocked += 1
+                continue
+
+            self._take(host)
+            queue.popleft().set_result(None)
+            blocked = 0
+            if queue:
+                self._turns.append(host)
+            else:
+                del self._waiters[host]
+
+
+class CrawlFrontier:
+    """
+    URLs waiting to be fetched, ordered by crawl depth, then priority,
+    then discovery order. Depth first keeps the crawl breadth-first;
+    priority lets important sitemap URLs go ahead of boilerplate links.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, float, int, str]] = []
+        self._seq = 0
+
+    def push(self, url: str, depth: int, priority: float = DEFAULT_PRIORITY):
+        heapq.heappush(self._heap, (depth, -priority, self._seq, url))
+        self._seq += 1
+
+    def pop(self) -> Tuple[str, int]:
+        depth, _, _, url = heapq.heappop(self._heap)
+        return url, depth
+
+    def clear(self):
+        self._heap.clear()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class MemoryBudget:
+    """
+    Approximate accounting of what one crawl holds in memory: raw bodies
+    waiting to be parsed, retained page summaries and queued URLs.
+    """
+
+    def __init__(self, limit_bytes: Optional[int] = None):
+        self.limit_bytes = limit_bytes
+        self.used_bytes = 0
+        self.peak_bytes = 0
+
+    def add(self, size: int):
+        self.used_bytes += size
+        if self.used_bytes > self.peak_bytes:
+            self.peak_bytes = self.used_bytes
+
+    def release(self, size: int):
+        self.used_bytes -= size
+
+    @property
+    def exceeded(self) -> bool:
+        return self.limit_bytes is not None and self.used_bytes > self.limit_bytes
+
+
+class SiteCrawler:
+    """
+    Breadth-first crawler for a single site.
+
+    URLs wait in a depth/priority frontier; the coordinator hands them to a
+    fixed pool of fetch workers through an asyncio.Queue, never scheduling
+    more fetches than the remaining page budget. Pages are returned in BFS
+    order, so pages[0] is always the start URL.
+
+    With a RobotsCache, the frontier is seeded from the site's sitemaps
+    (highest priority and most recently modified first), discovered links
+    disallowed by robots.txt are skipped and its crawl delay is honoured.
+
+    Every URL is canonicalized before it is queued, and de-duplicated on the
+    canonicalizer's key; a page's <link rel=canonical> target is marked as
+    visited so the same content is not fetched twice. Large crawls track
+    visited keys in a Bloom filter instead of a set. A UrlPatternGuard
+    caps the URLs queued per learned URL template (facets, calendars) and
+    drops crawl traps such as endlessly nested or repeating paths.
+
+    Each response is reduced to a compact summary as soon as it is parsed;
+    raw bodies are never retained. The summary keeps the page's unique
+    out-links (for link checking), and its same-site links are added to
+    link_graph. If a memory budget is set, no new fetches
+    are scheduled once it is exceeded.
+
+    Bodies are streamed and capped at max_page_bytes, and non-HTML
+    responses are dropped before their body is read. With
+    head_only_when_saturated, pages whose links will never be followed
+    (the frontier can already fill the page budget) stop reading at </head>.
+
+    With a CrawlCache, requests carry If-None-Match / If-Modified-Since
+    validators and a 304 reuses the cached body; complete 200 responses
+    that carry validators are written back. cache_read=False skips the
+    revalidation but still refreshes the cache.
+
+    on_page, if given, receives each page summary as soon as it arrives,
+    before the crawl finishes.
+
+    With PageSnapshots, a complete body whose content hash matches the
+    page's last audit reuses the stored features instead of being parsed
+    again; new and changed pages are recorded for the next audit.
+
+    With a PageRenderer, pages whose HTML is only an app shell are loaded
+    in a headless browser and the rendered DOM is analyzed instead. Every
+    other page keeps the plain HTTP path.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        max_pages: int = 5,
+        concurrency: int = 8,
+        per_host_limit: int = 4,
+        timeout: float = 15,
+        extract_features: Optional[FeatureExtractor] = None,
+        memory_budget_bytes: Optional[int] = None,
+        max_page_bytes: Optional[int] = None,
+        head_only_when_saturated: bool = False,
+        cache: Optional[CrawlCache] = None,
+        cache_read: bool = True,
+        robots: Optional[RobotsCache] = None,
+        canonicalizer: Optional[UrlCanonicalizer] = None,
+        visited: Optional[VisitedSet] = None,
+        on_page: Optional[PageCallback] = None,
+        snapshots: Optional[PageSnapshots] = None,
+        host_limiter: Optional[HostLimiter] = None,
+        renderer: Optional[PageRenderer] = None,
+        url_guard: Optional[UrlPatternGuard] = None,
+        selectors: Optional[SelectorSet] = None,
+    ):
+        self.session = session
+        self.max_pages = max_pages
+        self.concurrency = max(1, concurrency)
+        # A shared limiter (e.g. a FairScheduler) spans several concurrent crawls
+        self.host_limiter = host_limiter or HostLimiter(per_host_limit)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.extract_features = extract_features or self._extract_inline
+        self.memory = MemoryBudget(memory_budget_bytes)
+        self.max_page_bytes = max_page_bytes
+        self.head_only_when_saturated = head_only_when_saturated
+        self.cache = cache
+        self.cache_read = cache_read
+        self.cache_hits = 0
+        self.robots = robots
+        self.policy: Optional[HostPolicy] = None
+        self.robots_disallowed = 0
+        self.sitemap_seeded = 0
+        self.canonicalizer = canonicalizer or default_canonicalizer
+        self.visited = visited if visited is not None else make_visited_set(max_pages)
+        self.canonical_skips = 0
+        self.stopped_early = False
+        self.pages_discovered = 0
+        self.on_page = on_page
+        self.snapshots = snapshots
+        self.renderer = renderer
+        self.url_guard = url_guard
+        self.selectors = selectors
+        self.link_graph = LinkGraph()
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            'pages_discovered': self.pages_discovered,
+            'cache_hits': self.cache_hits,
+            'pages_unchanged': self.snapshots.unchanged if self.snapshots else 0,
+            'pages_rendered': self.renderer.pages_rendered if self.renderer else 0,
+            'sitemap_urls': len(self.policy.sitemap_entries) if self.policy else 0,
+            'sitemap_seeded': self.sitemap_seeded,
+            'robots_disallowed': self.robots_disallowed,
+            'canonical_skips': self.canonical_skips,
+            'url_patterns': self.url_guard.report() if self.url_guard else None,
+            'visited_set': 'bloom' if isinstance(self.visited, BloomFilter) else 'exact',
+            'crawl_delay': self.policy.crawl_delay if self.policy else None,
+            'stopped_early': self.stopped_early,
+            'peak_memory_mb': round(self.memory.peak_bytes / (1024 * 1024), 2),
+            'memory_budget_mb': (
+                round(self.memory.limit_bytes / (1024 * 1024), 2)
+                if self.memory.limit_bytes is not None else None
+            ),
+        }
+
+    async def crawl(self, start_url: str) -> List[Dict]:
+        canonicalizer = self.canonicalizer
+        base_domain = canonicalizer.host(start_url)
+        frontier = CrawlFrontier()
+        visited = self.visited
+        if isinstance(visited, BloomFilter):
+            self.memory.add(visited.size_bytes)
+
+        def mark_visited(key: str):
+            visited.add(key)
+            if not isinstance(visited, BloomFilter):
+                self.memory.add(len(key) + URL_OVERHEAD_BYTES)
+
+        def enqueue(url: str, depth: int, priority: float = DEFAULT_PRIORITY):
+            url = canonicalizer.canonicalize(url)
+            # Only crawl same domain
+            if canonicalizer.host(url) != base_domain:
+                return
+            key = canonicalizer.key(url)
+            if key in visited:
+                return
+            if depth and self.policy and not self.policy.can_fetch(url):
+                self.robots_disallowed += 1
+                return
+            if depth and self.url_guard and not self.url_guard.admit(url):
+                # Remembered so the same trap URL is not weighed again from every page
+                mark_visited(key)
+                return
+            mark_visited(key)
+            self.pages_discovered += 1
+            frontier.push(url, depth, priority)
+            self.memory.add(len(url) + URL_OVERHEAD_BYTES)
+
+        if self.robots is not None:
+            try:
+                self.policy = await self.robots.get_policy(self.session, start_url, self.host_limiter)
+            except Exception as e:
+                # A broken robots.txt or sitemap must not fail the audit; crawl without them
+                print(f"Error loading robots.txt and sitemaps for {start_url}: {e}")
+                self.policy = HostPolicy()
+            if self.policy.crawl_delay:
+                self.host_limiter.set_delay(base_domain, self.policy.crawl_delay)
+
+        # The start URL is always fetched: the audit was explicitly requested
+        enqueue(start_url, 0)
+        if self.policy:
+            # Keep some spare seeds in case a few of them fail
+            for entry in self.policy.seeds(self.max_pages * 2):
+                before = len(frontier)
+                enqueue(entry.url, 1, entry.priority)
+                self.sitemap_seeded += len(frontier) - before
+
+        work: asyncio.Queue = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue()
+        workers = [
+            asyncio.create_task(self._worker(work, results))
+            for _ in range(min(self.concurrency, self.max_pages))
+        ]
+
+        # (dispatch order, page) pairs so BFS order can be restored at the end
+        fetched: List[Tuple[int, Dict]] = []
+        pending = 0
+        dispatched = 0
+
+        try:
+            while len(fetched) < self.max_pages:
+                if self.memory.exceeded and frontier:
+                    # Stop scheduling; pages already in flight are still collected
+                    self.stopped_early = True
+                    frontier.clear()
+
+                while frontier and len(fetched) + pending < self.max_pages:
+                    url, depth = frontier.pop()
+                    self.memory.release(len(url) + URL_OVERHEAD_BYTES)
+                    # Links from this page are unnecessary if the frontier alone can
+                    # fill every remaining slot, even if all in-flight fetches fail.
+                    # The start page is always read in full.
+                    head_only = (
+                        self.head_only_when_saturated
+                        and depth > 0
+                        and len(frontier) >= self.max_pages - len(fetched)
+                    )
+                    work.put_nowait((dispatched, url, depth, head_only))
+                    dispatched += 1
+                    pending += 1
+
+                if not pending:
+                    break
+
+                order, page = await results.get()
+                pending -= 1
+                if page is None:
+                    continue
+
+                links = page['links']
+                # Kept (once each, without fragments) for link checking
+                page['links'] = unique_links(links)
+                fetched.append((order, page))
+                self.memory.add(page['features'].approx_size() + sum(map(len, page['links'])))
+                self.memory.add(self.link_graph.add_page(
+                    canonicalizer.key(page['url']),
+                    page['url'],
+                    [canonicalizer.key(link) for link in page['links'] if canonicalizer.host(link) == base_domain],
+                ))
+                if self.on_page is not None:
+                    self.on_page(page)
+
+                # A page that names another URL as canonical covers that URL too
+                canonical_url = page['features'].canonical_url
+                if canonical_url and canonicalizer.host(canonical_url) == base_domain:
+                    canonical_key = canonicalizer.key(canonical_url)
+                    if canonical_key not in visited:
+                        mark_visited(canonical_key)
+                        self.canonical_skips += 1
+
+                # Extract links for further crawling (only if we need more pages)
+                if len(fetched) < self.max_pages:
+                    for absolute_url in links:
+                        enqueue(absolute_url, page['depth'] + 1)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        fetched.sort(key=lambda item: item[0])
+        return [page for _, page in fetched]
+
+    async def _worker(self, work: asyncio.Queue, results: asyncio.Queue):
+        while True:
+            order, url, depth, head_only = await work.get()
+            try:
+                page = await self._fetch_page(url, depth, head_only)
+            except Exception as e:
+                print(f"Error crawling {url}: {e}")
+                page = None
+            results.put_nowait((order, page))
+
+    async def _fetch_page(self, url: str, depth: int, head_only: bool = False) -> Optional[Dict]:
+        cached = await self._cache_get(url)
+        request_headers = cached.conditional_headers() if cached else None
+
+        async with self.host_limiter.slot(urlparse(url).netloc):
+            # Timed inside the slot so queueing behind other fetches is not counted
+            timing = RequestTiming()
+            timing.start()
+            async with self.session.get(
+                url, headers=request_headers, timeout=self.timeout, allow_redirects=True,
+                trace_request_ctx=timing,
+            ) as response:
+                timing.mark_first_byte()
+
+                if response.status == 304 and cached:
+                    # Unchanged since the last crawl: reuse the stored body
+                    self.cache_hits += 1
+                    body, encoding, status = cached.body, cached.encoding, 200
+                    truncated = head_only = False
+                    etag = last_modified = None
+                else:
+                    # Accept 200 and 403 (some sites return 403 but still have content)
+                    if response.status not in [200, 403]:
+                        return None
+
+                    # Skip PDFs, images and other media without downloading them
+                    if 'Content-Type' in response.headers and response.content_type not in HTML_CONTENT_TYPES:
+                        return None
+
+                    body, truncated = await self._read_body(response, head_only)
+                    encoding = response.charset
+                    status = response.status
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+            timing.finish()
+
+        if status == 200 and not truncated and (etag or last_modified):
+            await self._cache_put(url, body, encoding, etag, last_modified)
+
+        return await self._summarize(url, depth, body, encoding, status, timing, truncated, head_only)
+
+    async def _summarize(
+        self,
+        url: str,
+        depth: int,
+        body: bytes,
+        encoding: Optional[str],
+        status: int,
+        timing: RequestTiming,
+        truncated: bool,
+        head_only: bool,
+    ) -> Dict:
+        # The raw body only lives until it has been parsed
+        size = len(body)
+        features = None
+        page_hash = None
+        if self.snapshots is not None and not truncated:
+            page_hash = content_hash(body)
+            features = await self.snapshots.lookup(url, page_hash, self.selectors.names if self.selectors else ())
+        unchanged = features is not None
+
+        if features is None:
+            self.memory.add(size)
+            try:
+                features = await self.extract_features(body, url, encoding, self.selectors)
+            finally:
+                self.memory.release(size)
+
+        rendered = False
+        if self.renderer is not None and not head_only and self.renderer.should_render(features):
+            html = await self.renderer.render(url)
+            if html is not None:
+                self.memory.add(len(html))
+                try:
+                    features = await self.extract_features(html, url, 'utf-8', self.selectors)
+                finally:
+                    self.memory.release(len(html))
+                rendered = True
+                unchanged = False
+
+        # Rendered content can change while the served shell stays the same
+        if page_hash is not None and not unchanged and not rendered:
+            self.snapshots.record(url, page_hash, features)
+
+        # Links are only needed to extend the frontier, so keep them out of the summary
+        links, features.links = features.links, []
+
+        return {
+            'url': url,
+            'features': features,
+            'status': status,
+            'title': features.title,
+            # Headers and body; the phase breakdown is in 'timing'
+            'load_time': timing.total_ms,
+            'timing': timing.to_dict(),
+            'size_bytes': size,
+            'truncated': truncated,
+            'head_only': head_only,
+            'unchanged': unchanged,
+            'rendered': rendered,
+            'depth': depth,
+            'links': links,
+        }
+
+    async def _read_body(self, response: aiohttp.ClientResponse, head_only: bool) -> Tuple[bytes, bool]:
+        """
+        Stream a response body, stopping at max_page_bytes or, for head-only
+        fetches, once the end of <head> has arrived.
+        Returns the bytes read and whether the body was cut short.
+        """
+        buffer = bytearray()
+        async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+            # Re-scan a few bytes before the chunk in case the tag straddles it
+            scan_from = max(0, len(buffer) - 8)
+            buffer.extend(chunk)
+
+            if self.max_page_bytes is not None and len(buffer) >= self.max_page_bytes:
+                del buffer[self.max_page_bytes:]
+                return bytes(buffer), True
+
+            if head_only:
+                match = HEAD_END_RE.search(buffer, scan_from)
+                if match:
+                    del buffer[match.end():]
+                    return bytes(buffer), True
+
+        return bytes(buffer), False
+
+    async def _cache_get(self, url: str) -> Optional[CachedPage]:
+        if self.cache is None or not self.cache_read:
+            return None
+        try:
+            return await self.cache.get(url)
+        except Exception as e:
+            print(f"Crawl cache read failed for {url}: {e}")
+            return None
+
+    async def _cache_put(self, url: str, body: bytes, encoding: Optional[str], etag: Optional[str], last_modified: Optional[str]):
+        if self.cache is None:
+            return
+        try:
+            await self.cache.put(url, body, encoding, etag, last_modified)
+        except Exception as e:
+            print(f"Crawl cache write failed for {url}: {e}")
+
+    @staticmethod
+    async def _extract_inline(
+        body: bytes, url: str, encoding: Optional[str], selectors: Optional[SelectorSet] = None,
+    ) -> PageFeatures:
+        return extract_page_features(body, url, encoding, selectors)
@@ -0,0 +1,137 @@
+import hashlib
+import math
+from typing import Iterable, Optional, Set, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from app.core.config import settings
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Tracking and session parameters that never change page content
+DEFAULT_DENY_PARAMS = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'twclid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'ref_src',
+    'phpsessid', 'jsessionid', 'sessionid', 'sid',
+}
+DEFAULT_DENY_PREFIXES = ('utm_',)
+
+
+class UrlCanonicalizer:
+    """
+    Normalizes crawled URLs so trivial variants are fetched only once.
+
+    canonicalize() gives the URL to fetch: lower-case scheme and host, no
+    default port, no fragment, tracking parameters removed. key() is the
+    stricter identity used for de-duplication: it also ignores http vs
+    https, trailing slashes and query parameter order.
+    """
+
+    def __init__(
+        self,
+        allow_params: Optional[Iterable[str]] = None,
+        deny_params: Iterable[str] = DEFAULT_DENY_PARAMS,
+        deny_prefixes: Iterable[str] = DEFAULT_DENY_PREFIXES,
+    ):
+        # With an allow-list, every other query parameter is dropped
+        self.allow_params = {p.lower() for p in allow_params} if allow_params else None
+        self.deny_params = {p.lower() for p in deny_params}
+        self.deny_prefixes = tuple(p.lower() for p in deny_prefixes)
+
+    def _keep_param(self, name: str) -> bool:
+        lowered = name.lower()
+        if self.allow_params is not None:
+            return lowered in self.allow_params
+        return lowered not in self.deny_params and not lowered.startswith(self.deny_prefixes)
+
+    def _split(self, url: str):
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').lower().rstrip('.')
+        if ':' in host:
+            host = f"[{host}]"  # IPv6 literal
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+        if port and port != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+        params = [
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if self._keep_param(name)
+        ]
+        return scheme, host, parts.path or '/', params
+
+    def host(self, url: str) -> str:
+        """Lower-case host with any non-default port."""
+        return self._split(url)[1]
+
+    def canonicalize(self, url: str) -> str:
+        scheme, host, path, params = self._split(url)
+        return urlunsplit((scheme, host, path, urlencode(params), ''))
+
+    def key(self, url: str) -> str:
+        _, host, path, params = self._split(url)
+        if len(path) > 1:
+            path = path.rstrip('/') or '/'
+        return urlunsplit(('', host, path, urlencode(sorted(params)), ''))
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set for very large crawls.
+
+    Never reports a URL it has not seen as unseen; the configured
+    false-positive rate is the chance a new URL is wrongly treated as
+    already visited (and skipped).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+VisitedSet = Union[Set[str], BloomFilter]
+
+
+def make_visited_set(max_pages: int) -> VisitedSet:
+    """A plain set for normal audits, a Bloom filter for sitemap-scale crawls."""
+    if max_pages < settings.SITE_AUDIT_BLOOM_VISITED_THRESHOLD:
+        return set()
+    error_rate = settings.SITE_AUDIT_BLOOM_ERROR_RATE
+    # Discovered URLs far outnumber fetched pages, but the filter must stay
+    # well inside the crawl's memory budget, whatever depth was requested
+    bits_per_url = -math.log(error_rate) / (math.log(2) ** 2)
+    max_capacity = int(settings.SITE_AUDIT_BLOOM_MAX_MB * 1024 * 1024 * 8 / bits_per_url)
+    capacity = min(max_pages * settings.SITE_AUDIT_LINKS_PER_PAGE_ESTIMATE, max_capacity)
+    return BloomFilter(capacity, error_rate)
+
+
+default_canonicalizer = UrlCanonicalizer(
+    allow_params=settings.SITE_AUDIT_ALLOW_QUERY_PARAMS or None,
+    deny_params=DEFAULT_DENY_PARAMS | set(settings.SITE_AUDIT_DENY_QUERY_PARAMS),
+)
@@ -0,0 +1,49 @@
+"""
+Celery worker for background site audits.
+
+Run with:
+    celery -A app.worker worker --loglevel=info
+
+Prefork pool children are daemonic and cannot start the HTML parser
+process pool, so pages are parsed on threads inside the worker.
+"""
+import asyncio
+from typing import Optional
+from app.core.celery_app import celery_app
+from app.core.database import init_db
+from app.services.audit_job_service import run_audit_job as run_audit_job_async
+from app.services.site_audit_service import SiteAuditService
+
+_audit_service: Optional[SiteAuditService] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    # One loop per worker process keeps the crawler's connection pool, the
+    # parse pool semaphore and the Redis client warm between jobs
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def _get_audit_service() -> SiteAuditService:
+    global _audit_service
+    if _audit_service is None:
+        init_db()
+        _audit_service = SiteAuditService()
+    return _audit_service
+
+
+async def _run_audit_job(job_id: str):
+    service = _get_audit_service()
+    await run_audit_job_async(job_id, service)
+    # The loop only runs while a task does, so deferred suggestions are
+    # seen through here rather than stalling until the next job
+    await service.wait_for_suggestions()
+
+
+@celery_app.task(name="app.worker.run_audit_job")
+def run_audit_job(job_id: str):
+    _get_loop().run_until_complete(_run_audit_job(job_id))
@@ -0,0 +1,141 @@
+"""
+Benchmark the audit rule registry.
+
+Parses a set of generated pages and reports:
+- feature extraction time, with and without a custom rule pack's selectors
+- scoring time per page for the base rules and base + pack
+- the cost of every rule, most expensive first
+
+Run from the backend directory (reads settings from .env like the app):
+
+    python scripts/benchmark_rules.py --pages 500 --pack packs/acme.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.audit_rules import BASE_RULE_SET, CATEGORIES, CompiledRules, RuleSet  # noqa: E402
+from app.services.page_features import extract_page_features  # noqa: E402
+
+# Used when no --pack is given
+SAMPLE_PACK = {
+    'name': 'sample',
+    'version': 1,
+    'selectors': {
+        'promo_banners': 'div.promo',
+        'phone_links': 'a[href^="tel:"]',
+        'newsletter_forms': 'form.newsletter',
+    },
+    'rules': [
+        {'id': 'sample.phone.ok', 'category': 'content', 'group': 'phone', 'selector': 'phone_links',
+         'when': ['present'], 'points': 5},
+        {'id': 'sample.phone.missing', 'category': 'content', 'group': 'phone', 'severity': 'info',
+         'title': 'No Click-to-Call Link', 'message': 'Add a tel: link so mobile visitors can call.'},
+        {'id': 'sample.promos.many', 'category': 'design', 'group': 'promos', 'selector': 'promo_banners',
+         'when': ['>', 2], 'severity': 'warning', 'title': 'Too Many Promo Banners',
+         'message': 'Found {promo_banners} promo banners.'},
+        # Reweights the base title check
+        {'id': 'sample.title.ok', 'category': 'seo', 'group': 'title', 'selector': 'title_length',
+         'when': ['between', 20, 70], 'points': 15},
+        {'id': 'sample.title.missing', 'category': 'seo', 'group': 'title', 'severity': 'critical',
+         'title': 'Missing Title Tag', 'message': 'Every page should have a title tag.'},
+    ],
+}
+
+
+def generate_page(rng: random.Random, index: int) -> str:
+    head = [f'<title>{"Page title " * rng.randint(0, 8)}</title>']
+    if rng.random() < 0.7:
+        head.append(f'<meta name="description" content="{"d" * rng.randint(50, 200)}">')
+    if rng.random() < 0.6:
+        head.append('<meta name="viewport" content="width=device-width">')
+    head += ['<meta property="og:title" content="x">'] * rng.randint(0, 4)
+    head += [f'<link rel="stylesheet" href="/css/{i}.css">' for i in range(rng.randint(0, 4))]
+    head += [f'<script src="/js/{i}.js"></script>' for i in range(rng.randint(0, 4))]
+
+    body = ['<nav>' + ''.join(f'<a href="/nav/{i}">Nav {i}</a>' for i in range(20)) + '</nav>']
+    for section in range(rng.randint(2, 12)):
+        body.append(f'<h2>Section {section}</h2>')
+        words = ' '.join(rng.choice(('alpha', 'beta', 'gamma', 'delta', 'audit.')) for _ in range(rng.randint(40, 200)))
+        body.append(f'<p>{words} <a href="/page/{index}/{section}">more</a></p>')
+        if rng.random() < 0.5:
+            body.append('<ul>' + '<li>item</li>' * rng.randint(2, 8) + '</ul>')
+        if rng.random() < 0.5:
+            body.append(f'<img src="/img/{section}.jpg" alt="x" loading="lazy">')
+        if rng.random() < 0.3:
+            body.append('<div class="promo">Sale</div>')
+    if rng.random() < 0.5:
+        body.append('<a href="tel:+15550100">Call us</a>')
+    body.append('<footer><form class="newsletter"><button>Subscribe</button></form></footer>')
+    return f'<html><head>{"".join(head)}</head><body>{"".join(body)}</body></html>'
+
+
+def timed(function, *args, rounds: int = 1) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function(*args)
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--pack', help='rule pack JSON file (default: a built-in sample pack)')
+    parser.add_argument('--top', type=int, default=15, help='rules listed in the per-rule table')
+    args = parser.parse_args()
+
+    if args.pack:
+        with open(args.pack, encoding='utf-8') as f:
+            pack = RuleSet.from_dict(json.load(f))
+    else:
+        pack = RuleSet.from_dict(SAMPLE_PACK)
+    base_rules = CompiledRules(BASE_RULE_SET)
+    pack_rules = CompiledRules(BASE_RULE_SET, pack)
+
+    rng = random.Random(42)
+    documents = [generate_page(rng, i).encode('utf-8') for i in range(args.pages)]
+    url = 'https://example.com/'
+
+    def extract_all(selectors):
+        return [extract_page_features(document, url, 'utf-8', selectors) for document in documents]
+
+    extract_all(None)  # warm up
+    base_extract = timed(extract_all, None, rounds=args.rounds)
+    pack_extract = timed(extract_all, pack_rules.selectors, rounds=args.rounds)
+    pages = [
+        {'url': url, 'features': features, 'load_time': 300, 'size_bytes': len(document)}
+        for features, document in zip(extract_all(pack_rules.selectors), documents)
+    ]
+
+    def score_all(rules):
+        for page in pages:
+            for category in CATEGORIES:
+                rules.evaluate(category, page)
+
+    score_all(base_rules)  # warm up
+    base_score = timed(score_all, base_rules, rounds=args.rounds)
+    pack_score = timed(score_all, pack_rules, rounds=args.rounds)
+
+    per_page = lambda seconds: seconds / len(pages) * 1e6
+    print(f"{len(pages)} pages, base rules v{BASE_RULE_SET.version} ({base_rules.info['rules']} rules), "
+          f"pack {pack.name!r} v{pack.version} ({len(pack.rules)} rules, {len(pack.selectors)} selectors)")
+    print(f"  extract, base:        {per_page(base_extract):9.1f} us/page")
+    print(f"  extract, with pack:   {per_page(pack_extract):9.1f} us/page "
+          f"({(pack_extract / base_extract - 1) * 100:+.1f}%)")
+    print(f"  score, base:          {per_page(base_score):9.1f} us/page")
+    print(f"  score, base + pack:   {per_page(pack_score):9.1f} us/page")
+
+    print(f"\nPer-rule cost, base + pack (top {args.top}):")
+    print(f"  {'rule':40} {'category':8} {'evaluated':>9} {'us/page':>9}")
+    for entry in pack_rules.profile(pages, rounds=args.rounds)[:args.top]:
+        print(f"  {entry['rule']:40} {entry['category']:8} {entry['evaluated_pct']:8.1f}% {entry['us_per_page']:9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Settings are read when app.core.config is imported, so configure a
+# throwaway environment before any test imports the app
+_tmp = tempfile.mkdtemp(prefix="seo-geo-tests-")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("CRAWL_CACHE_PATH", f"{_tmp}/crawl_cache.db")
+os.environ.setdefault("SCREENSHOTS_ENABLED", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,31 @@
+import pytest
+
+from app.services.audit_rules import BASE_RULE_SET, CompiledRules, RuleRegistry, RuleSet
+from app.services.page_features import PageFeatures
+
+
+def _pack(message: str) -> RuleSet:
+    return RuleSet.from_dict({
+        'name': 'test',
+        'version': 1,
+        'rules': [{
+            'id': 'test.alt', 'category': 'seo', 'group': 'alt_text', 'severity': 'info',
+            'title': 'Image Alt Text', 'message': message,
+        }],
+    })
+
+
+def test_message_format_failure_falls_back_to_raw_message():
+    # alt_percentage is None on a page without images
+    rules = CompiledRules(BASE_RULE_SET, _pack('{alt_percentage:.0f}% of images have alt text.'))
+    result = rules.evaluate('seo', {'url': 'https://example.com/', 'features': PageFeatures()})
+    issue = next(issue for issue in result['issues'] if issue['title'] == 'Image Alt Text')
+    assert issue['description'] == '{alt_percentage:.0f}% of images have alt text.'
+
+
+@pytest.mark.parametrize('message', ['Unclosed {alt_percentage', '{}', '{features.title}', '{title!x}'])
+def test_invalid_message_templates_are_rejected_on_register(message):
+    registry = RuleRegistry(BASE_RULE_SET)
+    with pytest.raises(ValueError):
+        registry.register(_pack(message))
+    assert not registry.has('test')
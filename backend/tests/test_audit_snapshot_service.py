@@ -0,0 +1,62 @@
+import asyncio
+
+from app.core.database import SessionLocal, init_db
+from app.services import audit_snapshot_service
+from app.services.audit_snapshot_service import AuditSnapshotService, PageSnapshots, audit_scope, page_scope
+
+ISSUES = [{'severity': 'warning', 'category': 'seo', 'title': 'Missing Meta Description'}]
+
+
+def _service() -> AuditSnapshotService:
+    init_db()
+    return AuditSnapshotService(SessionLocal())
+
+
+def test_save_pages_upserts_across_sessions():
+    first, second = _service(), _service()
+    scope = page_scope('auto')
+    first.save_pages('upsert.example', scope, {'//upsert.example/': ('a', {'title': 'A'})})
+    # A concurrent audit that loaded no snapshots writes the same page
+    second.save_pages('upsert.example', scope, {'//upsert.example/': ('b', {'title': 'B'})})
+
+    assert first.get_page_hashes('upsert.example', scope) == {'//upsert.example/': 'b'}
+    assert first.get_page_features('upsert.example', scope, ['//upsert.example/', '//upsert.example/new']) == {
+        '//upsert.example/': {'title': 'B'},
+    }
+    assert first.get_page_hashes('upsert.example', page_scope('always')) == {}
+
+
+def test_previous_audit_is_scoped_by_audit_settings():
+    service = _service()
+    service.save_site_snapshot('scoped.example', audit_scope(5), 80, ISSUES, None)
+    service.save_site_snapshot('scoped.example', audit_scope(5), 85, ISSUES, None)
+
+    assert service.get_previous_audit('scoped.example', audit_scope(5))['overall_score'] == 85
+    assert service.get_previous_audit('scoped.example', audit_scope(50)) is None
+    assert service.get_previous_audit('scoped.example', audit_scope(5, 'always')) is None
+    assert service.get_previous_audit('scoped.example', audit_scope(5, rule_pack='acme')) is None
+
+
+def test_concurrent_lookups_share_one_query(monkeypatch):
+    scope = page_scope('auto')
+    pages = {f'//batched.example/{i}': (f'hash-{i}', {'title': f'Page {i}'}) for i in range(20)}
+    _service().save_pages('batched.example', scope, pages)
+
+    queries = []
+    run_query = audit_snapshot_service.run_snapshot_query
+
+    async def counting_query(method, *args):
+        queries.append(method)
+        return await run_query(method, *args)
+
+    monkeypatch.setattr(audit_snapshot_service, 'run_snapshot_query', counting_query)
+
+    async def run():
+        snapshots = await PageSnapshots.load('batched.example', scope)
+        return await asyncio.gather(*(
+            snapshots.lookup(f'https://batched.example/{i}', f'hash-{i}') for i in range(20)
+        ))
+
+    features = asyncio.run(run())
+    assert [page.title for page in features] == [f'Page {i}' for i in range(20)]
+    assert queries == ['get_page_hashes', 'get_page_features']
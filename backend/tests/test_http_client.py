@@ -0,0 +1,18 @@
+import asyncio
+
+from app.core.http_client import CrawlerClient
+
+
+def test_start_on_a_new_loop_closes_the_old_session():
+    client = CrawlerClient()
+
+    async def start():
+        return await client.start()
+
+    first = asyncio.run(start())
+    second = asyncio.run(start())
+    assert first.closed
+    assert second is not first and not second.closed
+
+    asyncio.run(client.close())
+    assert second.closed
@@ -0,0 +1,39 @@
+import asyncio
+import gzip
+
+from app.services.robots import HostPolicy, RobotsCache, parse_sitemap
+
+SITEMAP = b"""<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<url><loc>https://example.com/a</loc><priority>0.8</priority></url></urlset>"""
+
+
+def test_parse_sitemap_gzip():
+    entries, children = parse_sitemap(gzip.compress(SITEMAP))
+    assert [entry.url for entry in entries] == ["https://example.com/a"]
+    assert children == []
+
+
+def test_parse_sitemap_corrupt_gzip():
+    assert parse_sitemap(b"\x1f\x8b\x08\x00not really gzip") == ([], [])
+
+
+def test_get_policy_is_single_flight_and_bounded(monkeypatch):
+    loads = []
+
+    async def load_policy(self, session, origin, host_limiter=None):
+        loads.append(origin)
+        await asyncio.sleep(0.01)
+        return HostPolicy()
+
+    monkeypatch.setattr(RobotsCache, "_load_policy", load_policy)
+    cache = RobotsCache(ttl_seconds=60, max_entries=2)
+
+    async def run():
+        await asyncio.gather(*(cache.get_policy(None, "https://a.example/page") for _ in range(5)))
+        await cache.get_policy(None, "https://b.example/")
+        await cache.get_policy(None, "https://c.example/")
+        await cache.get_policy(None, "https://a.example/")
+
+    asyncio.run(run())
+    assert loads == ["https://a.example", "https://b.example", "https://c.example", "https://a.example"]
+    assert len(cache._policies) == 2
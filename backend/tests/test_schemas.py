@@ -0,0 +1,16 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.schemas.site_audit import BulkAuditRequest, SiteAuditRequest
+
+LEAD = {"user_name": "Test", "user_role": "QA", "user_email": "qa@example.com"}
+
+
+@pytest.mark.parametrize("depth", [0, settings.SITE_AUDIT_MAX_REQUEST_DEPTH + 1, settings.SITE_AUDIT_MAX_PAGES])
+def test_requested_depth_is_capped(depth):
+    with pytest.raises(ValidationError):
+        SiteAuditRequest(url="https://example.com/", depth=depth, **LEAD)
+    with pytest.raises(ValidationError):
+        BulkAuditRequest(urls=["https://example.com/"], depth=depth, **LEAD)
+
@@ -0,0 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.core.database import init_db
+from app.services.screenshot_service import ScreenshotService
+
+
+class FakePage:
+    async def goto(self, url, **kwargs):
+        pass
+
+    async def screenshot(self, **kwargs):
+        return b'\xff\xd8 fake jpeg'
+
+
+class FakePool:
+    @asynccontextmanager
+    async def page(self):
+        yield FakePage()
+
+
+def test_capture_stores_in_database_and_returns_absolute_url():
+    init_db()
+    # Two workers capturing the same render share one stored image
+    first = ScreenshotService(FakePool(), 'https://api.example.com/', 'jpeg', 70, 5)
+    second = ScreenshotService(FakePool(), 'https://api.example.com/', 'jpeg', 70, 5)
+    url = asyncio.run(first.capture('https://example.com/'))
+    assert asyncio.run(second.capture('https://example.com/')) == url
+
+    assert url.startswith('https://api.example.com/api/site-audit/screenshots/')
+    name = url.rsplit('/', 1)[1]
+    assert second.load(name) == (b'\xff\xd8 fake jpeg', 'image/jpeg')
+    assert second.load('../../etc/passwd') is None
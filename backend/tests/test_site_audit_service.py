@@ -0,0 +1,65 @@
+import asyncio
+
+from app.services.site_audit_service import SiteAuditService
+
+
+def _recording_service(monkeypatch):
+    runs = []
+
+    async def run_audit(self, url, depth, bypass_cache, defer_suggestions=False, suggestions_webhook_url=None,
+                        host_limiter=None, include_screenshot=False, render_mode=None, rule_pack=None):
+        runs.append(suggestions_webhook_url)
+        suggestions_id = f"id-{len(runs)}"
+        await asyncio.sleep(0.05)
+        return {'suggestions_id': suggestions_id, 'suggestions_status': 'pending'}
+
+    monkeypatch.setattr(SiteAuditService, "_run_audit", run_audit)
+    return SiteAuditService(), runs
+
+
+def test_each_webhook_gets_its_own_deferred_audit(monkeypatch):
+    service, runs = _recording_service(monkeypatch)
+
+    async def audit(webhook):
+        return await service.audit_website(
+            "https://webhooks.example/", defer_suggestions=True, suggestions_webhook_url=webhook,
+        )
+
+    async def run():
+        return await asyncio.gather(audit("https://a.example/hook"), audit("https://b.example/hook"))
+
+    first, second = asyncio.run(run())
+    assert sorted(runs) == ["https://a.example/hook", "https://b.example/hook"]
+    assert first['suggestions_id'] != second['suggestions_id']
+
+
+def test_closing_bulk_audit_cancels_unfinished_crawls(monkeypatch):
+    cancelled = []
+    limiters = []
+
+    async def run_audit(self, url, depth, bypass_cache, defer_suggestions=False, suggestions_webhook_url=None,
+                        host_limiter=None, include_screenshot=False, render_mode=None, rule_pack=None):
+        limiters.append(host_limiter)
+        try:
+            await asyncio.sleep(0 if "fast" in url else 10)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        return {}
+
+    monkeypatch.setattr(SiteAuditService, "_run_audit", run_audit)
+    service = SiteAuditService()
+
+    async def run():
+        outcomes = service.bulk_audit(["https://fast.example/", "https://slow.example/"], force_refresh=True)
+        first = await outcomes.__anext__()
+        # The NDJSON client disconnects after the first line
+        await outcomes.aclose()
+        await asyncio.sleep(0.01)
+        # Checked before asyncio.run() cancels whatever is left over
+        return first, list(cancelled)
+
+    first, cancelled_on_close = asyncio.run(run())
+    assert first['url'] == "https://fast.example/"
+    assert cancelled_on_close == ["https://slow.example/"]
+    assert limiters == [service._bulk_scheduler] * 2
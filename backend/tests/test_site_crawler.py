@@ -0,0 +1,24 @@
+import asyncio
+
+from app.services.site_crawler import FairScheduler
+
+
+def test_crawl_delay_does_not_hold_a_global_slot():
+    scheduler = FairScheduler(global_limit=1, per_host=1)
+    scheduler.set_delay('slow.example', 0.3)
+    started = {}
+
+    async def fetch(name: str, host: str):
+        async with scheduler.slot(host):
+            started[name] = asyncio.get_running_loop().time()
+
+    async def run():
+        begin = asyncio.get_running_loop().time()
+        await fetch('slow-1', 'slow.example')
+        # slow-2 waits out the crawl delay; fast must not queue behind it
+        await asyncio.gather(fetch('slow-2', 'slow.example'), fetch('fast', 'fast.example'))
+        return begin
+
+    begin = asyncio.run(run())
+    assert started['fast'] - begin < 0.1
+    assert started['slow-2'] - started['slow-1'] >= 0.29
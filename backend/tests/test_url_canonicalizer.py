@@ -0,0 +1,10 @@
+from app.core.config import settings
+from app.services.url_canonicalizer import BloomFilter, make_visited_set
+
+
+def test_visited_set_is_capped_for_huge_crawls():
+    visited = make_visited_set(10 ** 8)
+    assert isinstance(visited, BloomFilter)
+    assert visited.size_bytes <= settings.SITE_AUDIT_BLOOM_MAX_MB * 1024 * 1024
+    visited.add("//example.com/")
+    assert "//example.com/" in visited
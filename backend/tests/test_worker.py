@@ -0,0 +1,150 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import billiard
+import pytest
+
+from app import worker
+from app.core.config import settings
+from app.core.database import SessionLocal, init_db
+from app.schemas.site_audit import SiteAuditRequest
+from app.services.audit_job_service import AuditJobService, run_audit_job
+
+PAGE = b"""<html><head><title>Background audit test page</title>
+<meta name="description" content="A small page audited by a background job in a daemonic worker process.">
+</head><body><h1>Hello</h1><p>One sentence here. Another sentence there.</p>
+<a href="/about">About</a></body></html>"""
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path in ("/", "/about"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def _run_job_in_worker(url: str, results):
+    settings.SITE_AUDIT_PARSE_WORKERS = 2
+    init_db()
+    service = worker._get_audit_service()
+
+    async def no_suggestions(audit_data):
+        return []
+
+    service._generate_ai_suggestions = no_suggestions
+
+    db = SessionLocal()
+    try:
+        jobs = AuditJobService(db)
+        job = jobs.create_job(SiteAuditRequest(
+            url=url, depth=2, user_name="Test", user_role="QA", user_email="qa@example.com",
+        ))
+        worker.run_audit_job(job.id)
+        db.expire_all()
+        job = jobs.get_job(job.id)
+        results.put((job.status, job.error, job.result and len(job.result["pages"])))
+    finally:
+        db.close()
+
+
+def test_run_audit_job_in_daemonic_worker_process(site):
+    # Celery's prefork pool runs tasks in daemonic billiard processes
+    results = billiard.Queue()
+    process = billiard.Process(target=_run_job_in_worker, args=(site, results))
+    process.daemon = True
+    process.start()
+    status, error, pages = results.get(timeout=60)
+    process.join(timeout=10)
+
+    assert status == "completed", error
+    assert pages == 2
+
+
+# A Celery worker as deployed: its own interpreter, engine and sessions,
+# sharing only the configured database with the API
+WORKER_SCRIPT = """
+import sys
+from app import worker
+
+async def no_suggestions(audit_data):
+    return []
+
+worker._get_audit_service()._generate_ai_suggestions = no_suggestions
+worker.run_audit_job(sys.argv[1])
+"""
+
+
+def test_job_queued_by_api_is_run_by_separate_worker_process(site):
+    init_db()
+    db = SessionLocal()
+    try:
+        jobs = AuditJobService(db)
+        job = jobs.create_job(SiteAuditRequest(
+            url=site, depth=2, user_name="Test", user_role="QA", user_email="qa@example.com",
+        ))
+
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, "-c", WORKER_SCRIPT, job.id], cwd=backend_dir, check=True, timeout=120)
+
+        db.expire_all()
+        job = jobs.get_job(job.id)
+        assert job.status == "completed", job.error
+        assert len(job.result["pages"]) == 2
+    finally:
+        db.close()
+
+
+def test_run_audit_job_passes_request_options():
+    class RecordingService:
+        async def audit_website(self, **kwargs):
+            self.kwargs = kwargs
+            return {}
+
+    init_db()
+    db = SessionLocal()
+    try:
+        job = AuditJobService(db).create_job(SiteAuditRequest(
+            url="https://example.com/", depth=3, include_screenshot=False, defer_suggestions=True,
+            suggestions_webhook_url="https://hooks.example.com/done", render_mode="never", rule_pack="acme",
+            user_name="Test", user_role="QA", user_email="qa@example.com",
+        ))
+    finally:
+        db.close()
+
+    service = RecordingService()
+    asyncio.run(run_audit_job(job.id, service))
+    assert service.kwargs == {
+        "url": "https://example.com/",
+        "depth": 3,
+        "bypass_cache": False,
+        "force_refresh": False,
+        "defer_suggestions": True,
+        "suggestions_webhook_url": "https://hooks.example.com/done",
+        "include_screenshot": False,
+        "render_mode": "never",
+        "rule_pack": "acme",
+    }
@@ -83,7 +83,7 @@ export default function SiteAuditPage() {
       const response = await axios.post(`${API_BASE_URL}/site-audit/analyze`, {
         url: url,
         depth: 5,
-        include_screenshot: true,
+        include_screenshot: false,  // not shown on this page; skips the browser capture
         user_name: userName,
         user_role: userRole,
         user_email: userEmail,